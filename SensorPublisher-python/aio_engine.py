@@ -0,0 +1,287 @@
+import asyncio
+import signal
+import threading
+import time
+
+import paho.mqtt.client as mqtt
+
+from mqtt_pool import PublishStats, create_mqtt_client, mqtt_address, client_id_prefix, shard_of
+from sensor_mqtt import StatsPrinter
+
+
+# asyncio 발행 엔진
+# 기본 발행/수동 입력 생성기를 모두 코루틴으로 돌리고, 하나의 큐 → 송신 코루틴으로 모은다.
+# paho 는 asyncio 이벤트 루프 위에서 소켓 콜백(add_reader/add_writer)으로 구동하고,
+# 미확인(in-flight) 메시지 수를 세마포어로 제한한다.
+#   - QoS0 : 소켓에 쓰인 시점(on_publish)에 반환
+#   - QoS1/2 : 브로커 PUBACK/PUBCOMP(on_publish) 시점에 반환
+# 브로커가 느려지면 세마포어 → 큐 → 생성기 순으로 대기(backpressure)가 걸려
+# paho 내부 큐가 무한히 커지지 않는다.
+# 연결이 끊긴 동안
+#   - QoS1/2 : paho 가 재전송용으로 보관한 메시지는 윈도 자리를 계속 차지 (재연결 후 on_publish 에서 반환)
+#              paho 보관 개수도 max_queued_messages 로 윈도 크기까지만
+#   - QoS0   : paho 가 버리므로 송신 코루틴이 재연결까지 대기
+# connect/reconnect(소켓 연결 + TLS)는 이벤트 루프를 막지 않도록 executor 스레드에서 실행한다.
+# DB 싱크(DATA_SINK=db/both)도 큐가 차면 기다리지 않고 버린 행 수만 센다.
+# MQTT_POOL_SIZE > 1 이면 연결마다 큐/송신 코루틴을 두고 토픽 해시로 나눈다 (토픽별 순서 유지).
+
+
+class AsyncMqtt:
+    """이벤트 루프에 붙인 paho 클라이언트 + in-flight 윈도"""
+
+    def __init__(self, env, loop, max_inflight=1000, client_id="", log=print, metrics=None):
+        self.env = env
+        self.loop = loop
+        self.client_id = client_id
+        self.log = log
+        self.qos = int(env.get("MQTT_QOS", "0"))
+        self.retain = str(env.get("MQTT_RETAIN", "false")).lower() in ("1", "true", "yes", "y", "on")
+        self.max_inflight = max_inflight
+        self.window = asyncio.Semaphore(max_inflight)
+        self.inflight = 0
+        self.online = asyncio.Event()
+        self._loop_thread = threading.get_ident()
+
+        self.client = create_mqtt_client(env, client_id, log=log)
+        # paho 자체 QoS1/2 in-flight 제한(기본 20)과 보관 큐를 윈도 크기에 맞춤
+        self.client.max_inflight_messages_set(max_inflight)
+        self.client.max_queued_messages_set(max_inflight)
+        on_connect, on_disconnect = self.client.on_connect, self.client.on_disconnect
+
+        def connected(c, userdata, flags, rc):
+            on_connect(c, userdata, flags, rc)
+            if rc == 0:
+                self._in_loop(self.online.set)
+
+        def disconnected(c, userdata, rc):
+            on_disconnect(c, userdata, rc)
+            self._in_loop(self.online.clear)
+
+        self.client.on_connect = connected
+        self.client.on_disconnect = disconnected
+        self.client.on_publish = self._on_publish
+        self.client.on_socket_open = self._on_socket_open
+        self.client.on_socket_close = self._on_socket_close
+        self.client.on_socket_register_write = self._on_register_write
+        self.client.on_socket_unregister_write = self._on_unregister_write
+        # QoS>0 이면 on_publish 를 감싸서 브로커 확인 지연 측정
+        self.acks = metrics.track_acks(self.client) if metrics is not None and self.qos > 0 else None
+        self._misc = None
+
+    def _in_loop(self, fn, *args):
+        """paho 콜백이 executor 스레드(connect/reconnect)에서 오면 이벤트 루프로 넘김 (순서 유지)"""
+        if threading.get_ident() == self._loop_thread:
+            fn(*args)
+        else:
+            self.loop.call_soon_threadsafe(fn, *args)
+
+    # ---- paho 소켓 콜백 ----
+    # 소켓은 콜백 직후 닫힐 수 있으므로 fd 번호로 등록/해제한다.
+    def _on_socket_open(self, client, userdata, sock):
+        self._in_loop(self._watch, sock.fileno())
+
+    def _watch(self, fd):
+        self.loop.add_reader(fd, self.client.loop_read)
+        if self._misc is None or self._misc.done():
+            self._misc = self.loop.create_task(self._misc_loop())
+
+    def _on_socket_close(self, client, userdata, sock):
+        self._in_loop(self._unwatch, sock.fileno())
+
+    def _unwatch(self, fd):
+        self.loop.remove_reader(fd)
+        self.loop.remove_writer(fd)
+
+    def _on_register_write(self, client, userdata, sock):
+        self._in_loop(self.loop.add_writer, sock.fileno(), client.loop_write)
+
+    def _on_unregister_write(self, client, userdata, sock):
+        self._in_loop(self.loop.remove_writer, sock.fileno())
+
+    def _on_publish(self, client, userdata, mid):
+        self._release()
+
+    def _release(self):
+        if self.inflight > 0:
+            self.inflight -= 1
+            self.window.release()
+
+    async def _misc_loop(self):
+        """keepalive/재전송 처리, 연결이 끊기면 2초 간격 재연결"""
+        while True:
+            rc = self.client.loop_misc()
+            if rc != mqtt.MQTT_ERR_SUCCESS:
+                await asyncio.sleep(2.0)
+                try:
+                    await self.loop.run_in_executor(None, self.client.reconnect)
+                except Exception as e:
+                    self.log(f"[MQTT] reconnect failed: {e}")
+                continue
+            await asyncio.sleep(1.0)
+
+    async def connect(self):
+        host, port = mqtt_address(self.env)
+        try:
+            await self.loop.run_in_executor(None, self.client.connect, host, port, 30)
+        except Exception as e:
+            self.log(f"[MQTT] connect failed: {e}")
+            # 재연결은 _misc_loop 가 담당
+            self._misc = self.loop.create_task(self._misc_loop())
+
+    async def publish(self, topic, data):
+        """윈도에 자리가 날 때까지 대기 후 발행, 성공(또는 paho 가 재전송용으로 보관) 여부 반환"""
+        if self.qos == 0 and not self.online.is_set():
+            await self.online.wait()  # QoS0 는 연결이 없으면 paho 가 버림
+        await self.window.acquire()
+        self.inflight += 1
+        try:
+            info = self.client.publish(topic, data, qos=self.qos, retain=self.retain)
+        except Exception:
+            self._release()  # 예외면 on_publish 가 오지 않으므로 자리 반납
+            raise
+        kept = info.rc == mqtt.MQTT_ERR_SUCCESS or (info.rc == mqtt.MQTT_ERR_NO_CONN and self.qos > 0)
+        if not kept:
+            # paho 가 버린 메시지(QoS0 연결 없음, 보관 큐 초과)는 on_publish 가 오지 않음
+            self._release()
+            return False
+        if self.acks is not None:
+            self.acks.sent(info.mid)
+        return True
+
+    def close(self):
+        if self._misc is not None:
+            self._misc.cancel()
+        try:
+            self.client.disconnect()
+        except Exception:
+            pass
+
+
+class AsyncEngine:
+    def __init__(self, pub, max_inflight=1000, queue_size=10000, pool_size=1):
+        self.pub = pub
+        self.max_inflight = max_inflight
+        self.queue_size = queue_size
+        self.pool_size = max(1, pool_size)
+        self.conns = []   # 연결별 (AsyncMqtt, 큐, PublishStats)
+        self._shard = {}  # topic → 연결 번호
+        self.ticks = {}  # 이름 → [틱 수, 초과(주기 넘김) 횟수]
+
+    async def _every(self, name, period_ms, produce):
+        """마감 시각 기준 주기 실행 (밀린 틱은 건너뜀)"""
+        loop = asyncio.get_running_loop()
+        period = max(0.001, period_ms / 1000.0)
+        stat = self.ticks.setdefault(name, [0, 0])
+        due = loop.time()
+        metrics = self.pub.metrics
+        while True:
+            t0 = time.perf_counter()
+            await produce()
+            if metrics is not None:
+                metrics.tick(name, time.perf_counter() - t0)
+            stat[0] += 1
+            due += period
+            now = loop.time()
+            if now > due:
+                stat[1] += 1
+                due += ((now - due) // period + 1) * period
+            await asyncio.sleep(due - now)
+
+    async def _put_all(self, messages):
+        shard, conns, n = self._shard, self.conns, self.pool_size
+        for msg in messages:
+            i = shard.get(msg[0])
+            if i is None:
+                i = shard[msg[0]] = shard_of(msg[0], n)
+            await conns[i][1].put(msg)  # 큐가 차면 송신 쪽이 비울 때까지 대기
+
+    async def _sender(self, client, queue, conn_stats):
+        stats, metrics, probe, limiter = self.pub.stats, self.pub.metrics, self.pub.probe, self.pub.limiter
+        while True:
+            topic, data = await queue.get()
+            try:
+                if limiter is not None:
+                    # 다른 코루틴/연결도 같은 예산을 쓰므로 예약 후 이벤트 루프를 막지 않고 대기
+                    wait = limiter.reserve(self.pub.topic_dtype(topic))
+                    if wait is None:
+                        continue
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                if probe is not None:
+                    data = probe.stamp(topic, data)
+                t0 = time.perf_counter()  # 윈도 대기 포함 (backpressure 가 보이도록)
+                ok = await client.publish(topic, data)
+            except Exception as e:
+                # 송신 태스크가 죽으면 큐가 차서 생산자가 멈추므로 오류로 세고 계속
+                ok = None
+                self.pub.log(f"[MQTT] publish error: {e}")
+            if ok:
+                stats.add(len(data))
+                conn_stats.add(len(data))
+                if metrics is not None:
+                    metrics.published(topic, len(data), time.perf_counter() - t0)
+            else:
+                stats.error()
+                conn_stats.error()
+                if metrics is not None:
+                    metrics.error(topic)
+
+    def stat_lines(self):
+        lines = [
+            f"asyncio {client.client_id or '-'}: 큐 {queue.qsize()}/{self.queue_size}, "
+            f"in-flight {client.inflight}/{self.max_inflight}, 누적 {st.snapshot()[0]}건"
+            for client, queue, st in self.conns
+        ]
+        for name, stat in self.ticks.items():
+            lines.append(f"{name}: {stat[0]}틱, 초과 {stat[1]}회")
+            stat[0] = stat[1] = 0
+        return lines
+
+    async def run(self, period_ms, emitters=(), duration=0, stats_interval=5.0):
+        loop = asyncio.get_running_loop()
+        env = self.pub.env
+        # 연결 1개면 기존처럼 브로커가 client ID 를 정함
+        ids = [""] if self.pool_size == 1 else \
+            [f"{client_id_prefix(env)}-{i}" for i in range(self.pool_size)]
+        for cid in ids:
+            client = AsyncMqtt(env, loop, self.max_inflight, client_id=cid, log=self.pub.log,
+                               metrics=self.pub.metrics)
+            await client.connect()
+            self.conns.append((client, asyncio.Queue(self.queue_size), PublishStats()))
+
+        if self.pub.db_sink is not None:
+            # DB 싱크 큐가 차도 이벤트 루프(모든 송신/타이머)를 멈추지 않음, 넘친 행은 버리고 셈
+            self.pub.db_sink.blocking = False
+
+        stop = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: loop.call_soon_threadsafe(stop.set))
+
+        self.pub.start_probe()
+        tasks = [loop.create_task(self._sender(*conn)) for conn in self.conns]
+        tasks.append(loop.create_task(
+            self._every("default", period_ms, lambda: self._put_all(self.pub.default_messages()))))
+        for em in emitters:
+            self.pub.register_override(em.dtype, em.keys)
+            tasks.append(loop.create_task(
+                self._every(f"manual-{em.dtype}", em.period_ms, lambda em=em: self._put_all(em.messages()))))
+
+        printer = StatsPrinter(self.pub, stats_interval, extra=self.stat_lines)
+        started = time.monotonic()
+        try:
+            while not stop.is_set():
+                try:
+                    await asyncio.wait_for(stop.wait(), 0.5)
+                except asyncio.TimeoutError:
+                    pass
+                printer.poll()
+                if duration and time.monotonic() - started >= duration:
+                    break
+        finally:
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for em in emitters:
+                self.pub.unregister_override(em.dtype, em.keys)
+            for client, _, _ in self.conns:
+                client.close()
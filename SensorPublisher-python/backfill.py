@@ -0,0 +1,152 @@
+import heapq
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from defFunc import DAY_SEC, time_txt
+from fleet import DTYPES
+from encoder import BATCH_ENCODERS
+from mqtt_pool import PublishWindow
+
+
+# 과거 데이터 백필(backfill)
+# 실시간 재생은 현재 시각에 가까운 시나리오 행만 보내므로 과거 이력을 채우려면 실제 시간만큼 걸린다.
+# 백필은 [start, end) 구간의 날짜마다 시나리오의 모든 시각(행)을 순서대로 돌면서
+# 그 시각을 타임스탬프로 전체 센서 값을 생성해 MQTT / DB 싱크(DATA_SINK)로 보낸다.
+#   speed = 0   : 최대 속도
+#   speed = 60  : 실제 1초에 1분 분량 (1일 = 24분)
+#   step  = 0   : 시나리오 행 시각(초 단위 중복 제거) 전부, > 0 이면 step 초 간격 격자
+# MQTT 는 미전송 메시지를 MQTT_MAX_INFLIGHT 개까지만 두고(PublishWindow) 넘치면 생성을 멈추고 기다리며,
+# 연결이 끊긴 동안(스풀 미사용)은 재연결까지 대기, 끝나면 남은 메시지가 다 나갈 때까지 기다린 뒤 종료한다.
+
+
+def parse_time(text):
+    """'2025-08-01' 또는 '2025-08-01 12:00:00'"""
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(text.strip(), fmt)
+        except ValueError:
+            pass
+    raise ValueError(f"날짜 형식은 YYYY-MM-DD[ HH:MM[:SS]] 이어야 합니다: '{text}'")
+
+
+class Backfill:
+    def __init__(self, pub, start, end, speed=0.0, step_sec=0):
+        if end <= start:
+            raise ValueError("백필 종료 시각은 시작 시각보다 뒤여야 합니다.")
+        if pub.scenario.stream:
+            raise ValueError("스트리밍 시나리오(SCENARIO_STREAM=true)는 백필에 사용할 수 없습니다.")
+        self.pub = pub
+        self.start = start
+        self.end = end
+        self.speed = max(0.0, float(speed))
+        self.step_sec = max(0, int(step_sec))
+        self.rows = 0
+        self.instants = 0
+        self.window = PublishWindow(int(pub.env.get("MQTT_MAX_INFLIGHT", "1000") or 1000),
+                                    online=pub._mqtt_connected)
+
+    def _day_seconds(self, dtype):
+        """하루 안의 생성 시각(자정 기준 초) 배열"""
+        data = self.pub.scenario.get(dtype)  # 시나리오 파일이 없으면 FileNotFoundError
+        if not hasattr(data, "index"):
+            raise ValueError("스트리밍 시나리오(SCENARIO_STREAM=true)는 백필에 사용할 수 없습니다.")
+        if self.step_sec:
+            return np.arange(0, DAY_SEC, self.step_sec, dtype=np.int64)
+        return np.unique(data.index.sod)
+
+    def _times(self, dtype, sod):
+        day = datetime(self.start.year, self.start.month, self.start.day)
+        while day < self.end:
+            for sec in sod.tolist():
+                ts = day + timedelta(seconds=sec)
+                if ts >= self.end:
+                    return
+                if ts >= self.start:
+                    yield ts, dtype
+            day += timedelta(days=1)
+
+    def events(self):
+        """(타임스탬프, dtype) 을 시각순으로 (종류별 시각을 병합)"""
+        streams = []
+        for dtype in DTYPES:
+            if not len(self.pub.fleet.keys[dtype]):
+                continue
+            try:
+                sod = self._day_seconds(dtype)
+            except (FileNotFoundError, ValueError) as e:
+                self.pub.log(f"[백필] {dtype} 건너뜀: {e}")
+                continue
+            streams.append(self._times(dtype, sod))
+        return heapq.merge(*streams)
+
+    def emit(self, dtype, ts):
+        pub = self.pub
+        keys = pub.fleet.keys[dtype]
+        idx = pub._active_idx(dtype)
+        if idx is not None and not len(idx):
+            return 0
+        cols = pub.batch.generate(dtype, ts, idx)
+        date = time_txt(ts)
+        if pub.db_sink is not None:
+            pub.db_sink.put_columns(dtype, date, keys, cols, idx)
+        if pub.sink_mqtt:
+            for topic, data in BATCH_ENCODERS[dtype].encode(keys, cols, date, idx):
+                self.window.add(pub._mqtt_publish_raw(topic, data))
+        return len(keys) if idx is None else len(idx)
+
+    def _wait_online(self, stop):
+        """스풀 없이 연결이 끊겼으면 재연결까지 대기 (paho 가 QoS>0 메시지를 메모리에 무한히 쌓지 않도록), 중단되면 False"""
+        pub = self.pub
+        if not pub.sink_mqtt or pub.spool is not None or pub.mqtt is None or pub._mqtt_connected():
+            return True
+        pub.log("[백필] 브로커 연결 끊김, 재연결까지 대기")
+        while not pub._mqtt_connected():
+            if stop is not None and stop.wait(0.5):
+                return False
+            if stop is None:
+                time.sleep(0.5)
+        pub.log("[백필] 재연결, 계속 진행")
+        return True
+
+    def run(self, stop=None, progress_sec=5.0):
+        """stop(threading.Event) 가 설정되면 중단, 생성 행 수 반환"""
+        span = self.end - self.start
+        self.pub.log(f"[백필] {self.start} ~ {self.end} ({span}), "
+                     f"속도 {'최대' if not self.speed else f'x{self.speed:g}'}, "
+                     f"간격 {'시나리오 행' if not self.step_sec else f'{self.step_sec}초'}")
+        wall0 = time.monotonic()
+        last_t, last_rows = wall0, 0
+        for ts, dtype in self.events():
+            if stop is not None and stop.is_set():
+                break
+            if not self._wait_online(stop):
+                break
+            if self.speed:
+                # 합성 시각 경과 / speed 만큼 실제 시간이 지나야 발행
+                wait = wall0 + (ts - self.start).total_seconds() / self.speed - time.monotonic()
+                if wait > 0 and stop is not None and stop.wait(wait):
+                    break
+                if wait > 0 and stop is None:
+                    time.sleep(wait)
+            n = self.emit(dtype, ts)
+            if n:
+                self.rows += n
+                self.instants += 1
+
+            now = time.monotonic()
+            if progress_sec and now - last_t >= progress_sec:
+                done = (ts - self.start) / span * 100
+                self.pub.log(f"[백필] {ts} ({done:.1f}%), {self.rows}건, "
+                             f"{(self.rows - last_rows) / (now - last_t):.0f}건/s")
+                for line in self.pub.stat_lines():
+                    self.pub.log(f"    {line}")
+                last_t, last_rows = now, self.rows
+
+        self.window.drain()
+        if self.window.lost:
+            self.pub.log(f"[백필] 전송을 확인하지 못한 메시지 {self.window.lost}건 (시간 초과/연결 끊김)")
+        dt = max(1e-9, time.monotonic() - wall0)
+        self.pub.log(f"[백필] 완료: 시각 {self.instants}개, {self.rows}건, {dt:.1f}초 ({self.rows / dt:.0f}건/s)")
+        return self.rows
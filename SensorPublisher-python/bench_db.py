@@ -0,0 +1,96 @@
+import argparse
+import time
+from datetime import datetime
+
+import db
+from fleet import DTYPES, FleetSpec
+from generator import BatchGenerator, iter_payloads
+from scenario import ScenarioCache
+from defFunc import POWER_CSV, WATER_CSV, ENERGY_CSV
+from bench_encoder import fake_energy_cols
+
+import numpy as np
+
+# DB 적재 벤치마크 (로컬 Postgres)
+# 기존 insert_global_*_many(executemany) 와 COPY / execute_values 대량 적재의 rows/s 비교.
+# 접속 정보는 config.env(PATH, BUILD_CATEGORY, DB_ID, DB_PW, DB_PORT) 또는 인자로 덮어쓰기.
+# 측정용 행은 date=2000-01-01 로 넣고 끝나면 지운다.
+#   python bench_db.py --rows 20000
+#   python bench_db.py --host /tmp/pgdata --user postgres --dbname gs_origin
+
+MARK = datetime(2000, 1, 1)
+
+MANY = {
+    'power': db.insert_global_power_many,
+    'water': db.insert_global_water_many,
+    'energy': db.insert_global_energy_many,
+}
+
+
+def cleanup():
+    def run(conn):
+        with conn.cursor() as cur:
+            for dtype in DTYPES:
+                cur.execute(f'DELETE FROM {db.BULK_TABLES[dtype][0]} WHERE "date" = %s', (MARK,))
+    db.run_with_retry(run)
+
+
+def timed(name, n, fn):
+    """fn 이 적재 건수를 돌려주면 그 값으로 계산 (None 이면 n 행으로 간주), 일부라도 실패하면 표시"""
+    cleanup()
+    t = time.perf_counter()
+    done = fn()
+    dt = time.perf_counter() - t
+    done = n if done is None else done
+    if done < n:
+        print(f"  {name:<28} {'실패':>12}  ({done}/{n}행 적재, {dt:.2f}s, logs/db_error 참고)")
+        return
+    print(f"  {name:<28} {done / dt:>12,.0f} rows/s  ({dt:.2f}s)")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=20000, help="종류별 적재 행 수 (대략)")
+    ap.add_argument("--skip-many", action="store_true", help="기존 executemany 경로 생략 (느림)")
+    ap.add_argument("--host")
+    ap.add_argument("--port")
+    ap.add_argument("--user")
+    ap.add_argument("--password")
+    ap.add_argument("--dbname")
+    args = ap.parse_args()
+
+    conf = db.db_config()
+    for k in ("host", "port", "user", "password", "dbname"):
+        if getattr(args, k) is not None:
+            conf[k] = getattr(args, k)
+
+    # 종류별 약 rows 행이 되도록 건물 수 결정 (건물당 power 20, water 10, energy 40)
+    fleet = FleetSpec.from_dict({"buildings": max(1, args.rows // 20), "floors": 10, "energy_per_floor": 4}, "bench")
+    scenario = ScenarioCache({'power': POWER_CSV, 'water': WATER_CSV, 'energy': ENERGY_CSV})
+    gen = BatchGenerator(fleet, scenario, seed=0)
+    now = datetime.now().replace(microsecond=0)
+
+    for dtype in DTYPES:
+        keys = fleet.keys[dtype]
+        try:
+            cols = gen.generate(dtype, now)
+        except FileNotFoundError:
+            cols = fake_energy_cols(len(keys), np.random.default_rng(0))
+        payloads = [p for _, p in iter_payloads(dtype, keys, cols, MARK)]
+        n = len(payloads)
+        print(f"[{dtype}] {n}행")
+
+        if not args.skip_many:
+            timed("executemany (기존)", n, lambda: MANY[dtype](payloads))
+        for method in ("values", "copy"):
+            db._bulk_method = method
+            timed(f"{method} (payload dict)", n,
+                  lambda: db.bulk_insert_rows(dtype, db.payload_rows(dtype, payloads)))
+            timed(f"{method} (컬럼 배열)", n,
+                  lambda: db.bulk_insert_rows(dtype, db.column_rows(dtype, MARK, keys, cols)))
+    cleanup()
+    db.close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import argparse
+import json
+import time
+from datetime import datetime
+
+import numpy as np
+
+from defFunc import POWER_CSV, WATER_CSV, ENERGY_CSV, now_txt
+from fleet import DTYPES, FleetSpec
+from generator import BatchGenerator, iter_payloads
+from encoder import BATCH_ENCODERS, dumps, orjson
+from scenario import ScenarioCache
+
+# payload 인코딩 벤치마크
+# 기존 경로(dict 생성 + json.dumps(ensure_ascii=False))와 템플릿/orjson 경로를 비교한다.
+#   python bench_encoder.py --buildings 100 --rounds 5
+
+def build(buildings):
+    spec = {"buildings": buildings, "floors": 10, "energy_per_floor": 4}
+    fleet = FleetSpec.from_dict(spec, "lemon/sensors")
+    scenario = ScenarioCache({'power': POWER_CSV, 'water': WATER_CSV, 'energy': ENERGY_CSV})
+    return fleet, scenario
+
+def fake_energy_cols(n, rng):
+    # energy_data.csv 가 없는 환경에서도 같은 payload 모양으로 측정
+    return {
+        "co2": rng.integers(350, 1200, n),
+        "temperature": rng.integers(15, 35, n),
+        "humidity": rng.integers(20, 80, n),
+    }
+
+def run(name, fn, n, rounds):
+    best = None
+    for _ in range(rounds):
+        t = time.perf_counter()
+        nbytes = fn()
+        dt = time.perf_counter() - t
+        best = dt if best is None else min(best, dt)
+    print(f"  {name:<22} {n / best:>12,.0f} msg/s  ({nbytes / n:.0f} B/msg)")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--buildings", type=int, default=100)
+    ap.add_argument("--rounds", type=int, default=5)
+    args = ap.parse_args()
+
+    fleet, scenario = build(args.buildings)
+    gen = BatchGenerator(fleet, scenario, seed=0)
+    now = datetime.now().replace(microsecond=0)
+    date = now_txt()
+
+    for dtype in DTYPES:
+        keys = fleet.keys[dtype]
+        n = len(keys)
+        try:
+            cols = gen.generate(dtype, now)
+        except FileNotFoundError:
+            cols = fake_energy_cols(n, np.random.default_rng(0))
+        print(f"[{dtype}] {n}건")
+
+        def old_path():
+            return sum(len(json.dumps(p, ensure_ascii=False).encode("utf-8"))
+                       for _, p in iter_payloads(dtype, keys, cols, date))
+
+        def template_path():
+            enc = BATCH_ENCODERS[dtype]
+            mids, fmt = enc._mid(keys), enc.fmt
+            head = '{"date":' + json.dumps(date)
+            rows = zip(*[cols[c].tolist() for c in enc.names])
+            return sum(len((head + mids[i] + fmt % v).encode("utf-8")) for i, v in enumerate(rows))
+
+        def batch_path():
+            return sum(len(b) for _, b in BATCH_ENCODERS[dtype].encode(keys, cols, date))
+
+        def dumps_path():
+            return sum(len(dumps(p)) for _, p in iter_payloads(dtype, keys, cols, date))
+
+        # 결과 동일성 확인 (공백 차이만 허용)
+        old = [json.loads(json.dumps(p)) for _, p in iter_payloads(dtype, keys, cols, date)]
+        new = [json.loads(b) for _, b in BATCH_ENCODERS[dtype].encode(keys, cols, date)]
+        assert old == new, f"{dtype}: 템플릿 출력이 기존 payload 와 다릅니다"
+
+        run("json.dumps (기존)", old_path, n, args.rounds)
+        run("template", template_path, n, args.rounds)
+        run("BatchEncoder.encode", batch_path, n, args.rounds)
+        run("orjson" if orjson else "json compact", dumps_path, n, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,63 +1,191 @@
 import psycopg2 as pg
+from psycopg2 import pool as pg_pool
+from psycopg2.extras import execute_values
+import atexit
+import io
 import os
+from operator import itemgetter
+import threading
 import time
+from contextlib import contextmanager
 
 from defFunc import load_env_vars, logSave
 
 
-# DB 연결
+# DB 연결 풀
+# 예전에는 insert 할 때마다 config.env 를 다시 읽고 새로 연결(TCP + 인증)했다.
+# 이제 설정은 처음 한 번만 읽고, 모듈 전역 ThreadedConnectionPool 에서 연결을 빌려 쓴다.
+#   - 오래 놀던 연결은 빌려줄 때 SELECT 1 로 상태 확인 (DB_HEALTH_SEC)
+#   - 연결이 끊긴 경우(InterfaceError, SQLSTATE 없음/08xxx/57Pxx)만 그 연결을 버리고 새 연결로 1회 재시도
+#     (QueryCanceled/DeadlockDetected 같은 OperationalError 하위 오류는 롤백 후 연결 유지, 재실행 안 함)
+#   - 프로그램 종료 시 close_pool() (atexit 등록)
+_pool = None
+_pool_lock = threading.Lock()
+_db_conf = None
+_last_used = {}  # id(conn) → 마지막 반환 시각
+
+
+def db_config(env_data=None):
+    """config.env 의 DB 설정 (처음 한 번만 읽음), env_data 를 주면 그 설정으로 교체"""
+    global _db_conf
+    if _db_conf is None or env_data is not None:
+        if env_data is None:
+            env_data = load_env_vars()
+        _db_conf = {
+            "dbname": env_data.get("BUILD_CATEGORY", "") + "_origin",
+            "user": env_data.get("DB_ID", ""),
+            "password": env_data.get("DB_PW", ""),
+            "host": env_data.get("PATH", ""),
+            "port": env_data.get("DB_PORT", "") or "5432",
+            "minconn": int(env_data.get("DB_POOL_MIN", "") or 1),
+            "maxconn": int(env_data.get("DB_POOL_MAX", "") or 4),
+            "health_sec": float(env_data.get("DB_HEALTH_SEC", "") or 30),
+            "bulk_method": env_data.get("DB_BULK_METHOD", "") or "copy",
+        }
+    return _db_conf
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                conf = db_config()
+                _pool = pg_pool.ThreadedConnectionPool(
+                    conf["minconn"], conf["maxconn"],
+                    dbname=conf["dbname"], user=conf["user"], password=conf["password"],
+                    host=conf["host"], port=conf["port"],
+                )
+    return _pool
+
+
+def close_pool():
+    """풀의 모든 연결 종료 (다시 쓰면 새로 만듦)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            try:
+                _pool.closeall()
+            except Exception:
+                pass
+            _pool = None
+            _last_used.clear()
+
+atexit.register(close_pool)
+
+
+def _healthy(conn):
+    if conn.closed:
+        return False
+    last = _last_used.get(id(conn))
+    if last is None or time.monotonic() - last < db_config()["health_sec"]:
+        return True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except Exception:
+        return False
+
+
+def _connection_lost(e, conn=None):
+    """연결 자체가 끊긴 오류인지 (문장 단위 오류면 False)"""
+    if conn is not None and conn.closed:
+        return True
+    if isinstance(e, pg.InterfaceError):
+        return True
+    if isinstance(e, pg.OperationalError):
+        code = e.pgcode
+        # SQLSTATE 없음 = 서버와 통신 불가, 08 = 연결 예외, 57P = 서버 종료/재시작
+        return code is None or code.startswith(("08", "57P"))
+    return False
+
+
+def _getconn():
+    p = get_pool()
+    conn = p.getconn()
+    if not _healthy(conn):
+        # 끊긴 연결은 버리고 새로 받음
+        p.putconn(conn, close=True)
+        _last_used.pop(id(conn), None)
+        conn = p.getconn()
+    return conn
+
+
+@contextmanager
+def pooled_connection():
+    """풀에서 연결을 빌려 주고 반환, 연결이 끊긴 연결은 닫아서 버림"""
+    p = get_pool()
+    conn = _getconn()
+    broken = False
+    try:
+        yield conn
+    except Exception as e:
+        if _connection_lost(e, conn):
+            broken = True
+        else:
+            conn.rollback()
+        raise
+    finally:
+        broken = broken or bool(conn.closed)
+        if broken:
+            _last_used.pop(id(conn), None)
+        else:
+            _last_used[id(conn)] = time.monotonic()
+        p.putconn(conn, close=broken)
+
+
+def run_with_retry(fn):
+    """fn(conn) 실행 + commit, 연결이 끊긴 경우만 새 연결로 한 번 더"""
+    for attempt in (1, 2):
+        try:
+            with pooled_connection() as conn:
+                result = fn(conn)
+                conn.commit()
+                return result
+        except (pg.OperationalError, pg.InterfaceError) as e:
+            if attempt == 2 or not _connection_lost(e):
+                raise
+
+
+# DB 연결 (풀과 별개의 단독 연결, 호출 측에서 닫아야 함)
 def get_db_connect():
-    env_data = load_env_vars()
-    db_host = env_data.get("PATH", "")
-    db_name = env_data.get("BUILD_CATEGORY", "") + "_origin"
-    db_id = env_data.get("DB_ID", "")
-    db_pw = env_data.get("DB_PW", "")
+    conf = db_config()
     conn = pg.connect(
-        dbname=db_name,
-        user=db_id,
-        password=db_pw,
-        host=db_host,
-        port='5432'
+        dbname=conf["dbname"],
+        user=conf["user"],
+        password=conf["password"],
+        host=conf["host"],
+        port=conf["port"],
     )
     cur = conn.cursor()
     return conn, cur
 
 
-# insert sql, 단건, 입력할 값을 넣으면 DB연결후 sql 실행하고 종료
+# insert sql, 단건, 풀의 연결로 sql 실행 후 연결 반환
 def execute_insert_data(sql="", valuse=()):
-    conn = None
-    cur = None
+    def run(conn):
+        with conn.cursor() as cur:
+            cur.execute(sql, valuse)  # sql문과 튜플하나
     try:
-        conn, cur = get_db_connect()
-        cur.execute(sql, valuse)  # sql문과 튜플하나
-        conn.commit()
+        run_with_retry(run)
     except Exception as e:
         logger1 = logSave("logs", "db_error")
         logger1.LogTextOut(f"[Postgres] insert data : {e}")
-    finally:
-        if cur:
-            cur.close()
-        if conn:
-            conn.close()
 
-# insert sql, 복수건, 입력할 값을 넣으면 DB연결후 sql 실행하고 종료
+# insert sql, 복수건, 풀의 연결로 sql 실행 후 연결 반환
 def execute_insert_many(sql="", values=[]):
-    conn = None
-    cur = None
+    def run(conn):
+        with conn.cursor() as cur:
+            cur.executemany(sql, values)
     try:
-        conn, cur = get_db_connect()
-        cur.executemany(sql, values)
-        conn.commit()
+        run_with_retry(run)
         logger_success = logSave("logs", "db_commit")
         logger_success.LogTextOut(f"commit success {len(values)}")
     except Exception as e:
         logger1 = logSave("logs", "db_error")
         logger1.LogTextOut(f"[Postgres] insert many : {e}")
-    finally:
-        if cur:
-            cur.close()
-        if conn:
-            conn.close()
 
 # power 테이블에 필요한 SQL, 단건, 입력값 준비해서 execute 함수 실행
 def insert_global_power(data):
@@ -161,4 +289,116 @@ def insert_global_water_many(data_list):
         ))  # tbl_water 테이블에 맞게 딕셔너리를 튜플로 전처리
     execute_insert_many(sql, values)
 
-#todo : mqtt로 수정
+# -------------------- 대량 적재 (COPY) --------------------
+# executemany 는 psycopg2 에서 행마다 왕복 한 번이라 느리다.
+# 행 튜플을 텍스트 버퍼에 모아 COPY ... FROM STDIN 한 번으로 보내고,
+# COPY 를 쓸 수 없는 환경(권한/프록시 등)이면 execute_values(여러 행 INSERT)로 대체한다.
+# DB_BULK_METHOD=copy|values 로 고정할 수도 있다.
+
+# 종류별 (테이블, 테이블 컬럼, payload 키) - 순서가 행 튜플 순서
+BULK_TABLES = {
+    'power': ("tbl_power",
+              ("date", "floor", "humi", "section", "temp", "active_electric_energy",
+               "total_active_power", "total_reactive_power", "total_apparent_power", "total_power_factor"),
+              ("date", "floor", "humi", "section", "temp", "active_electric_energy",
+               "total_active_power", "total_reactive_power", "total_apparent_power", "total_power_factor")),
+    'water': ("tbl_water",
+              ("date", "floor", "section", "inst_flow", "neg_dec_data", "neg_sum_data", "pos_dec_data",
+               "pos_sum_data", "plain_dec_data", "plain_sum_data", "today_value"),
+              ("date", "floor", "section", "inst_flow", "neg_dec_data", "neg_sum_data", "pos_dec_data",
+               "pos_sum_data", "plain_dec_data", "plain_sum_data", "today_value")),
+    'energy': ("tbl_energy",
+               ("date", "floor", "section", "co2", "temp", "humi", "pm1", "pm2_5", "pm10", "voc",
+                "tempimage", "errcode"),
+               ("date", "floor", "section", "co2", "temperature", "humidity", "pm1_0", "pm2_5", "pm10", "voc",
+                None, None)),  # tempimage/errcode 는 기존 insert 와 같이 0
+}
+
+_bulk_method = None  # 'copy' | 'values', COPY 를 쓸 수 없으면 'values' 로 전환
+# COPY 자체를 쓸 수 없다는 오류만 전환 사유 (잘못된 행/제약 위반 등은 이번 묶음 실패로만 처리)
+_COPY_UNSUPPORTED = (pg.errors.FeatureNotSupported, pg.errors.InsufficientPrivilege)
+
+
+def _copy_field(v):
+    if v is None:
+        return "\\N"
+    if isinstance(v, str):
+        return v.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+    return str(v)
+
+
+def _copy_buffer(rows):
+    buf = io.StringIO()
+    buf.writelines("\t".join(map(_copy_field, row)) + "\n" for row in rows)
+    buf.seek(0)
+    return buf
+
+
+def bulk_insert_rows(dtype, rows):
+    """행 튜플(BULK_TABLES 컬럼 순서) 목록을 한 번에 적재, 적재 건수 반환"""
+    global _bulk_method
+    rows = rows if isinstance(rows, list) else list(rows)
+    if not rows:
+        return 0
+    table, columns, _ = BULK_TABLES[dtype]
+    col_sql = ", ".join(f'"{c}"' for c in columns)
+    if _bulk_method is None:
+        _bulk_method = db_config()["bulk_method"]
+
+    def copy(conn):
+        with conn.cursor() as cur:
+            cur.copy_expert(f"COPY {table} ({col_sql}) FROM STDIN", _copy_buffer(rows))
+
+    def values(conn):
+        with conn.cursor() as cur:
+            execute_values(cur, f"INSERT INTO {table} ({col_sql}) VALUES %s", rows, page_size=1000)
+
+    try:
+        if _bulk_method == "copy":
+            try:
+                run_with_retry(copy)
+                return len(rows)
+            except _COPY_UNSUPPORTED as e:
+                _bulk_method = "values"
+                logSave("logs", "db_error").LogTextOut(f"[Postgres] COPY 불가, execute_values 로 전환 : {e}")
+        run_with_retry(values)
+        return len(rows)
+    except Exception as e:
+        logSave("logs", "db_error").LogTextOut(f"[Postgres] bulk insert {dtype} : {e}")
+        return 0
+
+
+def payload_rows(dtype, data_list):
+    """payload dict 목록 → 행 튜플 (행마다 키 조회 대신 itemgetter 한 번)"""
+    keys = BULK_TABLES[dtype][2]
+    get = itemgetter(*[k for k in keys if k is not None])
+    pad = (0,) * sum(k is None for k in keys)
+    return [get(d) + pad for d in data_list]
+
+
+def column_rows(dtype, date, keys, cols, idx=None):
+    """BatchGenerator.generate() 결과(컬럼 배열) → 행 튜플, dict 를 만들지 않음"""
+    n = len(keys) if idx is None else len(idx)
+    floors = keys.floor.tolist() if idx is None else keys.floor[idx].tolist()
+    sections = keys.section.tolist() if idx is None else keys.section[idx].tolist()
+    # 날짜는 한 번만 문자열로 (행마다 datetime → 문자열 변환 방지)
+    fixed = {"date": [str(date)] * n, "floor": floors, "section": sections}
+    columns = []
+    for k in BULK_TABLES[dtype][2]:
+        if k in fixed:
+            columns.append(fixed[k])
+        elif k in cols:
+            columns.append(cols[k].tolist())
+        else:  # 생성기에 없는 고정 필드(pm, voc, tempimage, errcode)
+            columns.append([0] * n)
+    return list(zip(*columns))
+
+
+def insert_global_power_bulk(data_list):
+    return bulk_insert_rows('power', payload_rows('power', data_list))
+
+def insert_global_water_bulk(data_list):
+    return bulk_insert_rows('water', payload_rows('water', data_list))
+
+def insert_global_energy_bulk(data_list):
+    return bulk_insert_rows('energy', payload_rows('energy', data_list))
@@ -0,0 +1,106 @@
+import queue
+import threading
+import time
+
+import db
+
+
+# DB 직접 적재 싱크
+# MQTT 와 같은 값을 Postgres(tbl_power/tbl_water/tbl_energy)에 바로 넣는다.
+# 브로커/수신 서비스 없이 DB 계층만 부하 테스트할 때 사용 (DATA_SINK=db 또는 both).
+#
+# 생성 쪽은 행 묶음을 큐에 넣기만 하고, 백그라운드 스레드 하나가 종류별로 모아서
+#   - DB_BATCH_ROWS 행이 모이거나
+#   - 첫 행이 들어온 뒤 DB_BATCH_MS 가 지나면
+# db.bulk_insert_rows(COPY)로 한 번에 적재한다. 적재는 이 스레드만 하므로 풀 연결 하나만 쓴다.
+# 큐가 가득 차면(DB 가 못 따라오면) 생성 쪽이 대기한다.
+# 단 blocking=False(asyncio 엔진)면 이벤트 루프를 멈추지 않도록 그 묶음을 버리고 행 수를 센다.
+
+
+class DbSink:
+    def __init__(self, env=None, batch_rows=5000, batch_ms=1000, max_pending=200, log=print):
+        if env is not None:
+            db.db_config(env)  # 발행 엔진과 같은 config.env 설정으로 접속
+        self.batch_rows = max(1, batch_rows)
+        self.batch_sec = max(0.001, batch_ms / 1000.0)
+        self.log = log
+        self._queue = queue.Queue(maxsize=max_pending)  # (dtype, [행 튜플]) 묶음 단위
+        self._lock = threading.Lock()
+        self.rows = 0        # 적재 완료 행 수
+        self.batches = 0
+        self.failed = 0      # 적재 실패 행 수
+        self.dropped = 0     # 큐가 가득 차서 버린 행 수 (blocking=False 일 때)
+        self.blocking = True
+        self._last_t = time.monotonic()
+        self._last_rows = 0
+        self._thread = threading.Thread(target=self._run, name="db-sink", daemon=True)
+        self._thread.start()
+
+    def put(self, dtype, rows):
+        """행 튜플 목록(db.BULK_TABLES 컬럼 순서) 추가"""
+        if not rows:
+            return
+        if self.blocking:
+            self._queue.put((dtype, rows))
+            return
+        try:
+            self._queue.put_nowait((dtype, rows))
+        except queue.Full:
+            with self._lock:
+                self.dropped += len(rows)
+
+    def put_payloads(self, dtype, payloads):
+        self.put(dtype, db.payload_rows(dtype, payloads))
+
+    def put_columns(self, dtype, date, keys, cols, idx=None):
+        """BatchGenerator.generate() 결과를 dict 없이 바로 행으로"""
+        self.put(dtype, db.column_rows(dtype, date, keys, cols, idx))
+
+    def _flush(self, dtype, rows):
+        n = db.bulk_insert_rows(dtype, rows)
+        with self._lock:
+            self.batches += 1
+            self.rows += n
+            self.failed += len(rows) - n
+
+    def _run(self):
+        pending = {}  # dtype → [행 목록, 첫 행 시각]
+        stop = False
+        while not stop:
+            # 가장 오래된 묶음의 마감까지만 대기
+            timeout = None
+            if pending:
+                oldest = min(first for _, first in pending.values())
+                timeout = max(0.0, oldest + self.batch_sec - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = ()
+            if item is None:
+                stop = True
+            elif item:
+                dtype, rows = item
+                buf = pending.setdefault(dtype, [[], time.monotonic()])
+                buf[0].extend(rows)
+
+            now = time.monotonic()
+            for dtype in list(pending):
+                rows, first = pending[dtype]
+                if stop or len(rows) >= self.batch_rows or now - first >= self.batch_sec:
+                    del pending[dtype]
+                    for i in range(0, len(rows), self.batch_rows):
+                        self._flush(dtype, rows[i:i + self.batch_rows])
+
+    def stat_lines(self):
+        now = time.monotonic()
+        with self._lock:
+            rows, batches, failed, dropped = self.rows, self.batches, self.failed, self.dropped
+        rate = (rows - self._last_rows) / max(1e-9, now - self._last_t)
+        self._last_t, self._last_rows = now, rows
+        return [f"db: {rate:.1f} rows/s, 누적 {rows}행 / {batches}회 적재, "
+                f"실패 {failed}행, 버림 {dropped}행, 대기 {self._queue.qsize()}묶음"]
+
+    def close(self):
+        """남은 행을 모두 적재하고 종료"""
+        self._queue.put(None)
+        self._thread.join(timeout=30.0)
@@ -1,8 +1,11 @@
+import atexit
 import logging
 import logging.handlers
+import queue
 import threading
-from datetime import datetime
+from datetime import datetime, timedelta
 import random
+import numpy as np
 import pandas as pd
 
 import sys, os
@@ -17,6 +20,85 @@ WATER_CSV  = os.path.join(DATA_DIR, "water_data.csv")
 ENERGY_CSV = os.path.join(DATA_DIR, "energy_data.csv")
 CONFIG_ENV = os.path.join(exe_dir(), "config.env")
 
+# 로그 파일 기록
+# 발행 스레드가 파일에 직접 쓰면(잠금 + 날짜 확인 + 디스크 I/O) 짧은 주기에서 발행이 밀리므로,
+# 모든 logSave 는 QueueHandler 로 공용 큐(SimpleQueue)에 넣기만 하고
+# QueueListener 스레드 하나가 logger 이름별 파일에 쓴다.
+# 날짜 변경은 다음 자정 시각을 캐시해두고 레코드 시각과 비교만 한다 (레코드마다 strftime 없음).
+
+class _DailyFile:
+    """logs/<name>/<name>_YYYYMMDD.log, 자정이 지나면 새 파일"""
+
+    def __init__(self, dir, name):
+        self.dir = dir
+        self.name = name
+        self.handler = None
+        self._next_day = 0.0  # 다음 자정 (epoch 초)
+
+    def emit(self, record):
+        if record.created >= self._next_day:
+            self._open(datetime.fromtimestamp(record.created))
+        self.handler.emit(record)
+
+    def _open(self, now):
+        if self.handler is not None:
+            self.handler.close()
+        os.makedirs(self.dir, exist_ok=True)
+        filename = os.path.join(self.dir, f"{self.name}_{now.strftime('%Y%m%d')}.log")
+        self.handler = logging.FileHandler(filename, encoding='utf-8')
+        self.handler.setFormatter(logging.Formatter("[%(asctime)s] %(message)s"))
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        self._next_day = (midnight + timedelta(days=1)).timestamp()
+
+    def close(self):
+        if self.handler is not None:
+            self.handler.close()
+
+
+class _FileRouter(logging.Handler):
+    """리스너 스레드에서 logger 이름별 파일로 나눠 쓰기"""
+
+    def __init__(self):
+        super().__init__()
+        self.files = {}  # logger 이름 → _DailyFile
+
+    def emit(self, record):
+        f = self.files.get(record.name)
+        if f is None:
+            return
+        try:
+            f.emit(record)
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+        super().close()
+
+
+_log_queue = queue.SimpleQueue()
+_log_router = _FileRouter()
+_log_listener = None
+_log_listener_lock = threading.Lock()
+
+def _start_log_listener():
+    global _log_listener
+    with _log_listener_lock:
+        if _log_listener is None:
+            _log_listener = logging.handlers.QueueListener(_log_queue, _log_router)
+            _log_listener.start()
+            atexit.register(stop_log_listener)
+
+def stop_log_listener():
+    """남은 로그를 모두 파일에 쓰고 리스너 종료"""
+    global _log_listener
+    with _log_listener_lock:
+        if _log_listener is not None:
+            _log_listener.stop()
+            _log_listener = None
+            _log_router.close()
+
 # 로그를 저장하고 관리하는 클래스
 # Singleton 구조
 class logSave:
@@ -35,43 +117,20 @@ class logSave:
             return
         self.base_name = logname
         self.dir = os.path.join(exe_dir(), dir, self.base_name)
-        self._cur_date = None
-        self._lock = threading.Lock()
 
         self.logger = logging.getLogger(self.base_name)
         self.logger.setLevel(logging.INFO)
         self.logger.propagate = False
-
-        self._ensure_today_handler()
-        self._initialized = True
-
-    def _ensure_today_handler(self):
-        today = datetime.now().strftime("%Y%m%d")
-        if self._cur_date == today and self.logger.handlers:
-            return
-
-        # 디렉터리 준비
-        os.makedirs(self.dir, exist_ok=True)
-
-        # 기존 핸들러 제거/닫기
         for h in list(self.logger.handlers):
             self.logger.removeHandler(h)
-            try:
-                h.close()
-            except Exception:
-                pass
-
-        # 오늘 날짜로 파일 열기: logs/<base_name>/<base_name>_YYYYMMDD.log
-        filename = os.path.join(self.dir, f"{self.base_name}_{today}.log")
-        handler = logging.FileHandler(filename, encoding='utf-8')
-        handler.setFormatter(logging.Formatter("[%(asctime)s] %(message)s"))
-        self.logger.addHandler(handler)
-        self._cur_date = today
+        self.logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+        _log_router.files[self.base_name] = _DailyFile(self.dir, self.base_name)
+        _start_log_listener()
+        self._initialized = True
 
     def LogTextOut(self, msg):
-        with self._lock:
-            self._ensure_today_handler()
-            self.logger.info(str(msg))
+        # 큐에 넣기만 함 (파일 쓰기/날짜 변경은 리스너 스레드)
+        self.logger.info(str(msg))
 
 def load_env_vars(env_path=CONFIG_ENV):
     env = {}
@@ -105,20 +164,55 @@ def load_env_vars(env_path=CONFIG_ENV):
             env[k] = v
     return env
 
-def now_txt():
-    return datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+def time_txt(dt):
+    return dt.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
 
-def find_nearest_time_row(df: pd.DataFrame):
+def now_txt():
+    return time_txt(datetime.now())
+
+DAY_SEC = 24 * 3600
+
+def seconds_of_day(dates) -> np.ndarray:
+    """datetime 시리즈 → 자정 기준 초(int64) 배열"""
+    d = pd.to_datetime(pd.Series(dates), errors='coerce')
+    return (d.dt.hour * 3600 + d.dt.minute * 60 + d.dt.second).to_numpy(dtype=np.int64)
+
+class TimeIndex:
+    """정렬된 자정 기준 초 배열에서 이진 탐색으로 가까운 행을 찾는다 (자정 넘김 포함)"""
+
+    def __init__(self, sod):
+        self.sod = np.asarray(sod, dtype=np.int64)
+        if len(self.sod) == 0:
+            raise ValueError("시나리오 데이터가 비어 있습니다.")
+
+    def __len__(self):
+        return len(self.sod)
+
+    def neighbors(self, sec):
+        """sec 앞/뒤 행 인덱스와 뒤쪽 행 가중치(0~1) 반환"""
+        n = len(self.sod)
+        i = int(np.searchsorted(self.sod, sec % DAY_SEC))
+        lo, hi = (i - 1) % n, i % n
+        gap = int(self.sod[hi] - self.sod[lo]) % DAY_SEC
+        if gap == 0:  # 행이 하나뿐인 경우
+            return lo, hi, 0.0
+        w = ((sec - int(self.sod[lo])) % DAY_SEC) / gap
+        return lo, hi, w
+
+    def nearest(self, sec) -> int:
+        lo, hi, w = self.neighbors(sec)
+        return hi if w > 0.5 else lo
+
+def find_nearest_time_row(df: pd.DataFrame, now=None):
     if not pd.api.types.is_datetime64_any_dtype(df['date']):
         df['date'] = pd.to_datetime(df['date'], errors='coerce')
-    df = df.dropna(subset=['date']).copy()
-    now = datetime.now().replace(microsecond=0)
-    now_time = now.time()
-    df['time_only'] = df['date'].dt.time
-    df['diff_sec'] = df['time_only'].apply(
-        lambda t: abs(datetime.combine(datetime.min, t) - datetime.combine(datetime.min, now_time)).total_seconds()
-    )
-    row = df.loc[df['diff_sec'].idxmin()]
+    df = df.dropna(subset=['date'])
+    if now is None:
+        now = datetime.now().replace(microsecond=0)
+    sod = seconds_of_day(df['date'])
+    order = np.argsort(sod, kind='stable')
+    idx = TimeIndex(sod[order])
+    row = df.iloc[order[idx.nearest(now.hour * 3600 + now.minute * 60 + now.second)]]
     return row, now
 
 def clamp(v, lo, hi):
@@ -0,0 +1,126 @@
+import json
+
+import numpy as np
+
+
+# 가상 센서 플릿(fleet) 정의
+# 건물 × 층 × 섹션/ID 조합을 펼쳐서 데이터 종류별로 조밀한(dense) 배열로 보관한다.
+# 발행 엔진은 이 배열 단위로 값을 만들기 때문에 센서 수가 늘어도 틱당 Python 루프가 늘지 않는다.
+#
+# 스펙 파일(JSON) 예시:
+# {
+#   "buildings": 500,                  # 개수 또는 ["GS", "HQ", ...] 이름 목록
+#   "building_prefix": "B",
+#   "floors": 10,                      # 개수(1..N) 또는 [1, 2, 5] 목록
+#   "power_sections": ["A", "B"],
+#   "water_sections": ["A"],
+#   "energy_per_floor": 4,             # 층별 ID 개수 ({floor}{201+k}) 또는 "energy_ids": ["209", "221"]
+#   "topics": {"power": "{base}/{building}/power/F{floor}/{section}"}
+# }
+
+DTYPES = ('power', 'water', 'energy')
+
+DEFAULT_TOPICS = {
+    'power': "{base}/{building}/power/F{floor}/{section}",
+    'water': "{base}/{building}/water/F{floor}",
+    'energy': "{base}/{building}/energy/F{floor}/{section}",
+}
+
+# 기존 단일 건물 토픽 (sensor_dict 기반)
+LEGACY_TOPICS = {
+    'power': "{base}/power/F{floor}/{section}",
+    'water': "{base}/water/F{floor}",
+    'energy': "{base}/energy/F{floor}/{section}",
+}
+
+
+def topic_dtype(topic):
+    """토픽 경로에 들어 있는 데이터 종류, 없으면 'other' (플릿 밖 토픽용)"""
+    return next((p for p in topic.split("/") if p in DTYPES), "other")
+
+
+class FleetKeys:
+    """한 데이터 종류의 전체 센서 키 (인덱스 i 가 센서 하나)"""
+
+    def __init__(self, dtype, rows, topic_fmt, base, buildings):
+        self.dtype = dtype
+        self.building = np.array([r[0] for r in rows], dtype=np.int32)
+        self.floor = np.array([r[1] for r in rows], dtype=np.int16)
+        self.section = np.array([r[2] for r in rows], dtype=object)
+        self.topics = [
+            topic_fmt.format(base=base, building=buildings[b], floor=f, section=s)
+            for b, f, s in rows
+        ]
+
+    def __len__(self):
+        return len(self.topics)
+
+    def group_keys(self):
+        """시나리오 그룹 조회용 (floor, section) 목록"""
+        return list(zip(self.floor.tolist(), self.section.tolist()))
+
+
+class FleetSpec:
+    def __init__(self, buildings, layout, topics, base):
+        """
+        buildings: 건물 이름 목록
+        layout: {dtype: [(floor, section/ID), ...]}  - 모든 건물에 동일하게 적용
+        """
+        self.buildings = list(buildings)
+        self.base = base
+        self.keys = {}
+        for dtype in DTYPES:
+            rows = [(b, f, s) for b in range(len(self.buildings)) for f, s in layout.get(dtype, [])]
+            self.keys[dtype] = FleetKeys(dtype, rows, topics[dtype], base, self.buildings)
+
+    def __len__(self):
+        return sum(len(k) for k in self.keys.values())
+
+    def summary(self):
+        counts = ", ".join(f"{d} {len(self.keys[d])}" for d in DTYPES)
+        return f"건물 {len(self.buildings)}개, 센서 {len(self)}개 ({counts})"
+
+    @classmethod
+    def from_sensor_dict(cls, sensor_dict, base):
+        """기존 sensor_dict(단일 건물) → 플릿, 토픽도 기존 형식 유지"""
+        layout = {d: [] for d in DTYPES}
+        for floor_key, cfg in sensor_dict.items():
+            floor = int(floor_key.replace("F", ""))
+            layout['power'] += [(floor, s) for s in cfg.get('power', [])]
+            layout['water'] += [(floor, s) for s in cfg.get('water', [])]
+            layout['energy'] += [(floor, s) for s in cfg.get('energy', [])]
+        return cls([""], layout, LEGACY_TOPICS, base)
+
+    @classmethod
+    def from_dict(cls, spec: dict, base):
+        b = spec.get("buildings", 1)
+        if isinstance(b, int):
+            prefix = spec.get("building_prefix", "B")
+            width = len(str(b))
+            buildings = [f"{prefix}{i:0{width}d}" for i in range(1, b + 1)]
+        else:
+            buildings = [str(x) for x in b]
+
+        f = spec.get("floors", 10)
+        floors = list(range(1, f + 1)) if isinstance(f, int) else [int(x) for x in f]
+
+        if "energy_ids" in spec:
+            suffixes = [str(x) for x in spec["energy_ids"]]
+        else:
+            suffixes = [str(201 + k) for k in range(int(spec.get("energy_per_floor", 4)))]
+
+        layout = {
+            'power': [(fl, s) for fl in floors for s in spec.get("power_sections", ["A", "B"])],
+            'water': [(fl, s) for fl in floors for s in spec.get("water_sections", ["A"])],
+            'energy': [(fl, f"{fl}{s}") for fl in floors for s in suffixes],
+        }
+        topics = dict(DEFAULT_TOPICS)
+        topics.update(spec.get("topics", {}))
+        if not buildings or not floors:
+            raise ValueError("플릿 스펙에 건물/층이 없습니다.")
+        return cls(buildings, layout, topics, base)
+
+
+def load_fleet_spec(path, base):
+    with open(path, "r", encoding="utf-8") as f:
+        return FleetSpec.from_dict(json.load(f), base)
@@ -0,0 +1,278 @@
+import threading
+
+import numpy as np
+
+
+# 기본 발행 값 일괄 생성기
+# 플릿 키 배열 전체(또는 idx 부분집합)에 대해 make_default_data 와 같은 규칙
+# (층 bias, jitter, clamp, 기록 그룹 재생)을 numpy 벡터 연산으로 한 번에 계산한다.
+#
+# model="state" (GEN_MODEL, 기본) : 키별 상태를 이어 가는 시계열 모델
+#   - 잡음 : 매 틱 독립 지터 대신 키별 AR(1)(Ornstein-Uhlenbeck) 과정
+#            x ← a·x + σ·√(1-a²)·N(0,1), a = exp(-dt/τ)  (dt = 그 키의 직전 생성 후 경과 초)
+#            → 표준편차는 기존 지터와 같고, 이웃 샘플끼리 상관이 있어 τ 동안 천천히 움직인다.
+#   - 누적 : active_electric_energy 는 유효전력(kW) × 시간, pos/neg/plain_sum_data 는 순간 유량(m³/h) × 시간을
+#            더해 가는 단조 증가 카운터 (첫 샘플은 시나리오 값으로 시작), today_value 는 날짜가 바뀌면 0부터.
+#   - 상태는 종류별 키 수 크기의 numpy 배열이라 틱당 비용은 키당 상수.
+#     시각이 거꾸로 가면(백필 재시작 등) 그 키는 시나리오 값으로 다시 시작한다.
+# model="jitter" : 예전 방식 (매 틱 독립 균등 지터, 누적값도 bias 배율만 적용)
+
+# 값 컬럼 순서 = payload 키 순서 (date/floor/section 다음)
+PAYLOAD_COLS = {
+    'power': ["temp", "humi", "active_electric_energy", "total_active_power",
+              "total_reactive_power", "total_apparent_power", "total_power_factor"],
+    'water': ["inst_flow", "neg_dec_data", "neg_sum_data", "pos_dec_data",
+              "pos_sum_data", "plain_dec_data", "plain_sum_data", "today_value"],
+    'energy': ["co2", "temperature", "humidity"],
+}
+
+# 값 컬럼 뒤에 붙는 고정 필드
+PAYLOAD_CONSTS = {
+    'power': {},
+    'water': {},
+    'energy': {"pm1_0": 0, "pm2_5": 0, "pm10": 0, "voc": 0, "tempimage": 0, "errcode": 123456},
+}
+
+
+# 종류별 지터 폭 (컬럼 순서대로 한 번의 rng.uniform 으로 뽑는다)
+#   power : p_bias(±%), temp, humi, power_factor
+#   water : flow_bias(±%)
+#   energy: temp, humi, co2
+JITTER = {
+    'power': np.array([2.0, 0.3, 1.5, 0.02]),
+    'water': np.array([5.0]),
+    'energy': np.array([0.3, 1.0, 25.0]),
+}
+
+# state 모델 잡음 상관 시간 τ(초), JITTER 와 같은 순서. 표준편차는 균등 지터와 같게 폭/√3
+NOISE_TAU = {
+    'power': np.array([300.0, 1800.0, 1200.0, 300.0]),
+    'water': np.array([60.0]),
+    'energy': np.array([1800.0, 1200.0, 600.0]),
+}
+NOISE_SD = {dtype: w / np.sqrt(3.0) for dtype, w in JITTER.items()}
+
+# state 모델 누적 카운터
+COUNTERS = {
+    'power': ["active_electric_energy"],
+    'water': ["pos_sum_data", "neg_sum_data", "plain_sum_data", "today_value"],
+    'energy': [],
+}
+MODELS = ("state", "jitter")
+
+
+def floor_terms(keys):
+    """키별로 고정인 층/섹션 bias 항을 미리 계산 (틱마다 재계산하지 않음)"""
+    df = keys.floor.astype(np.float64) - 6
+    if keys.dtype == 'power':
+        is_b = (keys.section == 'B').astype(np.float64)
+        return {
+            "p_bias": (1.0 + df * 0.03) * (1.0 + is_b * 0.01),  # bias_scale(floor, 3.0), B는 ×1.01
+            "temp_off": df * 0.2 + is_b * 0.1,
+            "humi_off": df * 0.6,
+            "humi_b": is_b * 0.2,
+        }
+    if keys.dtype == 'water':
+        return {
+            "flow_bias": 1.0 + df * 0.02,  # bias_scale(floor, 2.0)
+            "sum_bias": 1.0 + df * 0.01,   # bias_scale(floor, 1.0)
+        }
+    return {
+        "temp_off": df * 0.2,
+        "humi_off": df * 0.5,
+        "co2_off": df * 15,
+    }
+
+
+class SensorState:
+    """한 데이터 종류의 키별 시계열 상태 (인덱스 = FleetKeys 인덱스)"""
+
+    def __init__(self, dtype, n):
+        self.last = np.full(n, np.nan)                      # 직전 생성 시각 (epoch 초), NaN = 아직 없음
+        self.day = np.zeros(n, dtype=np.int64)              # 직전 생성 날짜 (ordinal, today_value 초기화용)
+        self.noise = np.zeros((n, len(NOISE_TAU[dtype])))   # AR(1) 잡음 현재 값
+        self.counters = {name: np.zeros(n) for name in COUNTERS[dtype]}
+
+    def advance(self, sel, t, day):
+        """sel 키들의 (경과 초, 새로 시작할 키 마스크) 를 구하고 시각 갱신"""
+        dt = t - self.last[sel]
+        fresh = ~(dt >= 0)  # NaN(처음) 또는 시각이 거꾸로 감
+        self.last[sel] = t
+        new_day = self.day[sel] != day
+        self.day[sel] = day
+        return np.where(fresh, 0.0, dt), fresh, new_day
+
+    def step_noise(self, sel, dt, fresh, sd, tau, rng):
+        """AR(1) 한 단계, 새로 시작하는 키는 정상 분포에서 바로 추출"""
+        a = np.exp(-dt[:, None] / tau)
+        a[fresh] = 0.0
+        x = a * self.noise[sel] + sd * np.sqrt(1.0 - a * a) * rng.standard_normal((len(dt), len(tau)))
+        self.noise[sel] = x
+        return x
+
+    def accumulate(self, name, sel, inc, start, fresh):
+        """단조 증가 카운터 += inc (0 이상), 새로 시작하는 키는 start 값으로"""
+        c = np.where(fresh, start, self.counters[name][sel] + np.maximum(inc, 0.0))
+        self.counters[name][sel] = c
+        return c
+
+
+class BatchGenerator:
+    """rng 에 numpy.random.Generator 를 넘기면(또는 seed) 같은 시드에서 같은 값이 재현된다"""
+
+    def __init__(self, fleet, scenario, rng=None, seed=None, model="state"):
+        if model not in MODELS:
+            raise ValueError(f"GEN_MODEL 은 {MODELS} 중 하나여야 합니다: '{model}'")
+        self.fleet = fleet
+        self.scenario = scenario
+        self.model = model
+        self.rng = rng if rng is not None else np.random.default_rng(seed)
+        self.terms = {dtype: floor_terms(keys) for dtype, keys in fleet.keys.items()}
+        self._groups = {}  # dtype → (ScenarioData, 고유 (floor, section) 목록, 키별 그룹 번호)
+        self.state = {dtype: SensorState(dtype, len(keys)) for dtype, keys in fleet.keys.items()}
+        self._lock = threading.Lock()  # 기본 발행/부하 프로파일/백필이 같은 상태를 갱신
+
+    def _group_map(self, dtype):
+        data = self.scenario.get(dtype)
+        cur = self._groups.get(dtype)
+        if cur is not None and cur[0] is data:
+            return cur
+        uniq, inv = {}, []
+        for gk in self.fleet.keys[dtype].group_keys():
+            inv.append(uniq.setdefault(gk, len(uniq)))
+        cur = (data, list(uniq), np.array(inv, dtype=np.int32))
+        self._groups[dtype] = cur
+        return cur
+
+    def _base(self, dtype, now, idx):
+        """키별 시나리오 값 행렬과 '기록 그룹 있음' 마스크"""
+        data, uniq, inv = self._group_map(dtype)
+        interp = self.scenario.interpolate
+        glob = data.values_at(now, interpolate=interp)
+        table = np.empty((len(uniq), len(data.num_cols)))
+        recorded = np.zeros(len(uniq), dtype=bool)
+        for j, gk in enumerate(uniq):
+            v = data.values_at(now, gk, interp)
+            if v is None:
+                table[j] = glob
+            else:
+                table[j], recorded[j] = v, True
+        g = inv if idx is None else inv[idx]
+        cols = {c: i for i, c in enumerate(data.num_cols)}
+        return table[g], recorded[g], cols
+
+    def generate(self, dtype, now, idx=None):
+        """{컬럼: 배열} 반환, idx(정수 배열)가 있으면 해당 키만"""
+        base, rec, c = self._base(dtype, now, idx)
+        t = self.terms[dtype] if idx is None else {k: v[idx] for k, v in self.terms[dtype].items()}
+        if self.model == "state":
+            with self._lock:
+                return self._generate_state(dtype, now, idx, base, rec, c, t)
+        n = len(rec)
+        # 지터는 (키 수 × 항목 수) 한 번에 추출
+        jit = self.rng.uniform(-1.0, 1.0, (n, len(JITTER[dtype]))) * JITTER[dtype]
+
+        if dtype == 'power':
+            p_bias = np.where(rec, 1.0, t["p_bias"] * (1.0 + jit[:, 0] / 100.0))
+            temp = base[:, c['temp']] + t["temp_off"] + jit[:, 1]
+            humi = np.clip(base[:, c['humi']] + t["humi_off"] + jit[:, 2], 0, 100)
+            humi = np.clip(humi + t["humi_b"], 0, 100)
+            pf = np.clip(base[:, c['total_power_factor']] + jit[:, 3], 0.0, 1.0)
+            return {
+                "temp": np.where(rec, base[:, c['temp']], temp),
+                "humi": np.where(rec, base[:, c['humi']], humi),
+                "active_electric_energy": base[:, c['active_electric_energy']] * p_bias,
+                "total_active_power": base[:, c['total_active_power']] * p_bias,
+                "total_reactive_power": base[:, c['total_reactive_power']] * p_bias,
+                "total_apparent_power": base[:, c['total_apparent_power']] * p_bias,
+                "total_power_factor": np.where(rec, base[:, c['total_power_factor']], pf),
+            }
+
+        if dtype == 'water':
+            flow_bias = np.where(rec, 1.0, t["flow_bias"] * (1.0 + jit[:, 0] / 100.0))
+            sum_bias = np.where(rec, 1.0, t["sum_bias"])
+            out = {"inst_flow": base[:, c['inst_flow']] * flow_bias}
+            for name in PAYLOAD_COLS['water'][1:]:
+                out[name] = base[:, c[name]] * sum_bias
+            return out
+
+        # energy
+        temp = base[:, c['temp']] + t["temp_off"] + jit[:, 0]
+        humi = np.clip(base[:, c['humi']] + t["humi_off"] + jit[:, 1], 0, 100)
+        co2 = np.maximum(350.0, base[:, c['co2']] + t["co2_off"] + jit[:, 2])
+        return {
+            "co2": np.where(rec, base[:, c['co2']], co2).astype(np.int64),
+            "temperature": np.where(rec, base[:, c['temp']], temp).astype(np.int64),
+            "humidity": np.where(rec, base[:, c['humi']], humi).astype(np.int64),
+        }
+
+
+    def _generate_state(self, dtype, now, idx, base, rec, c, t):
+        st = self.state[dtype]
+        sel = slice(None) if idx is None else idx
+        dt, fresh, new_day = st.advance(sel, now.timestamp(), now.toordinal())
+        noise = st.step_noise(sel, dt, fresh, NOISE_SD[dtype], NOISE_TAU[dtype], self.rng)
+        hours = dt / 3600.0
+
+        if dtype == 'power':
+            p_bias = np.where(rec, 1.0, t["p_bias"] * (1.0 + noise[:, 0] / 100.0))
+            temp = base[:, c['temp']] + t["temp_off"] + noise[:, 1]
+            humi = np.clip(base[:, c['humi']] + t["humi_off"] + noise[:, 2] + t["humi_b"], 0, 100)
+            pf = np.clip(base[:, c['total_power_factor']] + noise[:, 3], 0.0, 1.0)
+            active = base[:, c['total_active_power']] * p_bias
+            energy_start = base[:, c['active_electric_energy']] * np.where(rec, 1.0, t["p_bias"])
+            return {
+                "temp": np.where(rec, base[:, c['temp']], temp),
+                "humi": np.where(rec, base[:, c['humi']], humi),
+                "active_electric_energy": st.accumulate(
+                    "active_electric_energy", sel, active * hours, energy_start, fresh),
+                "total_active_power": active,
+                "total_reactive_power": base[:, c['total_reactive_power']] * p_bias,
+                "total_apparent_power": base[:, c['total_apparent_power']] * p_bias,
+                "total_power_factor": np.where(rec, base[:, c['total_power_factor']], pf),
+            }
+
+        if dtype == 'water':
+            flow_bias = np.where(rec, 1.0, t["flow_bias"] * (1.0 + noise[:, 0] / 100.0))
+            sum_bias = np.where(rec, 1.0, t["sum_bias"])
+            flow = base[:, c['inst_flow']] * flow_bias
+            fwd = np.maximum(flow, 0.0) * hours
+            rev = np.maximum(-flow, 0.0) * hours
+            out = {"inst_flow": flow}
+            for name in ("neg_dec_data", "pos_dec_data", "plain_dec_data"):
+                out[name] = base[:, c[name]] * sum_bias
+            for name, inc in (("pos_sum_data", fwd), ("neg_sum_data", rev), ("plain_sum_data", fwd)):
+                out[name] = st.accumulate(name, sel, inc, base[:, c[name]] * sum_bias, fresh)
+            # 하루 사용량: 날짜가 바뀐 키는 0부터 (처음 시작하는 키는 시나리오 값)
+            today = st.accumulate("today_value", sel, fwd, base[:, c['today_value']] * sum_bias, fresh)
+            reset = new_day & ~fresh
+            if reset.any():
+                today = np.where(reset, fwd, today)
+                st.counters["today_value"][sel] = today
+            out["today_value"] = today
+            return {name: out[name] for name in PAYLOAD_COLS['water']}
+
+        # energy
+        temp = base[:, c['temp']] + t["temp_off"] + noise[:, 0]
+        humi = np.clip(base[:, c['humi']] + t["humi_off"] + noise[:, 1], 0, 100)
+        co2 = np.maximum(350.0, base[:, c['co2']] + t["co2_off"] + noise[:, 2])
+        return {
+            "co2": np.where(rec, base[:, c['co2']], co2).astype(np.int64),
+            "temperature": np.where(rec, base[:, c['temp']], temp).astype(np.int64),
+            "humidity": np.where(rec, base[:, c['humi']], humi).astype(np.int64),
+        }
+
+
+def iter_payloads(dtype, keys, cols, date, idx=None):
+    """generate() 결과 → (topic, payload dict), 기존 payload 와 같은 키 순서"""
+    names = PAYLOAD_COLS[dtype]
+    arrays = [cols[name].tolist() for name in names]
+    consts = PAYLOAD_CONSTS[dtype]
+    order = range(len(keys)) if idx is None else idx.tolist()
+    floors, sections = keys.floor.tolist(), keys.section.tolist()
+    for j, i in enumerate(order):
+        payload = {"date": date, "floor": floors[i], "section": sections[i]}
+        for name, arr in zip(names, arrays):
+            payload[name] = arr[j]
+        payload.update(consts)
+        yield keys.topics[i], payload
@@ -0,0 +1,260 @@
+import csv
+import json
+import re
+import time
+from datetime import datetime
+
+import numpy as np
+
+from defFunc import time_txt
+from fleet import DTYPES
+from encoder import BATCH_ENCODERS
+
+
+# 부하 프로파일 (Spring/Node 서버 부하 테스트용 단계별 발행 속도)
+# 고정 주기 대신 스크립트(JSON)의 단계(phase)를 차례로 돌면서
+# 목표 발행 속도(msg/s)와 활성 센서 키 수를 바꾸고, 실제 달성 속도를 목표와 함께 기록한다.
+#
+# 스크립트 예시 (load_profile_sample.json):
+# {
+#   "tick_ms": 100,                                   # 제어 주기 (이 간격마다 목표량만큼 발행)
+#   "phases": [
+#     {"name": "ramp",  "ramp": [10, 10000], "duration": "5m", "keys": [0.1, 1.0]},
+#     {"name": "hold",  "rate": 10000, "duration": "10m"},
+#     {"name": "spike", "rate": 30000, "duration": "30s"},
+#     {"name": "soak",  "rate": 5000,  "duration": "1h", "keys": 2000}
+#   ]
+# }
+#   - rate : 고정 속도, ramp : [시작, 끝] 선형 증가/감소 (msg/s)
+#   - keys : 정수면 활성 키 수, 실수(0 초과 1.0 이하)면 전체 대비 비율 (1 = 키 1개, 1.0 = 전체)
+#            [시작, 끝] 이면 단계 동안 선형 변화 (두 값의 단위가 같아야 함), 생략 시 전체
+#   - duration : 초 또는 "30s" / "5m" / "1h"
+# 활성 키는 플릿 전체 키(종류 합산)를 시드 고정 순서로 섞은 앞쪽 N개이고,
+# 매 틱 목표량만큼 활성 키를 순서대로 돌아가며 발행한다 (키당 속도 = 목표 속도 / 활성 키 수).
+# 기본 발행 선택/수동 입력과 무관하게 플릿 전체 키를 대상으로 한다.
+
+DURATION_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(value):
+    """초(숫자) 또는 '30s' / '5m' / '1h' / '1h30m'"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip().lower()
+    parts = re.findall(r"(\d+(?:\.\d+)?)\s*([smh]?)", text)
+    if not parts or re.sub(r"[\d.\s]|[smh]", "", text):
+        raise ValueError(f"기간 형식은 초 또는 30s/5m/1h 이어야 합니다: '{value}'")
+    return sum(float(n) * DURATION_UNITS[u] for n, u in parts)
+
+
+class Phase:
+    def __init__(self, spec, index):
+        self.name = str(spec.get("name", f"phase{index + 1}"))
+        self.duration = parse_duration(spec.get("duration", 0))
+        if self.duration <= 0:
+            raise ValueError(f"[{self.name}] duration 은 0보다 커야 합니다.")
+        if "ramp" in spec:
+            self.rate = tuple(float(x) for x in spec["ramp"])
+        elif "rate" in spec:
+            self.rate = (float(spec["rate"]),) * 2
+        else:
+            raise ValueError(f"[{self.name}] rate 또는 ramp 가 필요합니다.")
+        if len(self.rate) != 2 or min(self.rate) < 0:
+            raise ValueError(f"[{self.name}] ramp 는 [시작, 끝] 0 이상 값이어야 합니다.")
+        keys = spec.get("keys", 1.0)
+        keys = tuple(keys) if isinstance(keys, (list, tuple)) else (keys, keys)
+        if len(keys) != 2 or any(isinstance(k, bool) or not isinstance(k, (int, float)) for k in keys):
+            raise ValueError(f"[{self.name}] keys 는 숫자 또는 [시작, 끝] 이어야 합니다.")
+        # 단위는 스펙에서 한 번만 결정 (보간 중간값으로 판단하지 않음): 실수 = 비율, 정수 = 개수
+        kinds = {isinstance(k, float) for k in keys}
+        if len(kinds) != 1:
+            raise ValueError(f"[{self.name}] keys [시작, 끝] 은 둘 다 정수(개수)이거나 둘 다 실수(비율)여야 합니다.")
+        self.key_fraction = kinds.pop()
+        if min(keys) <= 0 or (self.key_fraction and max(keys) > 1.0):
+            raise ValueError(f"[{self.name}] keys 는 0보다 큰 개수 또는 (0, 1.0] 비율이어야 합니다.")
+        self.keys = keys
+
+    @staticmethod
+    def _lerp(pair, frac):
+        return pair[0] + (pair[1] - pair[0]) * frac
+
+    def target(self, elapsed, total_keys):
+        """단계 시작 후 elapsed 초의 (목표 msg/s, 활성 키 수)"""
+        frac = min(1.0, max(0.0, elapsed / self.duration))
+        keys = self._lerp(self.keys, frac)
+        if self.key_fraction:
+            keys *= total_keys
+        return self._lerp(self.rate, frac), int(min(total_keys, max(1, round(keys))))
+
+
+class LoadProfile:
+    def __init__(self, phases, tick_ms=100):
+        if not phases:
+            raise ValueError("부하 프로파일에 단계(phases)가 없습니다.")
+        self.phases = [Phase(p, i) for i, p in enumerate(phases)]
+        self.tick_sec = max(0.001, float(tick_ms) / 1000.0)
+
+    @property
+    def duration(self):
+        return sum(p.duration for p in self.phases)
+
+    def at(self, t):
+        """프로파일 시작 후 t 초의 (단계, 단계 시작 후 경과 초), 끝나면 None"""
+        for phase in self.phases:
+            if t < phase.duration:
+                return phase, t
+            t -= phase.duration
+        return None
+
+    @classmethod
+    def from_dict(cls, spec):
+        return cls(spec.get("phases", []), spec.get("tick_ms", 100))
+
+
+def load_profile(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return LoadProfile.from_dict(json.load(f))
+
+
+class LoadRunner:
+    """프로파일대로 pub 의 플릿 키를 발행하고 목표/달성 속도를 기록"""
+
+    def __init__(self, pub, profile, record_path=None, seed=0):
+        self.pub = pub
+        self.profile = profile
+        self.record_path = record_path
+
+        # 시나리오를 읽을 수 있는 종류만 키 풀에 포함
+        self.dtypes = []
+        for dtype in DTYPES:
+            if not len(pub.fleet.keys[dtype]):
+                continue
+            try:
+                pub.scenario.get(dtype)
+            except (FileNotFoundError, ValueError) as e:
+                pub.log(f"[부하 프로파일] {dtype} 제외: {e}")
+                continue
+            self.dtypes.append(dtype)
+        if not self.dtypes:
+            raise ValueError("발행할 수 있는 센서 키가 없습니다.")
+        sizes = [len(pub.fleet.keys[d]) for d in self.dtypes]
+        self.offsets = np.cumsum([0] + sizes)  # 전체 인덱스 → 종류 경계
+        self.order = np.random.default_rng(seed).permutation(int(self.offsets[-1]))
+        self.cursor = 0
+
+        self.sent = 0
+        self.target_total = 0.0
+        self.records = []  # (시각, 경과, 단계, 목표 msg/s, 달성 msg/s, 활성 키)
+
+    @property
+    def total_keys(self):
+        return len(self.order)
+
+    def _pick(self, n, active):
+        """활성 키 active 개를 순서대로 돌며 n 개 전체 인덱스"""
+        pos = (self.cursor + np.arange(n)) % active
+        self.cursor = int((self.cursor + n) % active)
+        return self.order[pos]
+
+    def emit(self, n, active, now):
+        """전체 인덱스 n 개를 종류별로 나눠 생성/발행, 발행 수 반환"""
+        pub = self.pub
+        picked = self._pick(n, active)
+        which = np.searchsorted(self.offsets, picked, side="right") - 1
+        date = time_txt(now)
+        count = 0
+        for k, dtype in enumerate(self.dtypes):
+            idx = np.sort(picked[which == k] - self.offsets[k]).astype(np.intp)
+            if not len(idx):
+                continue
+            keys = pub.fleet.keys[dtype]
+            cols = pub.batch.generate(dtype, now.replace(microsecond=0), idx)
+            if pub.db_sink is not None:
+                pub.db_sink.put_columns(dtype, date, keys, cols, idx)
+            if pub.sink_mqtt:
+                for topic, data in BATCH_ENCODERS[dtype].encode(keys, cols, date, idx):
+                    pub._mqtt_publish_raw(topic, data)
+            count += len(idx)
+        return count
+
+    def _record(self, elapsed, phase, rate, achieved, active):
+        row = (time_txt(datetime.now()), round(elapsed, 3), phase.name, round(rate, 1), round(achieved, 1), active)
+        self.records.append(row)
+        return row
+
+    def run(self, stop=None, progress_sec=5.0, record_sec=1.0):
+        """stop(threading.Event) 가 설정되거나 마지막 단계가 끝나면 종료, 발행 수 반환"""
+        prof = self.profile
+        self.pub.log(f"[부하 프로파일] 단계 {len(prof.phases)}개, 총 {prof.duration:.0f}초, "
+                     f"키 풀 {self.total_keys}개 ({', '.join(self.dtypes)})")
+        start = time.monotonic()
+        last_t = last_rec = start
+        credit = 0.0
+        sent_at_rec = 0
+        cur_phase = None
+        due = start
+        while stop is None or not stop.is_set():
+            now = time.monotonic()
+            pos = prof.at(now - start)
+            if pos is None:
+                break
+            phase, elapsed = pos
+            rate, active = phase.target(elapsed, self.total_keys)
+            if phase is not cur_phase:
+                cur_phase = phase
+                self.pub.log(f"[부하 프로파일] 단계 '{phase.name}' 시작 ({phase.duration:.0f}초)")
+
+            # 목표량 누적, 밀렸을 때 한 번에 쏟아내지 않도록 최대 1초 분량까지만
+            dt = now - last_t
+            last_t = now
+            credit = min(credit + rate * dt, max(1.0, rate))
+            self.target_total += rate * dt
+            n = int(credit)
+            if n:
+                credit -= n
+                self.sent += self.emit(n, active, datetime.now())
+
+            if now - last_rec >= record_sec:
+                achieved = (self.sent - sent_at_rec) / (now - last_rec)
+                row = self._record(now - start, phase, rate, achieved, active)
+                if progress_sec and int((now - start) // progress_sec) != int((last_rec - start) // progress_sec):
+                    self.pub.log(f"[부하 프로파일] {phase.name} {row[1]:.0f}s: 목표 {rate:.0f} msg/s, "
+                                 f"달성 {achieved:.0f} msg/s, 활성 키 {active}")
+                    for line in self.pub.stat_lines():
+                        self.pub.log(f"    {line}")
+                last_rec, sent_at_rec = now, self.sent
+
+            due += prof.tick_sec
+            wait = due - time.monotonic()
+            if wait < 0:
+                due = time.monotonic()  # 발행이 틱보다 오래 걸림 → 다음 틱 바로
+            elif stop is not None:
+                stop.wait(wait)
+            else:
+                time.sleep(wait)
+
+        total = max(1e-9, time.monotonic() - start)
+        self.pub.log(f"[부하 프로파일] 종료: 발행 {self.sent}건 / 목표 {self.target_total:.0f}건 "
+                     f"({self.sent / max(1.0, self.target_total) * 100:.1f}%), 평균 {self.sent / total:.0f} msg/s")
+        if self.record_path:
+            self.save(self.record_path)
+        return self.sent
+
+    def save(self, path):
+        """초 단위 목표/달성 기록 CSV"""
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["time", "elapsed_s", "phase", "target_rate", "achieved_rate", "active_keys"])
+            w.writerows(self.records)
+        self.pub.log(f"[부하 프로파일] 기록 저장: {path}")
+
+    def metric_values(self):
+        """Metrics.add_collector 용 최근 목표/달성 속도"""
+        if not self.records:
+            return []
+        _, _, _, rate, achieved, active = self.records[-1]
+        return [
+            ("sensorpub_profile_target_rate", "gauge", "Load profile target msg/s.", rate),
+            ("sensorpub_profile_achieved_rate", "gauge", "Load profile achieved msg/s.", achieved),
+            ("sensorpub_profile_active_keys", "gauge", "Load profile active sensor keys.", active),
+        ]
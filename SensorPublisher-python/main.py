@@ -1,11 +1,6 @@
-import threading
-import time
+from collections import deque
 from datetime import datetime
-import pandas as pd
-import queue
-import json
-import paho.mqtt.client as mqtt
-import ssl
+import multiprocessing as mp
 
 import tkinter as tk
 import ttkbootstrap as ttk
@@ -13,36 +8,9 @@ from ttkbootstrap.constants import *
 from tkinter import messagebox
 
 # user modules
-from defFunc import now_txt, logSave, find_nearest_time_row, clamp, bias_scale, jitter_mul, jitter_add, load_env_vars
-
-import sys, os
-
-def exe_dir() -> str:
-    # pyinstaller로 빌드된 경우 exe 위치, 개발환경이면 소스 폴더
-    if getattr(sys, "frozen", False):
-        return os.path.dirname(sys.executable)
-    return os.path.dirname(os.path.abspath(__file__))
-
-DATA_DIR = os.path.join(exe_dir(), "data")
-POWER_CSV  = os.path.join(DATA_DIR, "power_data.csv")
-WATER_CSV  = os.path.join(DATA_DIR, "water_data.csv")
-ENERGY_CSV = os.path.join(DATA_DIR, "energy_data.csv")
-CONFIG_ENV = os.path.join(exe_dir(), "config.env")
-
-sensor_dict = {
-    "F1": {"power": ["A", "B"], "water": ["A"], "energy": ['1209', '1221', '1225', '1128']},
-    "F2": {"power": ["A", "B"], "water": ["A"], "energy": ['2210', '2221']},
-    "F3": {"power": ["A", "B"], "water": ["A"], "energy": ['3203', '3208', '3210', '3120']},
-    "F4": {"power": ["A", "B"], "water": ["A"], "energy": ['4204', '4218']},
-    "F5": {"power": ["A", "B"], "water": ["A"], "energy": []},
-    "F6": {"power": ["A", "B"], "water": ["A"], "energy": ['6203', '6210', '6221', '6225']},
-    "F7": {"power": ["A", "B"], "water": ["A"], "energy": ['7208', '7210', '7117', '7122', '7221', '7225']},
-    "F8": {"power": ["A", "B"], "water": ["A"], "energy": ['8206', '8221', '8123', '8128']},
-    "F9": {"power": ["A", "B"], "water": ["A"], "energy": ['9210', '9221']},
-    "F10": {"power": ["A", "B"], "water": ["A"], "energy": ['10206', '10210', '10114', '10117', '10221', '10225']}
-}
-
-FLOORS = [f"F{i}" for i in range(1, 11)]
+from defFunc import logSave, load_env_vars, CONFIG_ENV
+from sensor_mqtt import SensorPublisher, sensor_dict, FLOORS, \
+    manual_power_payload, manual_water_payload, manual_energy_payload
 
 
 def parse_float(var, name):
@@ -97,8 +65,7 @@ class BaseTab:
         self.dtype = dtype
         self.frame = ttk.Frame(parent, padding=10)
         self.running = False
-        self.thread = None
-        self.stop_event = threading.Event()
+        self.job = None  # app.scheduler 에 등록된 주기 작업
         self.sent = 0
         try:
             self.logger = logSave("logs", f"{dtype}_sensor")
@@ -162,37 +129,32 @@ class BaseTab:
                 messagebox.showerror("오류", str(e))
                 return
             self.running = True
-            self.stop_event.clear()
             self.sent = 0
             self.count_var.set("0")
             self.toggle_btn.configure(text="중지", bootstyle=DANGER)
             self.status_var.set("전송 중...")
-            self.thread = threading.Thread(target=self.loop, args=(period,), daemon=True)
-            self.thread.start()
+            self.job = self.app.scheduler.add(self.dtype, period, self.tick)
         else:
-            self.stop_event.set()
-            if self.thread and self.thread.is_alive():
-                self.thread.join(timeout=1.0)
+            self.app.scheduler.remove(self.job)
+            self.job = None
             self.running = False
             self.toggle_btn.configure(text="시작", bootstyle=SUCCESS)
             self.status_var.set("중지됨")
 
-    def loop(self, period):
-        while not self.stop_event.is_set():
-            try:
-                n = self.emit_once()
-                self.sent += n
-                self.count_var.set(str(self.sent))
-                msg = f"[{datetime.now().replace(microsecond=0)}] {self.dtype} {n}건 전송"
-                self.app.log(msg)
-                if self.logger:
-                    try:
-                        self.logger.LogTextOut(msg)
-                    except Exception:
-                        pass
-            except Exception as e:
-                self.app.log(f"{self.dtype} 오류: {e}")
-            time.sleep(max(0.001, period / 1000.0))
+    def tick(self):
+        """스케줄러가 주기마다 호출"""
+        try:
+            n = self.emit_once()
+            self.sent += n  # count_var 는 App 화면 갱신 때 반영 (Tk 변수는 메인 스레드에서만)
+            msg = f"[{datetime.now().replace(microsecond=0)}] {self.dtype} {n}건 전송"
+            self.app.log(msg)
+            if self.logger:
+                try:
+                    self.logger.LogTextOut(msg)
+                except Exception:
+                    pass
+        except Exception as e:
+            self.app.log(f"{self.dtype} 오류: {e}")
 
     # Implement in child
     def validate_entries(self):
@@ -261,22 +223,9 @@ class PowerTab(BaseTab):
         count = 0
         for floor in floors:
             for section in sections:
-                payload = {
-                    "date": now_txt(),
-                    "floor": int(floor),
-                    "section": section,
-                    # 수동 UI 스펙에 맞춰 최소 필드만 전송
-                    "active_electric_energy": float(vals["total_active_power"]),
-                    "total_active_power": float(vals["total_active_power"]),
-                    # 필요시 0/고정값 유지
-                    "total_reactive_power": 0,
-                    "total_apparent_power": 0,
-                    "total_power_factor": 0,
-                    "temp": 0,
-                    "humi": 0,
-                }
+                payload = manual_power_payload(floor, section, vals)
                 topic = f"{self.app.mqtt_base}/power/F{floor}/{section}"
-                self.app._mqtt_publish(topic, payload)
+                self.app.publish_payload('power', topic, payload)
                 count += 1
         return count
 
@@ -298,13 +247,11 @@ class PowerTab(BaseTab):
                 self.override_keys = keys  # 중지 시 동일 키로 해제
 
                 self.running = True
-                self.stop_event.clear()
                 self.sent = 0
                 self.count_var.set("0")
                 self.toggle_btn.configure(text="중지", bootstyle=DANGER)
                 self.status_var.set("전송 중...")
-                self.thread = threading.Thread(target=self.loop, args=(period,), daemon=True)
-                self.thread.start()
+                self.job = self.app.scheduler.add(self.dtype, period, self.tick)
             except Exception as e:
                 self.app.unregister_override('power', keys)
                 self.override_keys = set()
@@ -313,9 +260,8 @@ class PowerTab(BaseTab):
                 return
 
         else:
-            self.stop_event.set()
-            if self.thread and self.thread.is_alive():
-                self.thread.join(timeout=1.0)
+            self.app.scheduler.remove(self.job)
+            self.job = None
 
             if self.override_keys:
                 self.app.unregister_override('power', self.override_keys)
@@ -370,22 +316,9 @@ class WaterTab(BaseTab):
 
         count = 0
         for floor in floors:
-            payload = {
-                "date": now_txt(),
-                "floor": int(floor),
-                "section": "A",
-                "inst_flow": float(vals["inst_flow"]),
-                # 누적/감산류는 수동 UI에서 미사용 → 0으로 고정
-                "neg_dec_data": 0,
-                "neg_sum_data": 0,
-                "pos_dec_data": 0,
-                "pos_sum_data": 0,
-                "plain_dec_data": 0,
-                "plain_sum_data": 0,
-                "today_value": 0,
-            }
+            payload = manual_water_payload(floor, vals)
             topic = f"{self.app.mqtt_base}/water/F{floor}"
-            self.app._mqtt_publish(topic, payload)
+            self.app.publish_payload('water', topic, payload)
             count += 1
         return count
 
@@ -406,13 +339,11 @@ class WaterTab(BaseTab):
                 self.override_keys = keys
 
                 self.running = True
-                self.stop_event.clear()
                 self.sent = 0
                 self.count_var.set("0")
                 self.toggle_btn.configure(text="중지", bootstyle=DANGER)
                 self.status_var.set("전송 중...")
-                self.thread = threading.Thread(target=self.loop, args=(period,), daemon=True)
-                self.thread.start()
+                self.job = self.app.scheduler.add(self.dtype, period, self.tick)
             except Exception as e:
                 self.app.unregister_override('water', keys)
                 self.override_keys = set()
@@ -420,9 +351,8 @@ class WaterTab(BaseTab):
                 messagebox.showerror("오류", f"시작 실패 : {e}")
                 return
         else:
-            self.stop_event.set()
-            if self.thread and self.thread.is_alive():
-                self.thread.join(timeout=1.0)
+            self.app.scheduler.remove(self.job)
+            self.job = None
             if self.override_keys:
                 self.app.unregister_override('water', self.override_keys)
                 self.override_keys = set()
@@ -514,23 +444,9 @@ class EnergyTab(BaseTab):
             for section in target_ids:
                 if not section:
                     continue
-                payload = {
-                    "date": now_txt(),
-                    "floor": int(floor),
-                    "section": section,
-                    # 수동 UI 스펙에 맞춰 정수/스케일 그대로 적용
-                    "co2": int(vals["co2"]),
-                    "temperature": int(float(vals["temp"]) * 10),
-                    "humidity": int(float(vals["humi"]) * 10),
-                    "pm1_0": 0,
-                    "pm2_5": 0,
-                    "pm10": 0,
-                    "voc": 0,
-                    "tempimage" : 0,
-                    "errcode" : 123456,
-                }
+                payload = manual_energy_payload(floor, section, vals)
                 topic = f"{self.app.mqtt_base}/energy/F{floor}/{section}"
-                self.app._mqtt_publish(topic, payload)
+                self.app.publish_payload('energy', topic, payload)
                 count += 1
         return count
 
@@ -563,13 +479,11 @@ class EnergyTab(BaseTab):
                 self.override_keys = keys
 
                 self.running = True
-                self.stop_event.clear()
                 self.sent = 0
                 self.count_var.set("0")
                 self.toggle_btn.configure(text="중지", bootstyle=DANGER)
                 self.status_var.set("전송 중...")
-                self.thread = threading.Thread(target=self.loop, args=(period,), daemon=True)
-                self.thread.start()
+                self.job = self.app.scheduler.add(self.dtype, period, self.tick)
             except Exception as e:
                 self.app.unregister_override('energy', keys)
                 self.override_keys = set()
@@ -578,9 +492,8 @@ class EnergyTab(BaseTab):
                 return
 
         else:
-            self.stop_event.set()
-            if self.thread and self.thread.is_alive():
-                self.thread.join(timeout=1.0)
+            self.app.scheduler.remove(self.job)
+            self.job = None
 
             if self.override_keys:
                 self.app.unregister_override('energy', self.override_keys)
@@ -769,12 +682,13 @@ class DefaultSelectTab:
             if f in shown_floors:
                 v.set(True)
 
-def to_bool(s: str) -> bool:
-    return str(s).lower() in ("1","true","yes","y","on")
-
 # -------------------- App --------------------
-class App:
+class App(SensorPublisher):
     def __init__(self):
+        # 모든 스레드의 로그는 이 큐에 넣기만 하고, 화면 갱신 주기마다 한 번에 출력
+        # (deque append/popleft 는 잠금 없이 스레드 안전, 넘치면 오래된 줄부터 버림)
+        self.log_queue = deque(maxlen=self.MAX_LOG_LINES * 5)
+        self._shown_counts = {}
         self.root = ttk.Window(themename="flatly")
         self.root.title("Manual Sensor Data Generator")
         self.root.geometry("1000x640")
@@ -802,13 +716,6 @@ class App:
         nb.add(self.water_tab.frame, text="Water")
         nb.add(self.energy_tab.frame, text="Energy")
 
-        # 선택된위치만 데이터 발행 빈셋일 경우 모두 허용
-        self.default_select = {
-            'power': set(),  # {(floor:int, 'A'|'B')}
-            'water': set(),  # {(floor:int,)}
-            'energy': set(),  # {(floor:int, energy_id:str)}
-        }
-
         # Log UI
         self.log_txt = tk.Text(right, height=24, wrap="none")
         self.log_txt.grid(row=0, column=0, sticky="nsew")
@@ -823,234 +730,16 @@ class App:
         right.columnconfigure(0, weight=1)
 
         # -------------------- 기본 데이터 생성용 -------------------
-        # self.csv_path = {
-        #     'power': './data/power_data.csv',
-        #     'water': './data/water_data.csv',
-        #     'energy': './data/energy_data.csv',
-        # }
-        # 수동 입력(override) 대상
-        self.override = {
-            'power': set(),  # {(floor:int, section:str)}
-            'water': set(),  # {(floor:int,)}
-            'energy': set(),  # {(floor:int, energy_id:str)}
-        }
-
-        self.env = load_env_vars(CONFIG_ENV)
-        # MQTT 설정
-        self.mqtt_base = self.env.get("MQTT_BASE_TOPIC", "lemon/sensors").rstrip("/")
-        self.mqtt_qos = int(self.env.get("MQTT_QOS", "0"))
-        self.mqtt_retain = to_bool(self.env.get("MQTT_RETAIN", "false"))
-
-        # ✅ MQTT 연결
-        self._init_mqtt()
-
-
-        self.override_lock = threading.Lock()
-        self.default_stop = threading.Event()
-        self.default_thread = None
-        self.log_queue = queue.Queue()
-        self.root.after(100, self._drain_logs)
+        super().__init__(load_env_vars(CONFIG_ENV))
+        self.root.after(self.FRAME_MS, self._drain_logs)
         self.start_default_worker(period_ms=1000)
         # --------------------------------------------------------
 
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
-    # 허용 목록 교체/초기화 도우미
-    def replace_default_select(self, dtype, keys):
-        with self.override_lock:
-            self.default_select[dtype] = set(keys)
-
-    def clear_default_select(self, dtype):
-        with self.override_lock:
-            self.default_select[dtype].clear()
-
-    # 허용 체크 도우미 (빈 set이면 모두 허용)
-    def _is_allowed(self, dtype, key_tuple):
-        sel = self.default_select.get(dtype, set())
-        return (not sel) or (key_tuple in sel)
-
-    # mqtt 연결 및 데이터 발행
-    def _init_mqtt(self):
-        host = self.env.get("MQTT_HOST", "localhost")
-        port = int(self.env.get("MQTT_PORT", "8883"))
-        ca = self.env.get("MQTT_CA_CERT", "ca.crt")
-        user = self.env.get("MQTT_USER", "")
-        pw   = self.env.get("MQTT_PASS", "")
-
-        self.mqtt = mqtt.Client()
-        if user:
-            self.mqtt.username_pw_set(user, pw)
-
-        # TLS 설정 (CA만 지정: 서버 인증서 검증)
-        self.mqtt.tls_set(
-            ca_certs=ca,
-            certfile=None,
-            keyfile=None,
-            tls_version=ssl.PROTOCOL_TLSv1_2,
-        )
-        # 호스트네임 불일치/자체서명 문제를 일시 무시
-        self.mqtt.tls_insecure_set(True)
-
-        self.mqtt.enable_logger()
-        # 콜백(선택)
-        self.mqtt.on_connect = lambda c,u,f,rc: self.log(f"[MQTT] connected rc={rc}")
-        self.mqtt.on_disconnect = lambda c,u,rc: self.log(f"[MQTT] disconnected rc={rc}")
-
-        try:
-            self.mqtt.connect(host, port, keepalive=30)
-            # 백그라운드 네트워크 루프 시작
-            self.mqtt.loop_start()
-        except Exception as e:
-            self.log(f"[MQTT] connect failed: {e}")
-
-    def _mqtt_publish(self, topic: str, payload: dict):
-        """스레드 어디서 호출해도 안전하게 발행"""
-        try:
-            data = json.dumps(payload, ensure_ascii=False)
-            self.mqtt.publish(topic, data, qos=self.mqtt_qos, retain=self.mqtt_retain)
-        except Exception as e:
-            self.log(f"[MQTT] publish error: {e}")
-
-    # 수동 탭에서 시작/중지 시 호출
-    def register_override(self, dtype, keys):
-        self.override[dtype].update(keys)
-
-    def unregister_override(self, dtype, keys):
-        for k in keys:
-            self.override[dtype].discard(k)
-
-    def make_default_data(self):
-        # ----- POWER -----
-        try:
-            pdf = pd.read_csv(POWER_CSV, parse_dates=['date'])
-            prow, now = find_nearest_time_row(pdf)
-            with self.override_lock:
-                ov = set(self.override['power'])
-                sel = set(self.default_select['power'])
-            count = 0
-            for floor in range(1, 11):
-                for section in ['A', 'B']:
-                    key = (floor, section)
-                    if key in ov:  # 수동 전송 중이면 제외
-                        continue
-                    if key not in sel:
-                        continue
-
-                    p_bias = bias_scale(floor, 3.0) * jitter_mul(2.0)
-                    if section == 'B': p_bias *= 1.01
-                    temp = float(prow['temp']) + (floor - 6) * 0.2 + jitter_add(0.3)
-                    humi = clamp(float(prow['humi']) + (floor - 6) * 0.6 + jitter_add(1.5), 0, 100)
-                    if section == 'B':
-                        temp += 0.1
-                        humi = clamp(humi + 0.2, 0, 100)
-                    pf = clamp(float(prow['total_power_factor']) + jitter_add(0.02), 0.0, 1.0)
-
-                    payload = {
-                        "date": now_txt(),
-                        "floor": floor,
-                        "section": section,
-                        "temp": float(temp),
-                        "humi": float(humi),
-                        "active_electric_energy": float(prow["active_electric_energy"] * p_bias),
-                        "total_active_power": float(prow["total_active_power"] * p_bias),
-                        "total_reactive_power": float(prow["total_reactive_power"] * p_bias),
-                        "total_apparent_power": float(prow["total_apparent_power"] * p_bias),
-                        "total_power_factor": float(pf),
-                    }
-                    topic = f"{self.mqtt_base}/power/F{floor}/{section}"
-                    self._mqtt_publish(topic, payload)
-                    count += 1
-            if count:
-                self.log(f"[{now}] POWER MQTT {count}건 발행")
-        except Exception as e:
-            self.log(f"[POWER 기본 생성 실패] {e}")
-
-        # ----- WATER -----
-        try:
-            wdf = pd.read_csv(WATER_CSV, parse_dates=['date'])
-            wrow, now = find_nearest_time_row(wdf)
-            with self.override_lock:
-                ov = set(self.override['water'])
-                sel = set(self.default_select['water'])
-            count = 0
-            for floor in range(1, 11):
-                key = (floor,)
-                if key in ov:
-                    continue
-                if key not in sel:
-                    continue
-
-                flow_bias = bias_scale(floor, 2.0) * jitter_mul(5.0)
-                sum_bias = bias_scale(floor, 1.0)
-
-                payload = {
-                    "date": now_txt(),
-                    "floor": floor,
-                    "section": "A",
-                    "inst_flow": float(wrow["inst_flow"] * flow_bias),
-                    "neg_dec_data": float(wrow["neg_dec_data"] * sum_bias),
-                    "neg_sum_data": float(wrow["neg_sum_data"] * sum_bias),
-                    "pos_dec_data": float(wrow["pos_dec_data"] * sum_bias),
-                    "pos_sum_data": float(wrow["pos_sum_data"] * sum_bias),
-                    "plain_dec_data": float(wrow["plain_dec_data"] * sum_bias),
-                    "plain_sum_data": float(wrow["plain_sum_data"] * sum_bias),
-                    "today_value": float(wrow["today_value"] * sum_bias),
-                }
-                topic = f"{self.mqtt_base}/water/F{floor}"
-                self._mqtt_publish(topic, payload)
-                count += 1
-            if count:
-                self.log(f"[{now}] WATER MQTT {count}건 발행")
-        except Exception as e:
-            self.log(f"[WATER 기본 생성 실패] {e}")
-
-        # ----- ENERGY -----
-        try:
-            edf = pd.read_csv(ENERGY_CSV, parse_dates=['date'])
-            erow, now = find_nearest_time_row(edf)
-            with self.override_lock:
-                ov = set(self.override['energy'])
-                sel = set(self.default_select['energy'])
-            count = 0
-            for floor_key, cfg in sensor_dict.items():
-                floor = int(floor_key.replace('F', ''))
-                for energy_id in cfg['energy']:
-                    key = (floor, energy_id)
-                    if key in ov:
-                        continue
-                    if key not in sel:
-                        continue
-
-                    temp = float(erow["temp"]) + (floor - 6) * 0.2 + jitter_add(0.3)
-                    humi = clamp(float(erow["humi"]) + (floor - 6) * 0.5 + jitter_add(1.0), 0, 100)
-                    # pm_bias = bias_scale(floor, 2.0) * jitter_mul(10.0)
-                    # voc_bias = bias_scale(floor, 1.0) * jitter_mul(8.0)
-                    co2 = max(350.0, float(erow["co2"]) + (floor - 6) * 15 + jitter_add(25))
-
-                    payload = {
-                        "date": now_txt(),
-                        "floor": floor,
-                        "section": energy_id,
-                        "co2": int(co2),
-                        "temperature": int(temp),
-                        "humidity": int(humi),
-                        "pm1_0": 0,
-                        "pm2_5": 0,
-                        "pm10": 0,
-                        "voc": 0,
-                        "tempimage":0,
-                        "errcode":123456,
-                    }
-                    topic = f"{self.mqtt_base}/energy/F{floor}/{energy_id}"
-                    self._mqtt_publish(topic, payload)
-                    count += 1
-            if count:
-                self.log(f"[{now}] ENERGY MQTT {count}건 발행")
-        except Exception as e:
-            self.log(f"[ENERGY 기본 생성 실패] {e}")
-
     MAX_LOG_LINES = 1000
     TRIM_TO_LINES = 800
+    FRAME_MS = 50  # 로그/누적 건수 화면 갱신 주기 (20fps)
 
     def _trim_log_ui(self):
         try:
@@ -1064,80 +753,42 @@ class App:
             pass
 
     def log(self, text):
-        if threading.current_thread() is not threading.main_thread():
-            self.root.after(0, lambda t=text: self.log(t))
-            return
-
-        try:
-            self.log_txt.insert("end", text + "\n")
-            self._trim_log_ui()
-            self.log_txt.see("end")
-        except Exception:
-            pass
+        # 어느 스레드에서 호출해도 큐에 넣기만 함 (Tk 접근은 _drain_logs 에서)
+        self.log_queue.append(text)
 
-    def start_default_worker(self, period_ms=1000):
-        """CSV 기반 make_default_data()를 주기적으로 호출하는 백그라운드 워커 시작"""
-        if self.default_thread and self.default_thread.is_alive():
-            return
-        self.default_stop.clear()
-        self.default_thread = threading.Thread(
-            target=self._default_loop,
-            args=(period_ms,),
-            daemon=True,
-        )
-        self.default_thread.start()
-
-    def stop_default_worker(self):
-        """백그라운드 워커 중지"""
-        self.default_stop.set()
-        if self.default_thread and self.default_thread.is_alive():
-            self.default_thread.join(timeout=1.0)
-        self.default_thread = None
-
-    def _default_loop(self, period_ms):
-        while not self.default_stop.is_set():
-            try:
-                # 오버라이드(수동 입력 중) 제외하고 CSV 기본 데이터 생성
-                self.make_default_data()
-                # self.log_async(f"[기본 생성] {_count_basic} 생성 완료")
-            except Exception as e:
-                self.log_async(f"[기본 생성 오류] {e}")
-            time.sleep(max(0.001, period_ms / 1000.0))
-
-    # ---- 백그라운드에서 안전하게 로그 넣기 ----
     def log_async(self, text: str):
-        try:
-            self.log_queue.put_nowait(text)
-        except Exception:
-            pass
+        self.log_queue.append(text)
 
     def _drain_logs(self):
-        """메인 스레드에서 주기적으로 큐를 비워 self.log 호출"""
+        """메인 스레드에서 FRAME_MS 마다 쌓인 로그를 한 번에 출력 + 탭 누적 건수 갱신"""
         try:
-            while True:
-                msg = self.log_queue.get_nowait()
-                self.log(msg)  # self.log는 메인스레드에서만 UI 접근
-        except queue.Empty:
+            lines = []
+            pop = self.log_queue.popleft
+            try:
+                while True:
+                    lines.append(pop())
+            except IndexError:
+                pass
+            if lines:
+                # 한 번에 화면에 남길 수 있는 줄만 삽입
+                self.log_txt.insert("end", "\n".join(lines[-self.TRIM_TO_LINES:]) + "\n")
+                self._trim_log_ui()
+                self.log_txt.see("end")
+            for tab in (self.power_tab, self.water_tab, self.energy_tab):
+                if self._shown_counts.get(tab) != tab.sent:
+                    self._shown_counts[tab] = tab.sent
+                    tab.count_var.set(str(tab.sent))
+        except Exception:
             pass
         finally:
-            self.root.after(100, self._drain_logs)
+            self.root.after(self.FRAME_MS, self._drain_logs)
 
     def on_close(self):
-        self.stop_default_worker()
         for tab in (self.power_tab, self.water_tab, self.energy_tab):
             if tab.running:
-                tab.stop_event.set()
-                if tab.thread and tab.thread.is_alive():
-                    try:
-                        tab.thread.join(timeout=1.0)
-                    except Exception:
-                        pass
-        try:
-            self.mqtt.loop_stop()
-            self.mqtt.on_disconnect()
-        except Exception as e:
-            print(e)
-
+                self.scheduler.remove(tab.job)
+                tab.job = None
+        self.close()
         self.root.destroy()
 
     def run(self):
@@ -1149,4 +800,5 @@ def main():
 
 
 if __name__ == "__main__":
+    mp.freeze_support()  # PyInstaller exe 에서 연결 풀 process 모드
     main()
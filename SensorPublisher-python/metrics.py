@@ -0,0 +1,241 @@
+import bisect
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from fleet import topic_dtype
+
+
+# 발행 지표 (Prometheus 텍스트 형식)
+# 로그의 "N건 발행" 만으로는 백엔드 부하와 맞춰 보기 어려워서,
+# 발행 경로에서 바로 카운터/히스토그램을 갱신하고 로컬 HTTP /metrics 로 내보낸다 (Grafana 연동).
+#   - 카운터    : 메시지/바이트/오류, 라벨 dtype + 토픽 접두어(앞 METRICS_TOPIC_DEPTH 단계)
+#   - 히스토그램 : 틱 실행 시간(작업별), publish() 호출 시간(dtype별),
+#                 브로커 확인(ack) 지연 (QoS>0, paho on_publish 기준), 종단간 지연 (PROBE=true)
+# METRICS_PORT=0 이면 수집/서버 모두 끔.
+
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ACK_PENDING_MAX = 100_000  # 연결이 끊겨 확인이 오지 않는 mid 가 무한히 쌓이지 않도록
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(pairs):
+    inner = ",".join(f'{k}="{_escape(v)}"' for k, v in pairs if k)
+    return "{" + inner + "}" if inner else ""
+
+
+class Histogram:
+    """고정 버킷 히스토그램 (라벨 값별, 스레드 안전)"""
+
+    def __init__(self, name, help_text, label=None, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}  # 라벨 값 → [버킷별 개수(+Inf 포함), 합계, 개수]
+        self._sources = []  # 다른 프로세스가 모은 누적값 (라벨 없는 계열에 더해서 출력)
+
+    def observe(self, seconds, label_value=""):
+        i = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            s = self._series.get(label_value)
+            if s is None:
+                s = self._series[label_value] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            s[0][i] += 1
+            s[1] += seconds
+            s[2] += 1
+
+    def totals(self, label_value=""):
+        """라벨 값 하나의 (버킷별 개수 목록, 합계, 개수)"""
+        with self._lock:
+            s = self._series.get(label_value)
+            return ([0] * (len(self.buckets) + 1), 0.0, 0) if s is None else (list(s[0]), s[1], s[2])
+
+    def add_source(self, fn):
+        """fn() → totals() 형식 누적값, 출력할 때마다 라벨 없는 계열에 합산 (연결 프로세스 등)"""
+        self._sources.append(fn)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {k: (list(v[0]), v[1], v[2]) for k, v in self._series.items()}
+        for fn in self._sources:
+            counts, total, count = fn()
+            if not count:
+                continue
+            base = series.get("", ([0] * (len(self.buckets) + 1), 0.0, 0))
+            series[""] = ([a + b for a, b in zip(base[0], counts)], base[1] + total, base[2] + count)
+        series = [(k, v[0], v[1], v[2]) for k, v in series.items()]
+        for value, counts, total, count in sorted(series):
+            base = [(self.label, value)] if self.label else []
+            acc = 0
+            for le, n in zip(self.buckets + (float("inf"),), counts):
+                acc += n
+                le_txt = "+Inf" if le == float("inf") else repr(le)
+                lines.append(f"{self.name}_bucket{_labels(base + [('le', le_txt)])} {acc}")
+            lines.append(f"{self.name}_sum{_labels(base)} {total}")
+            lines.append(f"{self.name}_count{_labels(base)} {count}")
+        return lines
+
+
+class AckTracker:
+    """paho 클라이언트 하나의 publish → on_publish(PUBACK/PUBCOMP) 지연 측정
+
+    mid 는 클라이언트마다 따로 매겨지므로 연결마다 하나씩 둔다.
+    """
+
+    def __init__(self, histogram, client):
+        self.histogram = histogram
+        self._lock = threading.Lock()
+        self._sent = {}   # mid → 발행 시각
+        self._early = {}  # publish() 가 돌아오기 전에 확인이 온 mid → 확인 시각
+        prev = client.on_publish
+
+        def on_publish(c, userdata, mid):
+            self.acked(mid)
+            if prev is not None:
+                prev(c, userdata, mid)
+
+        client.on_publish = on_publish
+
+    def sent(self, mid):
+        now = time.perf_counter()
+        with self._lock:
+            acked = self._early.pop(mid, None)
+            if acked is None:
+                self._sent[mid] = now
+                if len(self._sent) > ACK_PENDING_MAX:
+                    del self._sent[next(iter(self._sent))]
+                return
+        self.histogram.observe(max(0.0, acked - now))
+
+    def acked(self, mid):
+        now = time.perf_counter()
+        with self._lock:
+            t0 = self._sent.pop(mid, None)
+            if t0 is None:
+                self._early[mid] = now
+                if len(self._early) > ACK_PENDING_MAX:
+                    del self._early[next(iter(self._early))]
+                return
+        self.histogram.observe(now - t0)
+
+
+class Metrics:
+    def __init__(self, topic_depth=3):
+        self.topic_depth = max(1, int(topic_depth))
+        self._lock = threading.Lock()
+        self._counts = {}   # (dtype, 토픽 접두어) → [메시지, 바이트, 오류]
+        self._topics = {}   # topic → (dtype, 토픽 접두어)
+        self._collectors = []
+        self.tick_seconds = Histogram(
+            "sensorpub_tick_duration_seconds", "Scheduled job run time.", "job")
+        self.publish_seconds = Histogram(
+            "sensorpub_publish_call_seconds", "Time spent in one publish() call.", "dtype")
+        self.ack_seconds = Histogram(
+            "sensorpub_broker_ack_seconds", "Publish to broker acknowledgement (QoS>0).")
+        self.e2e_seconds = Histogram(
+            "sensorpub_e2e_latency_seconds", "Publish to subscriber receive (latency probe).", "dtype")
+
+    # ---- 토픽 라벨 ----
+    def register_topics(self, dtype, topics):
+        """플릿 토픽 → dtype 을 미리 등록 (토픽 형식을 바꿔도 dtype 라벨 유지)"""
+        for topic in topics:
+            self._topics[topic] = (dtype, self._prefix(topic))
+
+    def _prefix(self, topic):
+        return "/".join(topic.split("/")[:self.topic_depth])
+
+    def _labels_of(self, topic):
+        labels = self._topics.get(topic)
+        if labels is None:
+            labels = self._topics[topic] = (topic_dtype(topic), self._prefix(topic))
+        return labels
+
+    # ---- 발행 경로에서 호출 ----
+    def published(self, topic, nbytes, seconds):
+        labels = self._labels_of(topic)
+        with self._lock:
+            c = self._counts.get(labels)
+            if c is None:
+                c = self._counts[labels] = [0, 0, 0]
+            c[0] += 1
+            c[1] += nbytes
+        self.publish_seconds.observe(seconds, labels[0])
+
+    def error(self, topic):
+        labels = self._labels_of(topic)
+        with self._lock:
+            c = self._counts.get(labels)
+            if c is None:
+                c = self._counts[labels] = [0, 0, 0]
+            c[2] += 1
+
+    def tick(self, name, seconds):
+        self.tick_seconds.observe(seconds, name)
+
+    def track_acks(self, client):
+        """client 의 on_publish 에 확인 지연 측정을 연결"""
+        return AckTracker(self.ack_seconds, client)
+
+    def add_collector(self, fn):
+        """fn() → [(이름, counter|gauge, 설명, 값 또는 [(라벨 목록, 값)])] (DB 싱크 등 다른 모듈 값)"""
+        self._collectors.append(fn)
+
+    # ---- 출력 ----
+    def render(self):
+        with self._lock:
+            counts = sorted((k, list(v)) for k, v in self._counts.items())
+        lines = []
+        for k, (name, help_text) in enumerate((
+                ("sensorpub_messages_total", "Messages published."),
+                ("sensorpub_bytes_total", "Payload bytes published."),
+                ("sensorpub_errors_total", "Publish or encode errors."))):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            lines += [f"{name}{_labels([('dtype', dtype), ('prefix', prefix)])} {c[k]}"
+                      for (dtype, prefix), c in counts]
+        for h in (self.tick_seconds, self.publish_seconds, self.ack_seconds, self.e2e_seconds):
+            lines += h.render()
+        for fn in self._collectors:
+            for name, kind, help_text, value in fn():
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+                if isinstance(value, list):
+                    lines += [f"{name}{_labels(pairs)} {v}" for pairs, v in value]
+                else:
+                    lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """GET /metrics 만 응답하는 로컬 HTTP 서버 (데몬 스레드)"""
+
+    def __init__(self, metrics, host="127.0.0.1", port=9108):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # 스크레이프마다 stderr 로그 남기지 않음
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)  # 포트 사용 중이면 OSError
+        self.httpd.daemon_threads = True
+        self.address = self.httpd.server_address
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
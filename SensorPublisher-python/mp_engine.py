@@ -0,0 +1,165 @@
+import multiprocessing as mp
+import os
+import queue
+import signal
+import threading
+import time
+
+from defFunc import DATA_DIR
+from ratelimit import split_rate_env
+from sensor_mqtt import SensorPublisher, StatsPrinter, to_bool
+
+
+# 멀티 프로세스 발행 엔진
+# 스레드 방식은 GIL 때문에 값 생성 + 인코딩이 코어 하나를 넘지 못한다.
+# 키 공간(종류별 센서 키 인덱스)을 워커 수만큼 연속 구간으로 나누고, 워커 프로세스마다
+# 자체 SensorPublisher(시나리오/생성기/MQTT 연결/스케줄러)로 맡은 구간만 발행한다.
+# 한 키는 항상 한 워커만 발행하므로 토픽별 순서가 유지된다.
+#
+# 부모 프로세스 역할
+#   - 워커 시작/중지
+#   - 수동 입력(override) 등록/해제를 모든 워커에 전달 (수동 발행 자체는 부모 연결로)
+#   - 워커 카운터(공유 메모리)를 합산해서 처리량 출력
+# 지표(METRICS_PORT)는 워커마다 METRICS_PORT + 1 + 번호 포트로 따로 제공한다.
+# 속도 제한(RATE_LIMIT)은 워커마다 1/N 씩 나눠 적용한다.
+# 오프라인 스풀(SPOOL_ENABLE)은 워커마다 SPOOL_DIR/worker-번호 에 따로 쌓는다.
+
+
+def _worker_main(env, index, count, period_ms, selects, quiet, commands, counters):
+    """워커 프로세스: 맡은 키 구간 기본 발행 + 부모 명령 처리"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # 중지는 부모가 명령으로
+    port = int(env.get("METRICS_PORT", "0") or 0)
+    if port > 0:
+        # 워커마다 자기 지표 서버 (부모 포트 + 1 + 번호)
+        env = dict(env, METRICS_PORT=str(port + 1 + index))
+    if to_bool(env.get("SPOOL_ENABLE", "false")):
+        # 워커마다 자기 스풀 디렉터리 (세그먼트 파일을 같이 쓰지 않도록)
+        spool_dir = env.get("SPOOL_DIR", "") or os.path.join(DATA_DIR, ".spool")
+        env = dict(env, SPOOL_DIR=os.path.join(spool_dir, f"worker-{index}"))
+    # 전체 발행 속도 상한은 워커 수로 나눠 씀, 지터/노이즈 난수열은 워커 번호로 구분
+    pub = SensorPublisher(split_rate_env(env, count), stream=index)
+    pub.tick_log = not quiet
+    pub.set_partition(index, count)
+    for dtype, keys in selects:
+        pub.add_default_select(dtype, keys)
+    pub.start_default_worker(period_ms=period_ms)
+
+    while True:
+        try:
+            cmd = commands.get(timeout=0.5)
+        except queue.Empty:
+            cmd = None
+        with counters.get_lock():
+            counters[:] = list(pub.stats.snapshot())
+        if cmd is None:
+            continue
+        op = cmd[0]
+        if op == "stop":
+            break
+        if op == "override":
+            pub.register_override(cmd[1], cmd[2])
+        elif op == "release":
+            pub.unregister_override(cmd[1], cmd[2])
+    pub.close()
+    with counters.get_lock():
+        counters[:] = list(pub.stats.snapshot())
+
+
+class Worker:
+    def __init__(self, env, index, count, period_ms, selects, quiet):
+        self.index = index
+        self.commands = mp.Queue()
+        self.counters = mp.Array('q', 3)  # 발행 건수, 바이트, 오류
+        self.proc = mp.Process(
+            target=_worker_main,
+            args=(env, index, count, period_ms, selects, quiet, self.commands, self.counters),
+            name=f"gen-worker-{index}", daemon=True)
+
+    def snapshot(self):
+        with self.counters.get_lock():
+            return tuple(self.counters[:])
+
+
+class AggregateStats:
+    """부모 통계 + 워커 카운터 합계 (StatsPrinter 가 pub.stats 로 사용)"""
+
+    def __init__(self, own, workers):
+        self.own = own
+        self.workers = workers
+
+    def add(self, nbytes):
+        self.own.add(nbytes)
+
+    def error(self):
+        self.own.error()
+
+    def snapshot(self):
+        total = list(self.own.snapshot())
+        for w in self.workers:
+            for k, v in enumerate(w.snapshot()):
+                total[k] += v
+        return tuple(total)
+
+
+class ProcessEngine:
+    def __init__(self, pub, workers=0):
+        self.pub = pub
+        self.count = workers if workers and workers > 0 else (os.cpu_count() or 1)
+        self.workers = []
+        self._last_t = time.monotonic()
+        self._last = []
+
+    def broadcast(self, *cmd):
+        for w in self.workers:
+            w.commands.put(cmd)
+
+    def stat_lines(self):
+        now = time.monotonic()
+        dt = max(1e-9, now - self._last_t)
+        cur = [w.snapshot() for w in self.workers]
+        lines = [
+            f"worker-{w.index}: {(c[0] - p[0]) / dt:.1f} msg/s, 누적 {c[0]}건 / 오류 {c[2]}건"
+            + ("" if w.proc.is_alive() else " (종료됨)")
+            for w, c, p in zip(self.workers, cur, self._last)
+        ]
+        self._last_t, self._last = now, cur
+        return lines
+
+    def run(self, period_ms, selects=(), emitters=(), duration=0, stats_interval=5.0, quiet=False):
+        env = self.pub.env
+        count = self.count
+        self.workers = [Worker(env, i, count, period_ms, list(selects), quiet) for i in range(count)]
+        for w in self.workers:
+            w.proc.start()
+        self.pub.log(f"[멀티 프로세스] 워커 {count}개 시작")
+        self._last = [w.snapshot() for w in self.workers]
+        self.pub.stats = AggregateStats(self.pub.stats, self.workers)
+
+        # 수동 입력 키는 모든 워커의 기본 발행에서 제외 후 부모에서 발행
+        for em in emitters:
+            self.broadcast("override", em.dtype, em.keys)
+            em.start()
+
+        stop = threading.Event()
+        signal.signal(signal.SIGINT, lambda *_: stop.set())
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+        started = time.monotonic()
+        printer = StatsPrinter(self.pub, stats_interval, extra=self.stat_lines)
+        while not stop.is_set():
+            stop.wait(0.5)
+            printer.poll()
+            if duration and time.monotonic() - started >= duration:
+                break
+            if not any(w.proc.is_alive() for w in self.workers):
+                self.pub.log("[멀티 프로세스] 모든 워커가 종료되었습니다.")
+                break
+
+        for em in emitters:
+            em.stop()
+            self.broadcast("release", em.dtype, em.keys)
+        self.broadcast("stop")
+        for w in self.workers:
+            w.proc.join(timeout=5.0)
+            if w.proc.is_alive():
+                w.proc.terminate()
@@ -0,0 +1,367 @@
+import collections
+import multiprocessing as mp
+import os
+import queue
+import socket
+import ssl
+import threading
+import time
+import zlib
+
+import paho.mqtt.client as mqtt
+
+from metrics import LATENCY_BUCKETS, AckTracker, Histogram
+
+
+# MQTT 클라이언트 생성 + 다중 연결 풀
+# 연결 하나(TLS 소켓 1개 + 네트워크 루프 스레드 1개)가 처리량 상한이 되므로
+# MQTT_POOL_SIZE 개의 연결을 두고 토픽을 연결에 나눠 보낸다.
+#   - 토픽 → 연결은 crc32(topic) % N 으로 고정 (프로세스/실행이 바뀌어도 같은 연결)
+#     → 한 토픽의 메시지는 항상 같은 연결로 나가므로 토픽별 순서가 유지된다.
+#   - MQTT_POOL_MODE=thread  : 연결마다 paho loop_start 스레드
+#     MQTT_POOL_MODE=process : 연결마다 별도 프로세스 (GIL/TLS 암호화 부하 분산)
+#       QoS>0 브로커 확인 지연은 자식이 재서 공유 메모리로 넘기고 부모 지표에 합산
+
+
+def mqtt_address(env):
+    return env.get("MQTT_HOST", "localhost"), int(env.get("MQTT_PORT", "8883"))
+
+def create_mqtt_client(env, client_id="", log=print):
+    """config.env 설정(계정/TLS)을 적용한 paho 클라이언트 (연결은 호출 측에서)"""
+    ca = env.get("MQTT_CA_CERT", "ca.crt")
+    user = env.get("MQTT_USER", "")
+    pw   = env.get("MQTT_PASS", "")
+
+    client = mqtt.Client(client_id=client_id)
+    if user:
+        client.username_pw_set(user, pw)
+
+    # TLS 설정 (CA만 지정: 서버 인증서 검증), CA 미지정 시 비 TLS
+    if ca:
+        client.tls_set(
+            ca_certs=ca,
+            certfile=None,
+            keyfile=None,
+            tls_version=ssl.PROTOCOL_TLSv1_2,
+        )
+        # 호스트네임 불일치/자체서명 문제를 일시 무시
+        client.tls_insecure_set(True)
+
+    client.enable_logger()
+    # 연결 상태 (paho 1.x is_connected() 는 연결이 끊긴 뒤에도 재연결 시도 전까지 True 로 남음)
+    client.online = threading.Event()
+    # 콜백(선택)
+    tag = f"[MQTT {client_id}]" if client_id else "[MQTT]"
+
+    def on_connect(c, u, f, rc):
+        if rc == 0:
+            c.online.set()
+        log(f"{tag} connected rc={rc}")
+
+    def on_disconnect(c, u, rc):
+        c.online.clear()
+        log(f"{tag} disconnected rc={rc}")
+
+    client.on_connect = on_connect
+    client.on_disconnect = on_disconnect
+    return client
+
+def connect_client(client, env, log=print):
+    """연결 + 백그라운드 네트워크 루프 시작, 실패해도 loop_start 로 재연결 시도"""
+    host, port = mqtt_address(env)
+    try:
+        client.connect(host, port, keepalive=30)
+    except Exception as e:
+        log(f"[MQTT] connect failed: {e}")
+        client.connect_async(host, port, keepalive=30)
+    client.loop_start()
+
+class PublishWindow:
+    """publish() 결과(MQTTMessageInfo)를 최대 size 개까지만 미완료로 두는 창
+
+    paho 의 송신 큐는 상한이 없어서, 최대 속도로 발행하면 네트워크 스레드가 비우는 것보다 빨리 쌓인다.
+    창이 차면 가장 오래된 메시지가 소켓에 쓰일 때까지(QoS>0 은 브로커 확인까지) 기다린다.
+    """
+
+    def __init__(self, size=1000, timeout=10.0, online=None):
+        self.size = max(1, int(size))
+        self.timeout = timeout  # 메시지 하나를 기다리는 최대 시간
+        self.online = online    # 연결 상태 확인 함수, 끊기면 기다리지 않음 (QoS0 는 paho 가 버림)
+        self._infos = collections.deque()
+        self.lost = 0           # 시간 초과/연결 끊김으로 확인하지 못한 수
+
+    def add(self, info):
+        """paho 가 받아서 보낼 메시지만 추적 (rc 가 성공이 아니면 기다릴 것이 없음)"""
+        if info is None or info.rc != mqtt.MQTT_ERR_SUCCESS:
+            return
+        self._infos.append(info)
+        while len(self._infos) > self.size:
+            self._wait(self._infos.popleft())
+
+    def _wait(self, info):
+        deadline = time.monotonic() + self.timeout
+        try:
+            while not info.is_published():
+                if time.monotonic() >= deadline or (self.online is not None and not self.online()):
+                    self.lost += 1
+                    return
+                info.wait_for_publish(0.1)
+        except (ValueError, RuntimeError):
+            self.lost += 1
+
+    def drain(self):
+        """남은 메시지를 모두 기다림 (loop_stop 은 송신 큐를 비우지 않고 끝내므로 종료 전에 호출)"""
+        while self._infos:
+            self._wait(self._infos.popleft())
+
+
+def publish_accepted(info, qos):
+    """paho 가 메시지를 받아 보낼 예정인지 (QoS>0 은 끊겨 있어도 보관했다가 재연결 후 전송, 그 밖의 rc 는 버려짐)"""
+    return info.rc == mqtt.MQTT_ERR_SUCCESS or (qos > 0 and info.rc == mqtt.MQTT_ERR_NO_CONN)
+
+
+def client_id_prefix(env):
+    """풀 연결 client ID 접두어, 미지정 시 호스트명-PID (브로커에서 ID 중복 방지)"""
+    return env.get("MQTT_CLIENT_ID", "") or f"sensorpub-{socket.gethostname()}-{os.getpid()}"
+
+def shard_of(topic: str, size: int) -> int:
+    """토픽 → 연결 번호 (실행/프로세스와 무관하게 항상 같은 값)"""
+    return zlib.crc32(topic.encode("utf-8")) % size
+
+
+class PublishStats:
+    """발행 건수/바이트/오류 누적 카운터 (스레드 안전)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.messages = 0
+        self.bytes = 0
+        self.errors = 0
+
+    def add(self, nbytes):
+        with self._lock:
+            self.messages += 1
+            self.bytes += nbytes
+
+    def error(self):
+        with self._lock:
+            self.errors += 1
+
+    def snapshot(self):
+        with self._lock:
+            return self.messages, self.bytes, self.errors
+
+
+class ThreadConnection:
+    """같은 프로세스 안의 연결 하나 (paho loop_start 스레드)"""
+
+    def __init__(self, env, client_id, log=print, metrics=None, qos=0):
+        self.client_id = client_id
+        self.stats = PublishStats()
+        self.client = create_mqtt_client(env, client_id, log=log)
+        # QoS>0 이면 브로커 확인 지연 측정 (mid 는 연결마다 따로)
+        self.acks = metrics.track_acks(self.client) if metrics is not None and qos > 0 else None
+        connect_client(self.client, env, log)
+
+    def publish(self, topic, data, qos, retain):
+        info = self.client.publish(topic, data, qos=qos, retain=retain)
+        if not publish_accepted(info, qos):
+            self.stats.error()
+            return info
+        self.stats.add(len(data))
+        if self.acks is not None:
+            self.acks.sent(info.mid)
+        return info
+
+    def is_connected(self):
+        return self.client.online.is_set()
+
+    def snapshot(self):
+        return self.stats.snapshot()
+
+    def close(self):
+        self.client.loop_stop()
+        self.client.disconnect()
+
+
+ACK_SYNC_SEC = 0.5  # 자식 → 부모 확인 지연 누적값 복사 주기
+
+
+def _process_worker(env, client_id, jobs, counters, qos, retain, ack_totals=None):
+    """자식 프로세스: 큐에서 (topic, bytes) 묶음을 받아 순서대로 발행
+
+    ack_totals(공유 배열)가 있으면 확인 지연 히스토그램 누적값(버킷별 개수, 합계, 개수)을 복사해 둔다.
+    """
+    client = create_mqtt_client(env, client_id)
+    hist = acks = None
+    if ack_totals is not None:
+        hist = Histogram("ack", "")
+        acks = AckTracker(hist, client)
+    connect_client(client, env)
+    synced = time.monotonic()
+    while True:
+        try:
+            batch = jobs.get(timeout=ACK_SYNC_SEC) if acks is not None else jobs.get()
+        except queue.Empty:
+            batch = []
+        if batch is None:
+            break
+        nbytes = errors = 0
+        for topic, data in batch:
+            try:
+                info = client.publish(topic, data, qos=qos, retain=retain)
+                if not publish_accepted(info, qos):
+                    errors += 1
+                    continue
+                nbytes += len(data)
+                if acks is not None:
+                    acks.sent(info.mid)
+            except Exception:
+                errors += 1
+        if batch:
+            with counters.get_lock():
+                counters[0] += len(batch) - errors
+                counters[1] += nbytes
+                counters[2] += errors
+        if acks is not None and time.monotonic() - synced >= ACK_SYNC_SEC:
+            _copy_ack_totals(hist, ack_totals)
+            synced = time.monotonic()
+    client.loop_stop()
+    client.disconnect()
+    if acks is not None:
+        _copy_ack_totals(hist, ack_totals)
+
+
+def _copy_ack_totals(hist, ack_totals):
+    counts, total, count = hist.totals()
+    with ack_totals.get_lock():
+        ack_totals[:] = counts + [total, count]
+
+
+class ProcessConnection:
+    """별도 프로세스의 연결 하나
+
+    메시지를 하나씩 프로세스 간 큐로 보내면 직렬화 비용이 커서,
+    BATCH 개 또는 FLUSH_SEC 마다 묶어서 보낸다.
+    """
+
+    BATCH = 256
+    FLUSH_SEC = 0.02
+
+    def __init__(self, env, client_id, qos, retain, log=print, metrics=None):
+        self.client_id = client_id
+        self.log = log
+        self._lock = threading.Lock()
+        self._buf = []
+        self._counters = mp.Array('q', 3)  # 발행 건수, 바이트, 오류 (자식이 갱신)
+        # QoS>0 확인 지연: 버킷별 개수(+Inf 포함) + 합계 + 개수 (자식이 갱신, 부모 지표 출력 때 합산)
+        self._ack_totals = None
+        if metrics is not None and qos > 0:
+            self._ack_totals = mp.Array('d', len(LATENCY_BUCKETS) + 3)
+            metrics.ack_seconds.add_source(self._acks_snapshot)
+        self._jobs = mp.Queue(maxsize=1024)
+        self._proc = mp.Process(
+            target=_process_worker,
+            args=(env, client_id, self._jobs, self._counters, qos, retain, self._ack_totals),
+            name=f"mqtt-{client_id}", daemon=True)
+        self._proc.start()
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name=f"flush-{client_id}", daemon=True)
+        self._flusher.start()
+
+    def snapshot(self):
+        with self._counters.get_lock():
+            return tuple(self._counters[:])
+
+    def _acks_snapshot(self):
+        with self._ack_totals.get_lock():
+            values = list(self._ack_totals[:])
+        return [int(v) for v in values[:-2]], values[-2], int(values[-1])
+
+    def is_connected(self):
+        return True  # 연결 상태는 자식 프로세스 안에만 있음 (오프라인 스풀 미지원)
+
+    def publish(self, topic, data, qos, retain):
+        with self._lock:
+            self._buf.append((topic, data))
+            if len(self._buf) < self.BATCH:
+                return
+            batch, self._buf = self._buf, []
+            # 큐에 넣는 순서 = 발행 순서가 되도록 잠금 안에서 전송
+            self._jobs.put(batch)
+
+    def flush(self):
+        with self._lock:
+            if self._buf:
+                batch, self._buf = self._buf, []
+                self._jobs.put(batch)
+
+    def _flush_loop(self):
+        while not self._closed.wait(self.FLUSH_SEC):
+            self.flush()
+
+    def close(self):
+        self._closed.set()
+        self._flusher.join(timeout=1.0)
+        self.flush()
+        self._jobs.put(None)
+        self._proc.join(timeout=3.0)
+        if self._proc.is_alive():
+            self._proc.terminate()
+
+
+class MqttPool:
+    """N개 연결 풀, paho Client 처럼 publish()/loop_stop()/disconnect() 제공"""
+
+    def __init__(self, env, size, mode="thread", qos=0, retain=False, log=print, metrics=None):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"MQTT_POOL_MODE 는 thread/process 중 하나여야 합니다: '{mode}'")
+        self.size = max(1, int(size))
+        self.mode = mode
+        prefix = client_id_prefix(env)
+        if mode == "process":
+            self.conns = [ProcessConnection(env, f"{prefix}-{i}", qos, retain, log, metrics)
+                          for i in range(self.size)]
+        else:
+            self.conns = [ThreadConnection(env, f"{prefix}-{i}", log, metrics, qos) for i in range(self.size)]
+        self._shard = {}  # topic → 연결 (토픽 수가 고정이라 해시는 토픽당 한 번만)
+        self._last_t = time.monotonic()
+        self._last = [c.snapshot() for c in self.conns]
+
+    def connection_for(self, topic):
+        conn = self._shard.get(topic)
+        if conn is None:
+            conn = self._shard[topic] = self.conns[shard_of(topic, self.size)]
+        return conn
+
+    def publish(self, topic, payload, qos=0, retain=False):
+        return self.connection_for(topic).publish(topic, payload, qos, retain)
+
+    def is_connected(self, topic=None):
+        """topic 을 맡은 연결(없으면 전체 연결)이 브로커에 붙어 있는지"""
+        if topic is not None:
+            return self.connection_for(topic).is_connected()
+        return all(c.is_connected() for c in self.conns)
+
+    def stat_lines(self):
+        """연결별 처리량 (이전 호출 이후)"""
+        now = time.monotonic()
+        dt = max(1e-9, now - self._last_t)
+        cur = [c.snapshot() for c in self.conns]
+        lines = [
+            f"{c.client_id}: {(s[0] - p[0]) / dt:.1f} msg/s, {(s[1] - p[1]) / dt / 1024:.1f} KiB/s, "
+            f"누적 {s[0]}건 / 오류 {s[2]}건"
+            for c, s, p in zip(self.conns, cur, self._last)
+        ]
+        self._last_t, self._last = now, cur
+        return lines
+
+    def loop_stop(self):
+        pass  # 연결별 정리는 disconnect() 에서
+
+    def disconnect(self):
+        for c in self.conns:
+            try:
+                c.close()
+            except Exception as e:
+                print(e)
@@ -0,0 +1,174 @@
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from fleet import topic_dtype
+from mqtt_pool import create_mqtt_client, connect_client, client_id_prefix, shard_of
+
+
+# 종단간 지연 측정 (발행 → 브로커 → 구독)
+# payload 의 "date" 는 생성 시각일 뿐 실제 도착 시각은 아무도 확인하지 않으므로,
+# 측정 대상 토픽의 payload 끝에 probe_id / probe_seq(dtype별 단조 증가) / probe_ts(발행 시각, monotonic ns)를
+# 덧붙여 보내고, 같은 프로세스의 구독 연결로 되돌려 받아서 dtype 별로
+#   - 지연 p50 / p99 / 최대
+#   - 손실   : 발행 후 PROBE_GRACE_SEC 안에 돌아오지 않은 메시지 (그 뒤 도착하면 '늦은 도착')
+#   - 순서 뒤바뀜 : 같은 토픽에서 앞 seq 보다 작은 seq 가 도착
+# 을 집계한다. 대시보드 지연이 브로커 쪽인지 생성기 쪽인지 나눠 보기 위한 진단용.
+#
+# PROBE_SAMPLE=1 이면 {MQTT_BASE_TOPIC}/# 전체를 구독,
+# 1 미만이면 플릿 토픽 중 crc32 로 고른 비율만 표시/구독 (브로커 부하 2배 방지).
+# probe_id 가 다른 메시지(다른 프로세스/워커의 측정)는 무시한다.
+
+RTT_SAMPLES_MAX = 100_000  # 출력 구간당 보관하는 지연 표본 수 (GUI 처럼 출력이 없어도 메모리 고정)
+
+
+class _Track:
+    """dtype 하나의 측정 상태"""
+
+    def __init__(self):
+        self.seq = 0
+        self.pending = deque()  # (seq, 발행 ns) - 손실 판정 전
+        self.recv = set()       # 판정 전에 도착한 seq
+        self.judged = 0         # 여기까지의 seq 는 손실 판정 끝
+        self.rtt = []           # 이번 출력 구간 지연(ns)
+        self.rtt_max = 0
+        self.sent = 0
+        self.received = 0
+        self.lost = 0
+        self.late = 0
+        self.reordered = 0
+        self.duplicates = 0
+
+
+class LatencyProbe:
+    def __init__(self, env, base, topics, sample=1.0, grace_sec=5.0, qos=0, log=print, metrics=None):
+        """topics: 플릿 토픽 → dtype"""
+        self.log = log
+        self.metrics = metrics
+        self.grace_ns = int(max(0.0, grace_sec) * 1e9)
+        self.probe_id = os.urandom(4).hex()
+        self._tag = b',"probe_id":"' + self.probe_id.encode() + b'","probe_seq":'
+        self._lock = threading.Lock()
+        self._tracks = {}
+        self._last_by_topic = {}  # topic → 마지막으로 받은 seq
+
+        cut = int(max(0.0, min(1.0, sample)) * 1000)
+        self.sample_all = cut >= 1000
+        self._topics = {t: d for t, d in topics.items() if self.sample_all or shard_of(t, 1000) < cut}
+        if self.sample_all:
+            subs = [(f"{base}/#", qos)]
+        else:
+            subs = [(t, qos) for t in self._topics]
+
+        self.client = create_mqtt_client(env, f"{client_id_prefix(env)}-probe", log=log)
+        on_connect = self.client.on_connect
+
+        def subscribe(c, userdata, flags, rc):
+            on_connect(c, userdata, flags, rc)
+            # 재연결 때마다 다시 구독 (구독 수가 많으면 나눠서)
+            for i in range(0, len(subs), 1000):
+                c.subscribe(subs[i:i + 1000])
+
+        self.client.on_connect = subscribe
+        self.client.on_message = self._on_message
+        connect_client(self.client, env, log)
+        self.log(f"[프로브] id={self.probe_id}, 구독 "
+                 + (f"{base}/#" if self.sample_all else f"토픽 {len(subs)}개"))
+
+    def _track(self, dtype):
+        tr = self._tracks.get(dtype)
+        if tr is None:
+            tr = self._tracks[dtype] = _Track()
+        return tr
+
+    def _dtype(self, topic):
+        dtype = self._topics.get(topic)
+        if dtype is None and self.sample_all:
+            dtype = topic_dtype(topic)
+        return dtype
+
+    def stamp(self, topic, data: bytes) -> bytes:
+        """측정 대상이면 JSON 끝에 probe 필드를 붙인 payload, 아니면 그대로"""
+        dtype = self._dtype(topic)
+        if dtype is None or not data.endswith(b"}"):
+            return data
+        with self._lock:
+            tr = self._track(dtype)
+            tr.seq += 1
+            tr.sent += 1
+            seq = tr.seq
+            now = time.monotonic_ns()
+            tr.pending.append((seq, now))
+            self._judge(tr, now)
+        return data[:-1] + self._tag + b'%d,"probe_ts":%d}' % (seq, now)
+
+    def _on_message(self, client, userdata, msg):
+        now = time.monotonic_ns()
+        data = msg.payload
+        k = data.rfind(self._tag)
+        if k < 0:
+            return
+        try:
+            seq_txt, ts_txt = data[k + len(self._tag):-1].split(b',"probe_ts":')
+            seq, ts = int(seq_txt), int(ts_txt)
+        except ValueError:
+            return
+        dtype = self._dtype(msg.topic) or "other"
+        with self._lock:
+            tr = self._track(dtype)
+            tr.received += 1
+            if len(tr.rtt) < RTT_SAMPLES_MAX:
+                tr.rtt.append(now - ts)
+            tr.rtt_max = max(tr.rtt_max, now - ts)
+            if seq <= tr.judged:
+                tr.late += 1
+            elif seq in tr.recv:
+                tr.duplicates += 1
+            else:
+                tr.recv.add(seq)
+            last = self._last_by_topic.get(msg.topic, 0)
+            if seq < last:
+                tr.reordered += 1
+            else:
+                self._last_by_topic[msg.topic] = seq
+        if self.metrics is not None:
+            self.metrics.e2e_seconds.observe((now - ts) / 1e9, dtype)
+
+    def _judge(self, tr, now):
+        """grace 가 지난 발행분의 도착 여부 판정"""
+        limit = now - self.grace_ns
+        while tr.pending and tr.pending[0][1] <= limit:
+            seq, _ = tr.pending.popleft()
+            if seq in tr.recv:
+                tr.recv.discard(seq)
+            else:
+                tr.lost += 1
+            tr.judged = seq
+
+    def stat_lines(self):
+        """이전 호출 이후 구간의 dtype 별 지연 + 누적 손실/순서"""
+        now = time.monotonic_ns()
+        lines = []
+        with self._lock:
+            for dtype in sorted(self._tracks):
+                tr = self._tracks[dtype]
+                self._judge(tr, now)
+                rtt, rtt_max, tr.rtt, tr.rtt_max = tr.rtt, tr.rtt_max, [], 0
+                if rtt:
+                    p50, p99 = np.percentile(np.array(rtt) / 1e6, [50, 99])
+                    lat = f"p50 {p50:.2f}ms / p99 {p99:.2f}ms / 최대 {rtt_max / 1e6:.2f}ms"
+                else:
+                    lat = "수신 없음"
+                lines.append(f"e2e {dtype}: {lat}, 발행 {tr.sent} / 수신 {tr.received}, 손실 {tr.lost}, "
+                             f"늦은 도착 {tr.late}, 순서 뒤바뀜 {tr.reordered}, 중복 {tr.duplicates}")
+        return lines
+
+    def close(self):
+        try:
+            self.client.loop_stop()
+            self.client.disconnect()
+        except Exception:
+            pass
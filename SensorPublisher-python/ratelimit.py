@@ -0,0 +1,203 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+# 전체 발행 속도 제한 (토큰 버킷)
+# 수동 탭/기본 발행/부하 프로파일이 각자 타이머로 발행하므로 전부 켜면 순간 부하가 합쳐져
+# 스테이징 브로커가 넘어갈 수 있다. 모든 발행은 _mqtt_publish_raw 에서 이 제한기를 거친다.
+#   - 전체 버킷 RATE_LIMIT (msg/s) + 종류별 버킷 RATE_LIMIT_DTYPES (예: power:5000,energy:3000)
+#   - 버킷 크기 = 속도 × RATE_LIMIT_BURST_SEC (순간적으로 몰아서 보낼 수 있는 양)
+#   - 메시지마다 두 버킷에서 토큰 1개를 예약하고, 모자라면 채워질 때까지의 대기 시간을 돌려준다.
+#     토큰은 음수까지 미리 빌려 쓰므로 여러 스레드가 동시에 기다려도 도착 순서대로 간격이 벌어진다.
+#   - RATE_LIMIT_MODE=wait : 대기 후 발행 (기본), drop : 기다려야 하면 버림
+#     단 스케줄러 스레드(기본 발행/수동 탭이 함께 쓰는 스레드)에서는 잠들지 않는다.
+#     예산이 모자란 메시지는 종류별 밀린 목록(Backlog)에 넣고 짧은 주기로 토큰만큼 꺼내 발행하므로
+#     power 예산이 바닥나도 water/energy/다른 탭은 그대로 진행한다.
+#     같은 토픽의 새 값이 오면 밀린 이전 값은 버린다 (센서 값은 최신 값만 의미, 밀린 양은 토픽 수 이하).
+
+MODES = ("wait", "drop")
+
+
+class TokenBucket:
+    def __init__(self, rate, burst_sec=1.0):
+        self.rate = float(rate)
+        self.capacity = max(1.0, self.rate * burst_sec)
+        self.tokens = self.capacity
+        self.last = time.monotonic()
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+
+    def wait_time(self):
+        """토큰 1개가 생길 때까지 남은 시간 (refill 후 호출)"""
+        return 0.0 if self.tokens >= 1.0 else (1.0 - self.tokens) / self.rate
+
+
+def parse_dtype_rates(text):
+    """'power:5000,energy:3000' → {'power': 5000.0, 'energy': 3000.0}"""
+    rates = {}
+    for item in filter(None, (x.strip() for x in str(text or "").split(","))):
+        dtype, _, rate = item.partition(":")
+        try:
+            rates[dtype.strip().lower()] = float(rate)
+        except ValueError:
+            raise ValueError(f"RATE_LIMIT_DTYPES 형식은 종류:msg/s 이어야 합니다: '{item}'")
+    return rates
+
+
+def split_rate_env(env, count):
+    """같은 예산을 count 개 프로세스가 나눠 쓰도록 상한을 1/count 로 줄인 env 사본"""
+    count = max(1, int(count))
+    rate = float(env.get("RATE_LIMIT", "0") or 0)
+    dtype_rates = parse_dtype_rates(env.get("RATE_LIMIT_DTYPES", ""))
+    return dict(env, RATE_LIMIT=str(rate / count),
+                RATE_LIMIT_DTYPES=",".join(f"{d}:{r / count}" for d, r in dtype_rates.items()))
+
+
+class RateLimiter:
+    def __init__(self, rate=0, dtype_rates=None, burst_sec=1.0, mode="wait"):
+        if mode not in MODES:
+            raise ValueError(f"RATE_LIMIT_MODE 는 {MODES} 중 하나여야 합니다: '{mode}'")
+        self.mode = mode
+        self.burst_sec = max(0.0, float(burst_sec))
+        self.total = TokenBucket(rate, self.burst_sec) if rate and rate > 0 else None
+        self.buckets = {d: TokenBucket(r, self.burst_sec) for d, r in (dtype_rates or {}).items() if r > 0}
+        self._lock = threading.Lock()
+        self.counts = {}  # dtype → [통과, 대기, 버림, 대기 시간 합(초)]
+        self._last = {}
+
+    @classmethod
+    def from_env(cls, env):
+        """config.env 설정으로 생성, 제한이 없으면 None"""
+        rate = float(env.get("RATE_LIMIT", "0") or 0)
+        dtype_rates = parse_dtype_rates(env.get("RATE_LIMIT_DTYPES", ""))
+        if rate <= 0 and not any(r > 0 for r in dtype_rates.values()):
+            return None
+        return cls(rate, dtype_rates,
+                   burst_sec=float(env.get("RATE_LIMIT_BURST_SEC", "1") or 1),
+                   mode=env.get("RATE_LIMIT_MODE", "wait") or "wait")
+
+    def reserve(self, dtype):
+        """토큰 1개 예약 → 대기할 시간(초), drop 모드에서 기다려야 하면 None"""
+        now = time.monotonic()
+        sub = self.buckets.get(dtype)
+        with self._lock:
+            c = self._count(dtype)
+            wait = 0.0
+            for bucket in (self.total, sub):
+                if bucket is not None:
+                    bucket.refill(now)
+                    wait = max(wait, bucket.wait_time())
+            if wait > 0 and self.mode == "drop":
+                c[2] += 1
+                return None
+            for bucket in (self.total, sub):
+                if bucket is not None:
+                    bucket.tokens -= 1.0
+            c[0] += 1
+            if wait > 0:
+                c[1] += 1
+                c[3] += wait
+            return wait
+
+    def try_acquire(self, dtype):
+        """지금 토큰이 있으면 1개 쓰고 True, 없으면 빌리지 않고 False (Backlog 용)"""
+        now = time.monotonic()
+        sub = self.buckets.get(dtype)
+        with self._lock:
+            buckets = [b for b in (self.total, sub) if b is not None]
+            for bucket in buckets:
+                bucket.refill(now)
+                if bucket.tokens < 1.0:
+                    return False
+            for bucket in buckets:
+                bucket.tokens -= 1.0
+            self._count(dtype)[0] += 1
+            return True
+
+    def _count(self, dtype):
+        c = self.counts.get(dtype)
+        if c is None:
+            c = self.counts[dtype] = [0, 0, 0, 0.0]
+        return c
+
+    def note(self, dtype, deferred=0, dropped=0, waited=0.0):
+        """Backlog 의 미룸/버림/대기 시간을 통계에 반영"""
+        with self._lock:
+            c = self._count(dtype)
+            c[1] += deferred
+            c[2] += dropped
+            c[3] += waited
+
+    def snapshot(self):
+        with self._lock:
+            return {d: tuple(c) for d, c in self.counts.items()}
+
+    def stat_lines(self):
+        """종류별 통과/대기/버림 (이전 호출 이후 증가분 + 누적)"""
+        cur = self.snapshot()
+        lines = []
+        for dtype in sorted(cur):
+            c, p = cur[dtype], self._last.get(dtype, (0, 0, 0, 0.0))
+            limit = self.buckets.get(dtype)
+            lines.append(f"limit {dtype}" + (f"({limit.rate:.0f}/s)" if limit else "")
+                         + f": 통과 {c[0] - p[0]}, 대기 {c[1] - p[1]}회 ({c[3] - p[3]:.2f}s), "
+                         f"버림 {c[2] - p[2]} / 누적 대기 {c[1]}회, 버림 {c[2]}")
+        self._last = cur
+        return lines
+
+    def metric_values(self):
+        """Metrics.add_collector 용 종류별 누적 카운터"""
+        cur = self.snapshot()
+        return [
+            ("sensorpub_throttled_total", "counter", "Messages delayed by the rate limiter.",
+             [([("dtype", d)], c[1]) for d, c in sorted(cur.items())]),
+            ("sensorpub_throttle_wait_seconds_total", "counter", "Time spent waiting for rate limiter tokens.",
+             [([("dtype", d)], c[3]) for d, c in sorted(cur.items())]),
+            ("sensorpub_dropped_total", "counter", "Messages dropped by the rate limiter (drop mode).",
+             [([("dtype", d)], c[2]) for d, c in sorted(cur.items())]),
+        ]
+
+
+class Backlog:
+    """스케줄러 스레드용 wait 모드: 예산이 모자라면 잠들지 않고 종류별로 미뤘다가 토큰이 생기면 꺼냄"""
+
+    def __init__(self, limiter):
+        self.limiter = limiter
+        self._lock = threading.Lock()
+        self._pending = {}  # dtype → OrderedDict(topic → (bytes, 미룬 시각))
+
+    def offer(self, dtype, topic, data):
+        """지금 보내도 되면 True, 아니면 미뤄 두고 False (밀린 것이 있으면 순서 유지를 위해 뒤에 붙임)"""
+        with self._lock:
+            q = self._pending.get(dtype)
+            if not q and self.limiter.try_acquire(dtype):
+                return True
+            if q is None:
+                q = self._pending[dtype] = OrderedDict()
+            replaced = q.pop(topic, None) is not None
+            q[topic] = (data, time.monotonic())
+        self.limiter.note(dtype, deferred=1, dropped=int(replaced))
+        return False
+
+    def take(self):
+        """토큰이 있는 만큼 밀린 메시지 [(topic, bytes)], 종류마다 따로 (한 종류가 모자라도 다른 종류는 진행)"""
+        out = []
+        now = time.monotonic()
+        with self._lock:
+            for dtype, q in self._pending.items():
+                waited = 0.0
+                while q and self.limiter.try_acquire(dtype):
+                    topic, (data, t0) = q.popitem(last=False)
+                    waited += now - t0
+                    out.append((topic, data))
+                if waited:
+                    self.limiter.note(dtype, waited=waited)
+        return out
+
+    @property
+    def pending(self):
+        with self._lock:
+            return sum(len(q) for q in self._pending.values())
@@ -0,0 +1,118 @@
+import threading
+
+import numpy as np
+
+from fleet import DTYPES
+
+
+# 센서 상태 레지스트리 (기본 발행 허용 / 수동 입력 중)
+# 센서 키마다 데이터 종류별 조밀 인덱스(= FleetKeys 인덱스)를 두고
+# 허용/수동 입력 여부를 키 수만큼의 bool 배열로 보관한다.
+#   - 선택 키 튜플 (floor, section) / (floor,) → 해당 인덱스 배열 (플릿이면 모든 건물의 같은 위치)
+#   - 활성 키 = 허용 & ~수동 입력 (& 멀티 프로세스 구간), 마스크 연산 한 번
+#   - 상태가 바뀔 때만 버전을 올리고 활성 인덱스는 버전별로 한 번만 계산해 재사용
+#     → 틱마다 set 복사/키별 멤버십 검사 없음
+
+
+class SensorRegistry:
+    """데이터 종류별 키 튜플 ↔ 인덱스 + 허용/수동 입력 마스크"""
+
+    __slots__ = ("_lock", "_index", "_group_keys", "selected", "overridden", "part",
+                 "_version", "_active", "_full")
+
+    def __init__(self, fleet, select_all=False):
+        """select_all: 처음부터 모든 키 허용 (플릿 모드), False 면 선택한 키만"""
+        self._lock = threading.Lock()
+        self._index = {}
+        self._group_keys = {}
+        self.selected = {}
+        self.overridden = {}
+        self.part = {}        # 이 프로세스가 맡은 구간 마스크, None = 전체
+        self._version = {}
+        self._active = {}     # dtype → (버전, 활성 인덱스 또는 None=전체)
+        self._full = {}
+        for dtype in DTYPES:
+            keys = fleet.keys[dtype]
+            n = len(keys)
+            groups = [(f,) if dtype == 'water' else (f, s) for f, s in keys.group_keys()]
+            index = {}
+            for i, key in enumerate(groups):
+                index.setdefault(key, []).append(i)
+            self._index[dtype] = {k: np.array(v, dtype=np.intp) for k, v in index.items()}
+            self._group_keys[dtype] = groups
+            self.selected[dtype] = np.full(n, bool(select_all))
+            self.overridden[dtype] = np.zeros(n, dtype=bool)
+            self.part[dtype] = None
+            self._version[dtype] = 0
+            self._full[dtype] = n
+
+    def indices(self, dtype, keys):
+        """키 튜플들 → 인덱스 배열 (없는 키는 무시)"""
+        index = self._index[dtype]
+        found = [index[k] for k in keys if k in index]
+        return np.concatenate(found) if found else np.empty(0, dtype=np.intp)
+
+    def _changed(self, dtype):
+        self._version[dtype] += 1
+
+    # ---- 기본 발행 허용 ----
+    def set_selected(self, dtype, keys):
+        idx = self.indices(dtype, keys)
+        with self._lock:
+            self.selected[dtype][:] = False
+            self.selected[dtype][idx] = True
+            self._changed(dtype)
+
+    def add_selected(self, dtype, keys):
+        idx = self.indices(dtype, keys)
+        with self._lock:
+            self.selected[dtype][idx] = True
+            self._changed(dtype)
+
+    def clear_selected(self, dtype):
+        with self._lock:
+            self.selected[dtype][:] = False
+            self._changed(dtype)
+
+    def selected_keys(self, dtype):
+        """허용된 키 튜플 set (표시/로그용, 발행 경로에서는 쓰지 않음)"""
+        groups = self._group_keys[dtype]
+        with self._lock:
+            idx = np.flatnonzero(self.selected[dtype])
+        return {groups[i] for i in idx.tolist()}
+
+    def is_selected(self, dtype, key):
+        idx = self._index[dtype].get(key)
+        return idx is not None and bool(self.selected[dtype][idx].any())
+
+    # ---- 수동 입력 ----
+    def set_override(self, dtype, keys, on=True):
+        idx = self.indices(dtype, keys)
+        with self._lock:
+            self.overridden[dtype][idx] = on
+            self._changed(dtype)
+
+    # ---- 멀티 프로세스 구간 ----
+    def set_partition(self, dtype, idx):
+        mask = np.zeros(self._full[dtype], dtype=bool)
+        mask[idx] = True
+        with self._lock:
+            self.part[dtype] = mask
+            self._changed(dtype)
+
+    # ---- 틱마다 호출 ----
+    def active(self, dtype):
+        """기본 발행 대상 인덱스 배열, 전체면 None (상태가 그대로면 이전 결과 재사용)"""
+        with self._lock:
+            version = self._version[dtype]
+            cached = self._active.get(dtype)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            mask = self.selected[dtype] & ~self.overridden[dtype]
+            if self.part[dtype] is not None:
+                mask &= self.part[dtype]
+            idx = None if mask.all() else np.flatnonzero(mask)
+            if idx is not None:
+                idx.flags.writeable = False  # 여러 틱이 같은 배열을 공유
+            self._active[dtype] = (version, idx)
+            return idx
@@ -0,0 +1,268 @@
+import json
+import os
+import shutil
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from defFunc import TimeIndex, seconds_of_day
+from scenario_stream import StreamScenarioData
+
+
+# 시나리오 CSV 캐시
+# 매 틱마다 read_csv 하지 않도록 시작 시 한 번 파싱해두고,
+# 파일 mtime이 바뀌었을 때만 다시 읽는다.
+#
+# 파싱 결과(정렬된 시각/숫자 행렬/그룹 위치/원본 컬럼)는 CSV 옆 .scenario_cache/ 에 .npy 로 저장하고,
+# 다음 실행부터는 CSV 파싱 없이 mmap 으로 연다 (exe 시작 시간 단축).
+# 캐시 폴더 이름에 CSV 의 mtime/크기가 들어가므로 CSV 가 바뀌면 자동으로 다시 만든다.
+
+CACHE_DIRNAME = ".scenario_cache"
+CACHE_VERSION = 1
+
+def _sec(now: datetime) -> int:
+    return now.hour * 3600 + now.minute * 60 + now.second
+
+
+class ScenarioData:
+    """CSV 한 개 분량: 시각(초) 기준으로 정렬된 DataFrame + 시간 인덱스
+
+    floor/section 컬럼이 있으면 (floor, section) 그룹별 인덱스도 만든다.
+    그룹 인덱스는 자기 행만 담고 있으므로 조회 시 파일 전체를 보지 않는다.
+    """
+
+    def __init__(self, path, df: pd.DataFrame, mtime):
+        self.path = path
+        self.mtime = mtime
+
+        if not pd.api.types.is_datetime64_any_dtype(df['date']):
+            df['date'] = pd.to_datetime(df['date'], errors='coerce')
+        df = df.dropna(subset=['date'])
+
+        sod = seconds_of_day(df['date'])
+        order = np.argsort(sod, kind='stable')
+        self._df = df.iloc[order].reset_index(drop=True)
+        self._df_columns = None
+        sod = sod[order]
+        self.index = TimeIndex(sod)
+        self.positions = np.arange(len(sod))
+
+        # 보간용 숫자 컬럼 행렬 (date/id 제외)
+        self.num_cols = [c for c in self.df.columns
+                         if c not in ('id', 'date') and pd.api.types.is_numeric_dtype(self.df[c])]
+        self.values = self.df[self.num_cols].to_numpy(dtype=np.float64)
+
+        # {(floor:int, section:str): (TimeIndex, 전체 df 기준 행 위치)}
+        # 전체가 시각순 정렬이므로 그룹 내부 위치도 시각순
+        self.groups = {}
+        if 'floor' in self.df.columns and 'section' in self.df.columns:
+            for (floor, section), pos in self.df.groupby(['floor', 'section'], sort=False).indices.items():
+                self.groups[(int(floor), str(section))] = (TimeIndex(sod[pos]), pos)
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def df(self):
+        """정렬된 원본 DataFrame (캐시에서 연 경우 처음 쓸 때 만든다)"""
+        if self._df is None:
+            self._df = pd.DataFrame({name: load() for name, load in self._df_columns})
+        return self._df
+
+    # ---- 컬럼 캐시 (.npy) ----
+    def save_cache(self, cache_dir):
+        """cache_dir 에 배열을 저장 (임시 폴더에 쓴 뒤 이름 변경)"""
+        tmp = cache_dir + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        np.save(os.path.join(tmp, "sod.npy"), self.index.sod)
+        np.save(os.path.join(tmp, "values.npy"), self.values)
+
+        columns = []
+        for k, (name, col) in enumerate(self.df.items()):
+            if pd.api.types.is_datetime64_any_dtype(col):
+                kind, arr = "datetime", col.to_numpy("datetime64[ns]")
+            elif pd.api.types.is_numeric_dtype(col):
+                kind, arr = "numeric", col.to_numpy()
+            else:
+                kind, arr = "text", col.astype(str).to_numpy(dtype=str)
+            np.save(os.path.join(tmp, f"col{k}.npy"), arr)
+            columns.append({"name": name, "kind": kind})
+
+        keys = list(self.groups)
+        pos = [self.groups[k][1] for k in keys]
+        np.save(os.path.join(tmp, "group_pos.npy"),
+                np.concatenate(pos) if pos else np.zeros(0, dtype=np.int64))
+        np.save(os.path.join(tmp, "group_len.npy"), np.array([len(p) for p in pos], dtype=np.int64))
+        meta = {
+            "version": CACHE_VERSION,
+            "num_cols": self.num_cols,
+            "columns": columns,
+            "groups": [[f, sec] for f, sec in keys],
+        }
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp, cache_dir)
+
+    @classmethod
+    def load_cache(cls, cache_dir, path, mtime):
+        """save_cache() 결과를 mmap 으로 열기, 형식이 다르면 ValueError"""
+        with open(os.path.join(cache_dir, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != CACHE_VERSION:
+            raise ValueError("시나리오 캐시 버전이 다릅니다.")
+
+        def npy(name):
+            return np.load(os.path.join(cache_dir, name), mmap_mode="r")
+
+        self = cls.__new__(cls)
+        self.path = path
+        self.mtime = mtime
+        sod = npy("sod.npy")
+        self.index = TimeIndex(sod)
+        self.positions = np.arange(len(sod))
+        self.num_cols = meta["num_cols"]
+        self.values = npy("values.npy")
+
+        self._df = None
+        self._df_columns = [(c["name"], lambda k=k: np.asarray(npy(f"col{k}.npy")))
+                            for k, c in enumerate(meta["columns"])]
+
+        self.groups = {}
+        gpos, glen = np.asarray(npy("group_pos.npy")), npy("group_len.npy")
+        start = 0
+        for (floor, section), n in zip(meta["groups"], glen.tolist()):
+            pos = gpos[start:start + n]
+            start += n
+            self.groups[(int(floor), str(section))] = (TimeIndex(sod[pos]), pos)
+        return self
+
+    def _pick(self, index, positions, now, interpolate):
+        sec = _sec(now)
+        if not interpolate:
+            return self.df.iloc[positions[index.nearest(sec)]]
+        # 앞/뒤 두 행을 시간 비율로 섞은 행 (숫자 컬럼만 보간, 나머지는 가까운 행 값)
+        lo, hi, w = index.neighbors(sec)
+        lo, hi = positions[lo], positions[hi]
+        row = self.df.iloc[hi if w > 0.5 else lo].copy()
+        row[self.num_cols] = self.values[lo] * (1.0 - w) + self.values[hi] * w
+        return row
+
+    def _pick_values(self, index, positions, now, interpolate):
+        sec = _sec(now)
+        if not interpolate:
+            return self.values[positions[index.nearest(sec)]]
+        lo, hi, w = index.neighbors(sec)
+        return self.values[positions[lo]] * (1.0 - w) + self.values[positions[hi]] * w
+
+    def values_at(self, now: datetime, key=None, interpolate=False):
+        """num_cols 순서의 숫자 값 배열, key 그룹이 없으면 None"""
+        if key is None:
+            return self._pick_values(self.index, self.positions, now, interpolate)
+        grp = self.groups.get(key)
+        if grp is None:
+            return None
+        return self._pick_values(grp[0], grp[1], now, interpolate)
+
+    def row(self, now: datetime, interpolate=False):
+        return self._pick(self.index, self.positions, now, interpolate)
+
+    def group_row(self, key, now: datetime, interpolate=False):
+        """(floor, section) 그룹의 행, 기록된 데이터가 없으면 None"""
+        grp = self.groups.get(key)
+        if grp is None:
+            return None
+        return self._pick(grp[0], grp[1], now, interpolate)
+
+
+class ScenarioCache:
+    """이름(power/water/energy) → ScenarioData, mtime 변경 시에만 재로딩
+
+    stream=True 면 파일 전체를 읽지 않고 StreamScenarioData 로 순차 재생한다 (대용량 녹화 파일).
+    """
+
+    def __init__(self, paths: dict, interpolate=False, stream=False, chunk_rows=100_000, cache=False):
+        self.paths = dict(paths)
+        self.interpolate = interpolate
+        self.stream = stream
+        self.chunk_rows = chunk_rows
+        self.cache = cache
+        self.cache_errors = {}  # 이름 → 캐시 저장/열기 실패 사유 (CSV 로 계속 동작)
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _load(self, name):
+        path = self.paths[name]
+        mtime = os.path.getmtime(path)  # 파일 없으면 FileNotFoundError
+        cur = self._data.get(name)
+        if cur is not None and (cur.mtime == mtime or self.stream):
+            return cur  # 스트리밍은 재생 위치 유지를 위해 재로딩하지 않음
+        if self.stream:
+            data = StreamScenarioData(path, self.chunk_rows)
+            self._data[name] = data
+            return data
+        data = self._load_cached(name, path) if self.cache else None
+        if data is None:
+            df = pd.read_csv(path, parse_dates=['date'], dtype={'section': str})
+            data = ScenarioData(path, df, mtime)
+            if self.cache:
+                self._save_cached(name, path, data)
+        self._data[name] = data
+        return data
+
+    def _cache_dir(self, path):
+        st = os.stat(path)
+        root = os.path.join(os.path.dirname(path), CACHE_DIRNAME)
+        return root, os.path.join(root, f"{os.path.basename(path)}-{st.st_mtime_ns}-{st.st_size}")
+
+    def _load_cached(self, name, path):
+        _, cache_dir = self._cache_dir(path)
+        if not os.path.isdir(cache_dir):
+            return None
+        try:
+            return ScenarioData.load_cache(cache_dir, path, os.path.getmtime(path))
+        except Exception as e:
+            self.cache_errors[name] = e
+            return None
+
+    def _save_cached(self, name, path, data):
+        root, cache_dir = self._cache_dir(path)
+        try:
+            os.makedirs(root, exist_ok=True)
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            data.save_cache(cache_dir)
+        except Exception as e:
+            self.cache_errors[name] = e
+            return
+        # 이전 CSV 의 캐시 정리 (mmap 으로 열려 있으면 Windows 에서 지워지지 않으므로 실패는 무시)
+        prefix = os.path.basename(path) + "-"
+        for entry in os.listdir(root):
+            full = os.path.join(root, entry)
+            if entry.startswith(prefix) and full != cache_dir:
+                shutil.rmtree(full, ignore_errors=True)
+
+    def get(self, name) -> ScenarioData:
+        with self._lock:
+            return self._load(name)
+
+    def preload(self):
+        """시작 시 전체 로딩, 실패한 이름과 사유를 dict로 반환"""
+        errors = {}
+        for name in self.paths:
+            try:
+                self.get(name)
+            except Exception as e:
+                errors[name] = e
+        return errors
+
+    def row(self, name, now=None):
+        """find_nearest_time_row 와 같은 (row, now) 반환, interpolate=True면 보간 행"""
+        if now is None:
+            now = datetime.now().replace(microsecond=0)
+        return self.get(name).row(now, self.interpolate), now
+
+    def group_row(self, name, key, now):
+        """key=(floor, section/ID)의 기록 행, 없으면 None (→ 호출 측에서 bias 스케일링)"""
+        return self.get(name).group_row(key, now, self.interpolate)
@@ -0,0 +1,165 @@
+import os
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa          # 선택: 설치되어 있으면 pyarrow CSV 스트리밍 리더 사용
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = pa_csv = None
+
+
+# 대용량 시나리오 스트리밍 재생
+# 수 GB / 수 주 분량 녹화 파일은 전부 메모리에 올릴 수 없으므로,
+# 앞에서부터 chunk_rows 행씩 읽으면서 "현재 재생 시각까지의 (floor, section) 별 마지막 행"만 유지한다.
+# 메모리 = 청크 1개 + 그룹별 최신 행 → 파일 크기와 무관.
+#
+# - 파일은 date 순으로 기록되어 있어야 한다 (녹화 파일 형식).
+# - 재생 시각 = 첫 조회 시각을 녹화 시작에 맞춘 뒤 실제 시간 그대로 진행, 끝나면 처음부터 반복.
+# - 자료형: section=category, floor=int8, 측정값=float32
+#   단 누적 컬럼(*_sum_data, active_electric_energy, today_value)은 녹화 중 계속 커지므로 항상 float64,
+#   그 밖에 float32 로 값이 바뀌는 컬럼(유효숫자 7자리 초과)도 앞부분 표본을 보고 float64 유지.
+# - 보간(SCENARIO_INTERPOLATE)은 사용하지 않고 재생 시각 이전의 마지막 행을 쓴다.
+
+SAMPLE_ROWS = 1000
+# pyarrow 리더는 블록 여러 개를 미리 읽어두므로 블록을 작게 유지 (1MB 블록 → 약 36MB 상한)
+PA_BLOCK_BYTES = 1 << 20
+# 단조 증가하는 누적 컬럼: 앞부분이 float32 에 맞아도 뒤에서 유효숫자가 넘치므로 표본 검사 없이 float64
+CUMULATIVE_COLS = ("active_electric_energy", "today_value")
+CUMULATIVE_SUFFIX = "_sum_data"
+
+
+def _is_cumulative(col):
+    return col in CUMULATIVE_COLS or col.endswith(CUMULATIVE_SUFFIX)
+
+
+def _fits_float32(values):
+    """float32 로 저장했다가 최단 표기로 되돌려도 값이 같은지"""
+    v = values[np.isfinite(values)]
+    return bool(np.array_equal(v.astype(np.float32).astype(str).astype(np.float64), v))
+
+
+class StreamScenarioData:
+    """ScenarioData 와 같은 values_at()/num_cols 를 제공하는 순차 재생 소스"""
+
+    def __init__(self, path, chunk_rows=100_000):
+        self.path = path
+        self.mtime = os.path.getmtime(path)  # 파일 없으면 FileNotFoundError
+        self.chunk_rows = max(1, int(chunk_rows))
+
+        head = pd.read_csv(path, nrows=SAMPLE_ROWS, encoding="utf-8-sig", dtype={'section': str})
+        self.grouped = 'floor' in head.columns and 'section' in head.columns
+        self.num_cols = [c for c in head.columns
+                         if c not in ('id', 'date', 'floor', 'section') and pd.api.types.is_numeric_dtype(head[c])]
+        self.f32 = {c for c in self.num_cols
+                    if not _is_cumulative(c) and _fits_float32(head[c].to_numpy(np.float64))}
+        self.usecols = ['date'] + (['floor', 'section'] if self.grouped else []) + self.num_cols
+
+        self._lock = threading.Lock()
+        self._reader = None
+        self._chunk = None        # (시각 ns 배열, 그룹 키 배열, 그룹 키 → (floor, section), 컬럼 배열 목록)
+        self._pos = 0
+        self.offset = None        # 녹화 시각(ns) - 실제 시각(ns)
+        self.latest = {}          # (floor, section) → float64 값 배열
+        self.latest_any = None
+        self.rows_read = 0
+        self.loops = 0
+
+    # ---- 청크 읽기 ----
+    def _chunks(self):
+        if pa_csv is not None:
+            types = {c: (pa.float32() if c in self.f32 else pa.float64()) for c in self.num_cols}
+            if self.grouped:
+                types.update(floor=pa.int8(), section=pa.dictionary(pa.int32(), pa.string()))
+            types['date'] = pa.timestamp('us')
+            reader = pa_csv.open_csv(
+                self.path,
+                read_options=pa_csv.ReadOptions(block_size=PA_BLOCK_BYTES, encoding="utf-8-sig",
+                                                use_threads=False),
+                convert_options=pa_csv.ConvertOptions(include_columns=self.usecols, column_types=types))
+            for batch in reader:
+                yield batch.to_pandas()
+            return
+        dtypes = {c: (np.float32 if c in self.f32 else np.float64) for c in self.num_cols}
+        if self.grouped:
+            dtypes.update(floor=np.int8, section='category')
+        yield from pd.read_csv(self.path, chunksize=self.chunk_rows, usecols=self.usecols, dtype=dtypes,
+                               parse_dates=['date'], encoding="utf-8-sig")
+
+    def _next_chunk(self):
+        """다음 청크를 배열로, 파일 끝이면 False"""
+        if self._reader is None:
+            self._reader = self._chunks()
+        df = next(self._reader, None)
+        if df is None:
+            self._reader = None
+            return False
+        times = df['date'].to_numpy('datetime64[ns]').astype(np.int64)
+        if self.grouped:
+            sec = df['section'].astype('category')
+            codes = sec.cat.codes.to_numpy(np.int64)
+            gid = (df['floor'].to_numpy(np.int64) << 32) | codes  # (floor, section 코드) → 정수 키
+            cats = sec.cat.categories
+            names = {g: (int(g >> 32), str(cats[g & 0xFFFFFFFF])) for g in np.unique(gid).tolist()}
+        else:
+            gid, names = None, None
+        cols = [df[c].to_numpy() for c in self.num_cols]
+        self._chunk = (times, gid, names, cols)
+        self._pos = 0
+        self.rows_read += len(df)
+        return True
+
+    def _row_values(self, cols, p):
+        # float32 는 최단 표기로 되돌려 CSV 원래 값 유지
+        return np.array([float(str(a[p])) if a.dtype == np.float32 else float(a[p]) for a in cols])
+
+    def _apply(self, start, end):
+        """청크의 [start, end) 행을 반영 (그룹마다 마지막 행만)"""
+        times, gid, names, cols = self._chunk
+        self.latest_any = self._row_values(cols, end - 1)
+        if gid is None:
+            return
+        rev = gid[start:end][::-1]
+        uniq, first = np.unique(rev, return_index=True)
+        for g, k in zip(uniq.tolist(), first.tolist()):
+            self.latest[names[g]] = self._row_values(cols, end - 1 - k)
+
+    def _advance(self, now_ns):
+        if self.offset is None:
+            if self._chunk is None and not self._next_chunk():
+                raise ValueError("시나리오 데이터가 비어 있습니다.")
+            self.offset = int(self._chunk[0][0]) - now_ns
+        target = now_ns + self.offset
+        while True:
+            if self._chunk is None and not self._next_chunk():
+                # 녹화 끝 → 처음부터 다시 재생 (현재 시각을 녹화 시작에 맞춤)
+                self.loops += 1
+                if not self._next_chunk():
+                    return
+                self.offset = int(self._chunk[0][0]) - now_ns
+                target = now_ns + self.offset
+            times = self._chunk[0]
+            end = int(np.searchsorted(times, target, side='right'))
+            if end > self._pos:
+                self._apply(self._pos, end)
+                self._pos = end
+            if end < len(times):
+                return
+            self._chunk = None
+
+    def values_at(self, now: datetime, key=None, interpolate=False):
+        """재생 시각까지의 마지막 값 (num_cols 순서), key 그룹이 아직 없으면 None"""
+        with self._lock:
+            self._advance(int(np.datetime64(now, 'ns').astype(np.int64)))
+            if key is None:
+                return self.latest_any
+            return self.latest.get(key)
+
+    def replay_time(self, now: datetime):
+        """now 에 대응하는 녹화 시각"""
+        if self.offset is None:
+            return None
+        return pd.Timestamp(int(np.datetime64(now, 'ns').astype(np.int64)) + self.offset).to_pydatetime()
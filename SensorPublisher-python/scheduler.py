@@ -0,0 +1,169 @@
+import heapq
+import itertools
+import threading
+import time
+
+
+# 주기 작업 스케줄러
+# 탭/기본 워커마다 "작업 → sleep(period)" 스레드를 두면 작업 시간과 sleep 오차만큼
+# 주기가 계속 밀린다. 여기서는 스레드 하나가 monotonic_ns 기준 마감 시각(deadline)을
+# 힙으로 관리하며 모든 작업을 구동한다. 다음 마감 = 이전 마감 + 주기 이므로 누적 오차가 없다.
+#
+# 늦었을 때 정책
+#   skip    : 밀린 틱은 버리고 다음 미래 마감으로 이동 (기본값)
+#   catchup : 밀린 틱을 연달아 실행해서 따라잡음
+
+POLICIES = ("skip", "catchup")
+
+
+class TickJob:
+    def __init__(self, name, period_ms, fn):
+        self.name = name
+        self.period_ns = max(1, int(period_ms * 1_000_000))
+        self.fn = fn
+        self.active = True
+        self.due = 0
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.ticks = 0
+        self.overruns = 0     # 실행 시간이 주기보다 길었던 횟수
+        self.skipped = 0      # skip 정책으로 버린 틱 수
+        self.late_sum_ns = 0
+        self.late_max_ns = 0
+
+    def stats(self, reset=False):
+        ticks = self.ticks
+        out = {
+            "name": self.name,
+            "ticks": ticks,
+            "overruns": self.overruns,
+            "skipped": self.skipped,
+            "late_avg_ms": (self.late_sum_ns / ticks / 1e6) if ticks else 0.0,
+            "late_max_ms": self.late_max_ns / 1e6,
+        }
+        if reset:
+            self._reset_stats()
+        return out
+
+
+class TickScheduler:
+    def __init__(self, policy="skip", on_error=None, on_tick=None):
+        if policy not in POLICIES:
+            raise ValueError(f"스케줄러 정책은 {POLICIES} 중 하나여야 합니다: '{policy}'")
+        self.policy = policy
+        self.on_error = on_error
+        self.on_tick = on_tick  # (job, 실행 시간 초) → 지표 수집용
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._jobs = []
+        self._thread = None
+        self._stop = False
+        self._running = None  # 지금 fn 을 실행 중인 작업 (remove 가 끝나길 기다림)
+
+    def add(self, name, period_ms, fn, start_now=True):
+        """주기 작업 등록, 반환된 job 으로 remove()"""
+        job = TickJob(name, period_ms, fn)
+        now = time.monotonic_ns()
+        job.due = now if start_now else now + job.period_ns
+        with self._cond:
+            self._jobs.append(job)
+            heapq.heappush(self._heap, (job.due, next(self._seq), job))
+            self._cond.notify()
+        self.start()
+        return job
+
+    def remove(self, job):
+        """작업 해제, 그 작업의 틱이 실행 중이면 끝날 때까지 대기 (작업 안에서 호출하면 바로 반환)"""
+        if job is None:
+            return
+        with self._cond:
+            job.active = False
+            if job in self._jobs:
+                self._jobs.remove(job)
+            self._cond.notify_all()
+            if not self.in_scheduler_thread():
+                while self._running is job:
+                    self._cond.wait()
+
+    def in_scheduler_thread(self):
+        """지금 스케줄러 스레드(작업 실행 중)에서 호출됐는지"""
+        return self._thread is threading.current_thread()
+
+    def jobs(self):
+        with self._cond:
+            return list(self._jobs)
+
+    def stats(self, reset=False):
+        return [job.stats(reset) for job in self.jobs()]
+
+    def start(self):
+        with self._cond:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop = False
+            self._thread = threading.Thread(target=self._run, name="tick-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+        if self._thread and self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self._thread = None
+
+    def _next_job(self):
+        """가장 이른 마감의 작업을 마감 시각까지 기다렸다가 반환, 중지 시 None"""
+        with self._cond:
+            while not self._stop:
+                while self._heap and not self._heap[0][2].active:
+                    heapq.heappop(self._heap)
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                due, _, job = self._heap[0]
+                wait_ns = due - time.monotonic_ns()
+                if wait_ns <= 0:
+                    heapq.heappop(self._heap)
+                    self._running = job
+                    return job
+                self._cond.wait(wait_ns / 1e9)
+            return None
+
+    def _run(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+
+            start = time.monotonic_ns()
+            late = start - job.due
+            job.ticks += 1
+            job.late_sum_ns += late
+            job.late_max_ns = max(job.late_max_ns, late)
+            try:
+                job.fn()
+            except Exception as e:
+                if self.on_error:
+                    self.on_error(job, e)
+            finally:
+                with self._cond:
+                    self._running = None
+                    self._cond.notify_all()
+            end = time.monotonic_ns()
+            if self.on_tick:
+                self.on_tick(job, (end - start) / 1e9)
+
+            nxt = job.due + job.period_ns
+            if end > nxt:
+                job.overruns += 1
+                if self.policy == "skip":
+                    missed = (end - nxt) // job.period_ns + 1
+                    job.skipped += missed
+                    nxt += missed * job.period_ns
+            job.due = nxt
+            with self._cond:
+                if job.active:
+                    heapq.heappush(self._heap, (job.due, next(self._seq), job))
@@ -1 +1,845 @@
-import paho.mqtt.client as mqtt
\ No newline at end of file
+import argparse
+import multiprocessing as mp
+import signal
+import threading
+import time
+from datetime import datetime
+
+import os
+import numpy as np
+import paho.mqtt.client as mqtt
+
+# user modules
+from defFunc import now_txt, load_env_vars, exe_dir, \
+    POWER_CSV, WATER_CSV, ENERGY_CSV, CONFIG_ENV, DATA_DIR
+from scenario import ScenarioCache
+from fleet import DTYPES, FleetSpec, load_fleet_spec, topic_dtype
+from generator import BatchGenerator
+from encoder import BATCH_ENCODERS, dumps
+from scheduler import TickScheduler
+from mqtt_pool import MqttPool, PublishStats, connect_client, create_mqtt_client, publish_accepted
+from metrics import Metrics, MetricsServer
+from ratelimit import Backlog, RateLimiter
+from spool import OfflineSpool
+from registry import SensorRegistry
+
+# GUI(main.py)와 헤드리스 실행(python -m sensor_mqtt)이 같이 쓰는 발행 엔진
+# 이 모듈은 tkinter/ttkbootstrap 을 import 하지 않는다.
+
+sensor_dict = {
+    "F1": {"power": ["A", "B"], "water": ["A"], "energy": ['1209', '1221', '1225', '1128']},
+    "F2": {"power": ["A", "B"], "water": ["A"], "energy": ['2210', '2221']},
+    "F3": {"power": ["A", "B"], "water": ["A"], "energy": ['3203', '3208', '3210', '3120']},
+    "F4": {"power": ["A", "B"], "water": ["A"], "energy": ['4204', '4218']},
+    "F5": {"power": ["A", "B"], "water": ["A"], "energy": []},
+    "F6": {"power": ["A", "B"], "water": ["A"], "energy": ['6203', '6210', '6221', '6225']},
+    "F7": {"power": ["A", "B"], "water": ["A"], "energy": ['7208', '7210', '7117', '7122', '7221', '7225']},
+    "F8": {"power": ["A", "B"], "water": ["A"], "energy": ['8206', '8221', '8123', '8128']},
+    "F9": {"power": ["A", "B"], "water": ["A"], "energy": ['9210', '9221']},
+    "F10": {"power": ["A", "B"], "water": ["A"], "energy": ['10206', '10210', '10114', '10117', '10221', '10225']}
+}
+
+FLOORS = [f"F{i}" for i in range(1, 11)]
+LIMIT_FLUSH_MS = 20  # 속도 제한으로 미룬 메시지를 꺼내 보내는 주기
+
+
+def to_bool(s: str) -> bool:
+    return str(s).lower() in ("1","true","yes","y","on")
+
+
+# -------------------- 수동 입력 payload --------------------
+def manual_power_payload(floor, section, vals):
+    return {
+        "date": now_txt(),
+        "floor": int(floor),
+        "section": section,
+        # 수동 UI 스펙에 맞춰 최소 필드만 전송
+        "active_electric_energy": float(vals["total_active_power"]),
+        "total_active_power": float(vals["total_active_power"]),
+        # 필요시 0/고정값 유지
+        "total_reactive_power": 0,
+        "total_apparent_power": 0,
+        "total_power_factor": 0,
+        "temp": 0,
+        "humi": 0,
+    }
+
+def manual_water_payload(floor, vals):
+    return {
+        "date": now_txt(),
+        "floor": int(floor),
+        "section": "A",
+        "inst_flow": float(vals["inst_flow"]),
+        # 누적/감산류는 수동 UI에서 미사용 → 0으로 고정
+        "neg_dec_data": 0,
+        "neg_sum_data": 0,
+        "pos_dec_data": 0,
+        "pos_sum_data": 0,
+        "plain_dec_data": 0,
+        "plain_sum_data": 0,
+        "today_value": 0,
+    }
+
+def manual_energy_payload(floor, energy_id, vals):
+    return {
+        "date": now_txt(),
+        "floor": int(floor),
+        "section": energy_id,
+        # 수동 UI 스펙에 맞춰 정수/스케일 그대로 적용
+        "co2": int(vals["co2"]),
+        "temperature": int(float(vals["temp"]) * 10),
+        "humidity": int(float(vals["humi"]) * 10),
+        "pm1_0": 0,
+        "pm2_5": 0,
+        "pm10": 0,
+        "voc": 0,
+        "tempimage" : 0,
+        "errcode" : 123456,
+    }
+
+def manual_topic(base, dtype, key):
+    if dtype == 'water':
+        return f"{base}/water/F{key[0]}"
+    return f"{base}/{dtype}/F{key[0]}/{key[1]}"
+
+def manual_payload(dtype, key, vals):
+    if dtype == 'power':
+        return manual_power_payload(key[0], key[1], vals)
+    if dtype == 'water':
+        return manual_water_payload(key[0], vals)
+    return manual_energy_payload(key[0], key[1], vals)
+
+
+# -------------------- 발행 엔진 --------------------
+class SensorPublisher:
+    """MQTT 연결 + CSV 기본 발행 워커 + 수동 입력(override) 관리"""
+
+    def __init__(self, env=None, connect=True, stream=None):
+        self.env = load_env_vars(CONFIG_ENV) if env is None else env
+        # MQTT 설정
+        self.mqtt_base = self.env.get("MQTT_BASE_TOPIC", "lemon/sensors").rstrip("/")
+        self.mqtt_qos = int(self.env.get("MQTT_QOS", "0"))
+        self.mqtt_retain = to_bool(self.env.get("MQTT_RETAIN", "false"))
+        self.stats = PublishStats()
+        self.tick_log = True  # 틱마다 "N건 발행" 로그 출력 여부
+
+        # 출력 대상: mqtt / db(Postgres 직접 적재) / both
+        sink = self.env.get("DATA_SINK", "mqtt") or "mqtt"
+        if sink not in ("mqtt", "db", "both"):
+            raise ValueError(f"DATA_SINK 는 mqtt/db/both 중 하나여야 합니다: '{sink}'")
+        self.sink_mqtt = sink in ("mqtt", "both")
+        self.db_sink = None
+        if sink in ("db", "both"):
+            from db_sink import DbSink  # psycopg2 는 DB 싱크를 쓸 때만 필요
+            self.db_sink = DbSink(
+                self.env,
+                batch_rows=int(self.env.get("DB_BATCH_ROWS", "5000") or 5000),
+                batch_ms=int(self.env.get("DB_BATCH_MS", "1000") or 1000),
+                log=self.log_async,
+            )
+
+        # CSV는 시작 시 한 번만 파싱, 이후 파일이 바뀐 경우에만 재로딩
+        self.scenario = ScenarioCache({
+            'power': POWER_CSV,
+            'water': WATER_CSV,
+            'energy': ENERGY_CSV,
+        }, interpolate=to_bool(self.env.get("SCENARIO_INTERPOLATE", "false")),
+            stream=to_bool(self.env.get("SCENARIO_STREAM", "false")),
+            chunk_rows=int(self.env.get("SCENARIO_CHUNK_ROWS", "100000") or 100000),
+            cache=to_bool(self.env.get("SCENARIO_CACHE", "true")))
+
+        # 플릿 스펙(FLEET_SPEC)이 있으면 가상 센서 전체, 없으면 sensor_dict 단일 건물
+        fleet_path = self.env.get("FLEET_SPEC", "")
+        if fleet_path:
+            if not os.path.isabs(fleet_path):
+                fleet_path = os.path.join(exe_dir(), fleet_path)
+            self.fleet = load_fleet_spec(fleet_path, self.mqtt_base)
+        else:
+            self.fleet = FleetSpec.from_sensor_dict(sensor_dict, self.mqtt_base)
+        self.fleet_mode = bool(fleet_path)
+        # 기본 발행 허용/수동 입력 상태 (키 튜플 (floor, section)/(floor,) → 조밀 인덱스 + bool 마스크)
+        # 단일 건물은 선택한 키만, 플릿은 처음부터 전체 허용
+        self.registry = SensorRegistry(self.fleet, select_all=self.fleet_mode)
+        self._topic_dtypes = {t: dtype for dtype in DTYPES for t in self.fleet.keys[dtype].topics}
+
+        # 전체/종류별 발행 속도 제한 (RATE_LIMIT, RATE_LIMIT_DTYPES), 설정 없으면 None
+        self.limiter = RateLimiter.from_env(self.env)
+        # wait 모드에서 스케줄러 스레드 발행분은 대기 대신 종류별로 미뤘다가 발행
+        self.limit_backlog = Backlog(self.limiter) if self.limiter is not None and self.limiter.mode == "wait" else None
+        self._limit_job = None
+
+        # 지표 (METRICS_PORT > 0 일 때만 수집 + /metrics 서버)
+        self.metrics = None
+        self.metrics_server = None
+        self._acks = None
+        metrics_port = int(self.env.get("METRICS_PORT", "0") or 0)
+        if metrics_port > 0:
+            self._init_metrics(metrics_port)
+        if self.limiter is not None:
+            self.log(f"[속도 제한] 전체 {self.limiter.total.rate if self.limiter.total else '-'} msg/s, "
+                     f"종류별 {({d: b.rate for d, b in self.limiter.buckets.items()})}, "
+                     f"버스트 {self.limiter.burst_sec}s, {self.limiter.mode}")
+        seed = self.env.get("RANDOM_SEED", "")
+        seed = int(seed) if seed else None
+        if seed is not None and stream is not None:
+            # 멀티 프로세스 워커: (시드, 워커 번호) 로 워커마다 다른 난수열 (같은 시드면 재현은 유지)
+            seed = [seed, int(stream)]
+        self.batch = BatchGenerator(self.fleet, self.scenario, seed=seed,
+                                    model=self.env.get("GEN_MODEL", "state") or "state")
+
+        # ✅ MQTT 연결 (connect=False 면 발행 경로를 호출 측에서 따로 구성 - aio_engine 등)
+        self.mqtt = None
+        self.probe = None
+        # 브로커 장애 동안 발행분을 디스크에 모았다가 재연결 후 재전송 (SPOOL_ENABLE)
+        self.spool = None
+        self._spool_stop = threading.Event()
+        self._spool_thread = None
+        if connect and self.sink_mqtt:
+            if to_bool(self.env.get("SPOOL_ENABLE", "false")):
+                if self.env.get("MQTT_POOL_MODE", "thread") == "process":
+                    # 연결별 프로세스는 부모 쪽에서 연결 상태를 알 수 없어 끊긴 동안에도 스풀로 빠지지 않음
+                    self.log("[스풀] MQTT_POOL_MODE=process 에서는 지원하지 않음 → SPOOL_ENABLE 무시")
+                else:
+                    self._init_spool()
+            self._init_mqtt()
+            self.start_probe()
+        if self.fleet_mode:
+            self.log(f"[플릿] {self.fleet.summary()}")
+
+        for name, e in self.scenario.preload().items():
+            self.log(f"[시나리오 로딩 실패] {name}: {e}")
+        for name, e in self.scenario.cache_errors.items():
+            self.log(f"[시나리오 캐시 사용 안 함] {name}: {e}")
+
+        # 기본 워커/수동 발행 모두 스케줄러 스레드 하나에서 주기 실행
+        self.scheduler = TickScheduler(
+            self.env.get("SCHEDULER_POLICY", "skip"),
+            on_error=lambda job, e: self.log_async(f"[{job.name} 오류] {e}"),
+            on_tick=None if self.metrics is None else (lambda job, sec: self.metrics.tick(job.name, sec)),
+        )
+        self.default_job = None
+
+    # 허용 목록 교체/추가/초기화 도우미
+    def replace_default_select(self, dtype, keys):
+        self.registry.set_selected(dtype, keys)
+
+    def add_default_select(self, dtype, keys):
+        self.registry.add_selected(dtype, keys)
+
+    def clear_default_select(self, dtype):
+        self.registry.clear_selected(dtype)
+
+    # 허용 체크 도우미
+    def _is_allowed(self, dtype, key_tuple):
+        return self.registry.is_selected(dtype, key_tuple)
+
+    def _init_metrics(self, port):
+        self.metrics = Metrics(topic_depth=int(self.env.get("METRICS_TOPIC_DEPTH", "3") or 3))
+        for dtype in DTYPES:
+            self.metrics.register_topics(dtype, self.fleet.keys[dtype].topics)
+        if self.db_sink is not None:
+            sink = self.db_sink
+            self.metrics.add_collector(lambda: [
+                ("sensorpub_db_rows_total", "counter", "Rows written by the DB sink.", sink.rows),
+                ("sensorpub_db_failed_rows_total", "counter", "Rows the DB sink failed to write.", sink.failed),
+            ])
+        if self.limiter is not None:
+            self.metrics.add_collector(self.limiter.metric_values)
+        host = self.env.get("METRICS_HOST", "127.0.0.1") or "127.0.0.1"
+        try:
+            self.metrics_server = MetricsServer(self.metrics, host, port)
+            self.log(f"[지표] http://{host}:{port}/metrics")
+        except OSError as e:
+            self.log(f"[지표] 서버 시작 실패 ({host}:{port}): {e}")
+
+    def topic_dtype(self, topic):
+        """토픽 → 데이터 종류 (플릿 토픽은 미리 계산, 그 밖은 경로에서 찾아 캐시)"""
+        dtype = self._topic_dtypes.get(topic)
+        if dtype is None:
+            dtype = self._topic_dtypes[topic] = topic_dtype(topic)
+        return dtype
+
+    def start_probe(self):
+        """PROBE=true 면 종단간 지연 측정 시작 (발행하는 쪽에서 한 번)"""
+        if self.probe is not None or not to_bool(self.env.get("PROBE", "false")):
+            return
+        from probe import LatencyProbe
+        self.probe = LatencyProbe(
+            self.env, self.mqtt_base, dict(self._topic_dtypes),
+            sample=float(self.env.get("PROBE_SAMPLE", "1") or 1),
+            grace_sec=float(self.env.get("PROBE_GRACE_SEC", "5") or 5),
+            qos=self.mqtt_qos, log=self.log, metrics=self.metrics)
+
+    def _init_spool(self):
+        path = self.env.get("SPOOL_DIR", "") or os.path.join(DATA_DIR, ".spool")
+        if not os.path.isabs(path):
+            path = os.path.join(exe_dir(), path)
+        mb = 1 << 20
+        self.spool = OfflineSpool(
+            path,
+            max_bytes=float(self.env.get("SPOOL_MAX_MB", "1024") or 1024) * mb,
+            segment_bytes=float(self.env.get("SPOOL_SEGMENT_MB", "16") or 16) * mb,
+            policy=self.env.get("SPOOL_POLICY", "drop_oldest") or "drop_oldest",
+            log=self.log_async)
+        self.spool_rate = max(1.0, float(self.env.get("SPOOL_REPLAY_RATE", "1000") or 1000))
+        if self.metrics is not None:
+            self.metrics.add_collector(self.spool.metric_values)
+        self._spool_thread = threading.Thread(target=self._spool_replay_loop, name="spool-replay", daemon=True)
+        self._spool_thread.start()
+        self.log(f"[스풀] {path} (상한 {self.spool.max_segments * self.spool.segment_bytes // mb}MB, "
+                 f"{self.spool.policy}, 재전송 {self.spool_rate:.0f} msg/s)")
+
+    def _mqtt_connected(self, topic=None):
+        """topic 을 보낼 연결(없으면 전체)이 브로커에 붙어 있는지"""
+        if isinstance(self.mqtt, MqttPool):
+            return self.mqtt.is_connected(topic)
+        return self.mqtt is not None and self.mqtt.online.is_set()
+
+    def _spool_replay_loop(self):
+        """재연결되면 스풀에 쌓인 메시지를 오래된 것부터 SPOOL_REPLAY_RATE msg/s 로 재전송"""
+        step = 0.1
+        n = max(1, int(self.spool_rate * step))
+        replaying = False
+        while not self._spool_stop.wait(step):
+            spool = self.spool
+            if spool is None:
+                break
+            if not spool.pending:
+                if replaying:
+                    replaying = False
+                    self.log_async(f"[스풀] 재전송 완료 (누적 {spool.replayed}건)")
+                continue
+            if not self._mqtt_connected():
+                continue
+            if not replaying:
+                replaying = True
+                self.log_async(f"[스풀] 재연결: {spool.pending}건 재전송 시작")
+            # 재전송 중 다시 끊기면 _mqtt_publish_raw 가 남은 메시지를 스풀 끝에 다시 넣는다
+            for topic, data in spool.pop(n):
+                self._mqtt_publish_raw(topic, data)
+
+    # mqtt 연결 및 데이터 발행
+    def _init_mqtt(self):
+        size = int(self.env.get("MQTT_POOL_SIZE", "1") or 1)
+        mode = self.env.get("MQTT_POOL_MODE", "thread")
+        if size > 1 or mode == "process":
+            # 연결 N개, 토픽 해시로 연결 고정 (self.mqtt 는 paho Client 와 같은 방식으로 사용)
+            self.mqtt = MqttPool(self.env, size, mode, self.mqtt_qos, self.mqtt_retain, log=self.log,
+                                 metrics=self.metrics)
+            self.log(f"[MQTT] 연결 풀 {self.mqtt.size}개 ({mode})")
+            return
+        self.mqtt = create_mqtt_client(self.env, log=self.log)
+        if self.metrics is not None and self.mqtt_qos > 0:
+            self._acks = self.metrics.track_acks(self.mqtt)
+        # 시작 시 브로커가 없어도 백그라운드 루프가 재연결 (오프라인 스풀 재전송도 이 재연결에 의존)
+        connect_client(self.mqtt, self.env, self.log)
+
+    def _mqtt_publish(self, topic: str, payload: dict):
+        """스레드 어디서 호출해도 안전하게 발행"""
+        try:
+            data = dumps(payload)
+        except Exception as e:
+            self.stats.error()
+            if self.metrics is not None:
+                self.metrics.error(topic)
+            self.log(f"[MQTT] publish error: {e}")
+            return
+        self._mqtt_publish_raw(topic, data)
+
+    def _mqtt_publish_raw(self, topic: str, data: bytes):
+        """이미 인코딩된 payload 발행, paho 에 넘겼으면 MQTTMessageInfo (스풀/버림/오류면 None)"""
+        spool = self.spool
+        if spool is not None and not self._mqtt_connected(topic):
+            spool.append(topic, data)  # 끊긴 동안은 디스크로 (재연결 후 재전송)
+            return
+        if self.limiter is not None:
+            dtype = self.topic_dtype(topic)
+            if self.limit_backlog is not None and self.scheduler.in_scheduler_thread():
+                # 스케줄러 스레드는 다른 작업(다른 종류/탭)과 공유하므로 잠들지 않고 미룸
+                if not self.limit_backlog.offer(dtype, topic, data):
+                    if self._limit_job is None:
+                        self._limit_job = self.scheduler.add("rate-limit", LIMIT_FLUSH_MS, self._flush_backlog)
+                    return None
+            else:
+                wait = self.limiter.reserve(dtype)
+                if wait is None:
+                    return  # drop 모드: 예산 초과분 버림
+                if wait > 0:
+                    time.sleep(wait)  # 백필/부하 프로파일/스풀 재전송은 자기 스레드라 대기
+        return self._mqtt_send(topic, data)
+
+    def _flush_backlog(self):
+        """속도 제한으로 미룬 메시지를 토큰이 생긴 만큼 발행 (스케줄러 작업)"""
+        for topic, data in self.limit_backlog.take():
+            if self.spool is not None and not self._mqtt_connected(topic):
+                self.spool.append(topic, data)
+                continue
+            self._mqtt_send(topic, data)
+
+    def _mqtt_send(self, topic: str, data: bytes):
+        """속도 제한을 통과한 메시지를 paho 로"""
+        spool = self.spool
+        metrics = self.metrics
+        raw = data
+        if self.probe is not None:
+            data = self.probe.stamp(topic, data)
+        try:
+            t0 = time.perf_counter()
+            info = self.mqtt.publish(topic, data, qos=self.mqtt_qos, retain=self.mqtt_retain)
+            if spool is not None and info is not None and info.rc == mqtt.MQTT_ERR_NO_CONN and self.mqtt_qos == 0:
+                # 확인 직후 끊김: QoS0 는 paho 가 버리므로 스풀로 (QoS>0 은 paho 가 재연결 후 재전송)
+                spool.append(topic, raw)
+                return
+            if info is not None and not publish_accepted(info, self.mqtt_qos):
+                # 끊김(QoS0)/큐 상한 등으로 paho 가 버린 메시지는 발행 수가 아니라 오류로
+                self.stats.error()
+                if metrics is not None:
+                    metrics.error(topic)
+                return None
+            self.stats.add(len(data))
+            if metrics is not None:
+                metrics.published(topic, len(data), time.perf_counter() - t0)
+                if self._acks is not None:
+                    self._acks.sent(info.mid)
+            return info
+        except Exception as e:
+            self.stats.error()
+            if metrics is not None:
+                metrics.error(topic)
+            self.log(f"[MQTT] publish error: {e}")
+
+    def publish_payload(self, dtype, topic: str, payload: dict):
+        """payload 하나를 설정된 출력(MQTT 및/또는 DB)으로"""
+        if self.sink_mqtt:
+            self._mqtt_publish(topic, payload)
+        if self.db_sink is not None:
+            self.db_sink.put_payloads(dtype, [payload])
+
+    # 수동 탭에서 시작/중지 시 호출
+    # 수동 발행은 기존 단일 건물 토픽으로 나가므로 플릿 모드에서는 기본 발행에서 빼지 않는다.
+    def register_override(self, dtype, keys):
+        if not self.fleet_mode:
+            self.registry.set_override(dtype, keys, True)
+
+    def unregister_override(self, dtype, keys):
+        if not self.fleet_mode:
+            self.registry.set_override(dtype, keys, False)
+
+    def set_partition(self, index, count):
+        """키 공간을 count 등분한 것 중 index 번째만 기본 발행 (종류별 연속 구간)"""
+        for dtype in DTYPES:
+            n = len(self.fleet.keys[dtype])
+            self.registry.set_partition(dtype, np.array_split(np.arange(n, dtype=np.intp), count)[index])
+
+    def _active_idx(self, dtype):
+        """기본 발행 대상 키 인덱스 (허용 & 수동 입력 중 아님 & 맡은 구간), None=전체"""
+        return self.registry.active(dtype)
+
+    def default_messages(self, now=None):
+        """기본 발행 메시지 (topic, bytes) 이터레이터
+
+        데이터 종류별로 대상 키 값을 한 번에 만들고 인코딩한다.
+        플릿 모드에서는 기본 발행 선택/수동 입력 제외 없이 전체 키를 발행한다.
+        """
+        if now is None:
+            now = datetime.now().replace(microsecond=0)
+        for dtype in DTYPES:
+            keys = self.fleet.keys[dtype]
+            try:
+                idx = self._active_idx(dtype)
+                if not len(keys) or (idx is not None and not len(idx)):
+                    continue
+                cols = self.batch.generate(dtype, now, idx)
+                date = now_txt()
+                if self.db_sink is not None:
+                    self.db_sink.put_columns(dtype, date, keys, cols, idx)
+                    self.log_tick(f"[{now}] {dtype.upper()} DB {len(keys) if idx is None else len(idx)}건 적재 요청")
+                if not self.sink_mqtt:
+                    continue
+                count = 0
+                for msg in BATCH_ENCODERS[dtype].encode(keys, cols, date, idx):
+                    yield msg
+                    count += 1
+                if count:
+                    self.log_tick(f"[{now}] {dtype.upper()} MQTT {count}건 발행")
+            except Exception as e:
+                self.log(f"[{dtype.upper()} 기본 생성 실패] {e}")
+
+    def make_default_data(self):
+        for topic, data in self.default_messages():
+            self._mqtt_publish_raw(topic, data)
+
+    def start_default_worker(self, period_ms=1000):
+        """CSV 기반 make_default_data()를 주기적으로 호출하는 작업 등록"""
+        if self.default_job is not None:
+            return
+        self.default_job = self.scheduler.add("default", period_ms, self._default_tick)
+
+    def stop_default_worker(self):
+        """기본 발행 작업 해제"""
+        self.scheduler.remove(self.default_job)
+        self.default_job = None
+
+    def _default_tick(self):
+        try:
+            # 오버라이드(수동 입력 중) 제외하고 CSV 기본 데이터 생성
+            self.make_default_data()
+        except Exception as e:
+            self.log_async(f"[기본 생성 오류] {e}")
+
+    def stat_lines(self):
+        """연결 풀 사용 시 연결별 처리량, DB 싱크 적재량, 종단간 지연"""
+        lines = []
+        if isinstance(self.mqtt, MqttPool):
+            lines += self.mqtt.stat_lines()
+        if self.db_sink is not None:
+            lines += self.db_sink.stat_lines()
+        if self.probe is not None:
+            lines += self.probe.stat_lines()
+        if self.limiter is not None:
+            lines += self.limiter.stat_lines()
+            if self.limit_backlog is not None and self.limit_backlog.pending:
+                lines.append(f"limit 밀림: {self.limit_backlog.pending}건 (토픽별 최신 값만 유지)")
+        if self.spool is not None:
+            lines += self.spool.stat_lines()
+        return lines
+
+    def log(self, text):
+        print(text, flush=True)
+
+    def log_async(self, text: str):
+        self.log(text)
+
+    def log_tick(self, text):
+        if self.tick_log:
+            self.log(text)
+
+    def close(self):
+        self.stop_default_worker()
+        self.scheduler.stop()
+        if self.db_sink is not None:
+            self.db_sink.close()
+        if self.probe is not None:
+            for line in self.probe.stat_lines():
+                self.log(f"[프로브] {line}")
+            self.probe.close()
+            self.probe = None
+        if self.metrics_server is not None:
+            self.metrics_server.close()
+            self.metrics_server = None
+        if self.spool is not None:
+            # 재전송 못 한 메시지는 디스크에 남아 다음 실행 때 이어서 재전송
+            self._spool_stop.set()
+            self._spool_thread.join(timeout=2.0)
+            spool, self.spool = self.spool, None
+            if spool.pending:
+                self.log(f"[스풀] 미전송 {spool.pending}건 보관 → 다음 실행 때 재전송")
+            spool.close()
+        if self.mqtt is None:
+            return
+        try:
+            self.mqtt.loop_stop()
+            self.mqtt.disconnect()
+        except Exception as e:
+            print(e)
+
+
+# -------------------- 헤드리스 실행 --------------------
+class ManualEmitter:
+    """수동 탭(Power/Water/Energy)의 헤드리스 버전: 고정값을 주기 발행"""
+
+    def __init__(self, pub: SensorPublisher, dtype, keys, vals, period_ms):
+        self.pub = pub
+        self.dtype = dtype
+        self.keys = sorted(keys)
+        self.vals = vals
+        self.period_ms = period_ms
+        self.job = None
+
+    def messages(self):
+        """(topic, bytes) 이터레이터, DB 싱크가 있으면 같은 payload 를 DB 로도"""
+        payloads = [manual_payload(self.dtype, key, self.vals) for key in self.keys]
+        if self.pub.db_sink is not None:
+            self.pub.db_sink.put_payloads(self.dtype, payloads)
+        if not self.pub.sink_mqtt:
+            return
+        for key, payload in zip(self.keys, payloads):
+            yield manual_topic(self.pub.mqtt_base, self.dtype, key), dumps(payload)
+
+    def emit_once(self):
+        for topic, data in self.messages():
+            self.pub._mqtt_publish_raw(topic, data)
+        return len(self.keys)
+
+    def tick(self):
+        try:
+            self.emit_once()
+        except Exception as e:
+            self.pub.log(f"{self.dtype} 오류: {e}")
+
+    def start(self):
+        self.pub.register_override(self.dtype, self.keys)
+        self.job = self.pub.scheduler.add(f"manual-{self.dtype}", self.period_ms, self.tick)
+
+    def stop(self):
+        self.pub.scheduler.remove(self.job)
+        self.job = None
+        self.pub.unregister_override(self.dtype, self.keys)
+
+
+MANUAL_FIELDS = {
+    'power': {"total_active_power": 0.0},
+    'water': {"inst_flow": 0.0},
+    'energy': {"co2": 0.0, "temp": 0.0, "humi": 0.0},
+}
+
+def all_keys(dtype):
+    """sensor_dict 기준 dtype의 전체 키"""
+    keys = set()
+    for floor_key, cfg in sensor_dict.items():
+        floor = int(floor_key.replace("F", ""))
+        if dtype == 'water':
+            keys.add((floor,))
+        else:
+            keys.update((floor, x) for x in cfg[dtype])
+    return keys
+
+def parse_keys(dtype, text):
+    """'all' | 'F1,F2' | 'F1/A,F3/B' | 'F1/1209' → 키 set"""
+    text = text.strip()
+    if text.lower() == "all":
+        return all_keys(dtype)
+    everything = all_keys(dtype)
+    keys = set()
+    for item in text.split(","):
+        item = item.strip().upper()
+        if not item:
+            continue
+        floor_txt, _, sub = item.partition("/")
+        floor = int(floor_txt.replace("F", ""))
+        if dtype == 'water':
+            key_set = {(floor,)}
+        elif sub:
+            key_set = {(floor, sub)}
+        else:  # 층만 지정 → 해당 층 전체
+            key_set = {k for k in everything if k[0] == floor}
+        unknown = key_set - everything
+        if unknown:
+            raise ValueError(f"{dtype}: 알 수 없는 위치 {sorted(unknown)}")
+        keys |= key_set
+    return keys
+
+def parse_select(text):
+    """'power:all' → ('power', keys)"""
+    dtype, _, spec = text.partition(":")
+    dtype = dtype.strip().lower()
+    if dtype not in MANUAL_FIELDS:
+        raise ValueError(f"데이터 종류는 power/water/energy 중 하나여야 합니다: '{dtype}'")
+    return dtype, parse_keys(dtype, spec or "all")
+
+def parse_manual(text, default_period):
+    """'power:F1/A,F2:total_active_power=1200@500' → (dtype, keys, vals, period_ms)"""
+    body, _, period = text.partition("@")
+    dtype, _, rest = body.partition(":")
+    keys_txt, _, vals_txt = rest.partition(":")
+    dtype, keys = parse_select(f"{dtype}:{keys_txt}")
+    vals = dict(MANUAL_FIELDS[dtype])
+    for kv in filter(None, (x.strip() for x in vals_txt.split(","))):
+        k, _, v = kv.partition("=")
+        if k not in vals:
+            raise ValueError(f"{dtype}: 입력 항목은 {list(vals)} 중 하나여야 합니다: '{k}'")
+        vals[k] = float(v)
+    period_ms = int(period) if period else default_period
+    if period_ms <= 0:
+        raise ValueError("주기(ms)는 1 이상의 정수여야 합니다.")
+    return dtype, keys, vals, period_ms
+
+
+def build_arg_parser():
+    ap = argparse.ArgumentParser(
+        prog="sensor_mqtt",
+        description="GUI 없이 센서 데이터를 MQTT로 발행 (기본 발행 + 수동 입력)")
+    ap.add_argument("--config", default=CONFIG_ENV, help="config.env 경로")
+    ap.add_argument("--host", help="MQTT_HOST 덮어쓰기")
+    ap.add_argument("--port", type=int, help="MQTT_PORT 덮어쓰기")
+    ap.add_argument("--base-topic", help="MQTT_BASE_TOPIC 덮어쓰기")
+    ap.add_argument("--qos", type=int, choices=(0, 1, 2), help="MQTT_QOS 덮어쓰기")
+    ap.add_argument("--ca-cert", help="MQTT_CA_CERT 덮어쓰기, 빈 값이면 비 TLS 연결")
+    ap.add_argument("--fleet", help="플릿 스펙(JSON) 경로, FLEET_SPEC 덮어쓰기")
+    ap.add_argument("--seed", type=int, help="지터 난수 시드(RANDOM_SEED), 같은 시드면 같은 값 재현")
+    ap.add_argument("--policy", choices=("skip", "catchup"), help="늦은 틱 처리 정책(SCHEDULER_POLICY)")
+    ap.add_argument("--engine", choices=("thread", "asyncio", "process"),
+                    help="발행 엔진(PUBLISH_ENGINE): thread=스케줄러 스레드, asyncio=비동기 파이프라인, "
+                         "process=키 공간을 나눈 워커 프로세스")
+    ap.add_argument("--workers", type=int, help="process 엔진 워커 수(GEN_WORKERS), 0이면 CPU 코어 수")
+    ap.add_argument("--max-inflight", type=int, help="asyncio 엔진 최대 미확인 메시지 수(MQTT_MAX_INFLIGHT)")
+    ap.add_argument("--pool-size", type=int, help="MQTT 연결 수(MQTT_POOL_SIZE), 토픽 해시로 연결 고정")
+    ap.add_argument("--pool-mode", choices=("thread", "process"),
+                    help="연결 풀 방식(MQTT_POOL_MODE): thread=연결별 스레드, process=연결별 프로세스")
+    ap.add_argument("--sink", choices=("mqtt", "db", "both"),
+                    help="출력 대상(DATA_SINK): mqtt / db(Postgres 직접 적재) / both")
+    ap.add_argument("--metrics-port", type=int,
+                    help="지표 HTTP 포트(METRICS_PORT), /metrics 를 Prometheus 형식으로 제공, 0이면 끔")
+    ap.add_argument("--probe", action="store_true",
+                    help="종단간 지연 측정(PROBE): 발행 토픽을 다시 구독해 dtype별 지연/손실/순서 출력")
+    ap.add_argument("--probe-sample", type=float,
+                    help="지연 측정 대상 토픽 비율(PROBE_SAMPLE, 0~1), 1이면 {base}/# 전체 구독")
+    ap.add_argument("--spool", action="store_true",
+                    help="오프라인 스풀(SPOOL_ENABLE): 브로커 연결이 끊긴 동안 디스크에 저장 후 재연결 시 재전송")
+    ap.add_argument("--backfill", nargs=2, metavar=("START", "END"),
+                    help="과거 백필: [START, END) 구간을 합성 타임스탬프로 생성 후 종료, 예) 2025-08-01 2025-09-01")
+    ap.add_argument("--speed", type=float, default=0,
+                    help="백필 속도 배율 (60 = 1초에 1분 분량), 0이면 최대 속도")
+    ap.add_argument("--step", type=int, default=0,
+                    help="백필 간격(초), 0이면 시나리오의 모든 행 시각")
+    ap.add_argument("--profile", help="부하 프로파일(JSON) 경로(LOAD_PROFILE): 단계별 목표 msg/s/활성 키 수로 발행 후 종료")
+    ap.add_argument("--profile-out", help="부하 프로파일 목표/달성 속도 기록 CSV 경로(LOAD_PROFILE_RECORD)")
+    ap.add_argument("--period", type=int, default=None,
+                    help="기본 발행 주기(ms), 기본값 DEFAULT_PERIOD_MS 또는 1000")
+    ap.add_argument("--select", action="append", default=[], metavar="TYPE:KEYS",
+                    help="기본 발행 대상, 예) power:all  water:F1,F2  energy:F1/1209 (반복 가능)")
+    ap.add_argument("--manual", action="append", default=[], metavar="TYPE:KEYS:FIELD=VAL[@MS]",
+                    help="수동 입력 발행, 예) power:F1/A:total_active_power=1200@500 (반복 가능)")
+    ap.add_argument("--stats-interval", type=float, default=5.0, help="처리량 출력 간격(초), 0이면 끔")
+    ap.add_argument("--duration", type=float, default=0, help="실행 시간(초), 0이면 Ctrl+C까지")
+    ap.add_argument("-q", "--quiet", action="store_true", help="틱별 발행 로그 숨김")
+    return ap
+
+def env_from_args(args):
+    env = load_env_vars(args.config)
+    for key, val in (("MQTT_HOST", args.host), ("MQTT_PORT", args.port),
+                     ("MQTT_BASE_TOPIC", args.base_topic), ("MQTT_QOS", args.qos),
+                     ("MQTT_CA_CERT", args.ca_cert), ("FLEET_SPEC", args.fleet),
+                     ("RANDOM_SEED", args.seed), ("SCHEDULER_POLICY", args.policy),
+                     ("PUBLISH_ENGINE", args.engine), ("MQTT_MAX_INFLIGHT", args.max_inflight),
+                     ("MQTT_POOL_SIZE", args.pool_size), ("MQTT_POOL_MODE", args.pool_mode),
+                     ("GEN_WORKERS", args.workers), ("DATA_SINK", args.sink),
+                     ("METRICS_PORT", args.metrics_port), ("PROBE", args.probe or None),
+                     ("PROBE_SAMPLE", args.probe_sample), ("LOAD_PROFILE", args.profile),
+                     ("LOAD_PROFILE_RECORD", args.profile_out), ("SPOOL_ENABLE", args.spool or None)):
+        if val is not None:
+            env[key] = str(val)
+    return env
+
+class StatsPrinter:
+    """interval 초마다 처리량/스케줄 지연을 stdout 으로 출력"""
+
+    def __init__(self, pub, interval, extra=None):
+        self.pub = pub
+        self.interval = interval if interval and interval > 0 else None
+        self.extra = extra  # 추가 출력 줄을 돌려주는 콜백 (엔진별 통계)
+        self.last_t = time.monotonic()
+        self.last = pub.stats.snapshot()
+
+    def poll(self):
+        now = time.monotonic()
+        if not self.interval or now - self.last_t < self.interval:
+            return
+        cur = self.pub.stats.snapshot()
+        dt = now - self.last_t
+        print(f"[{datetime.now().replace(microsecond=0)}] "
+              f"{(cur[0] - self.last[0]) / dt:.1f} msg/s, {(cur[1] - self.last[1]) / dt / 1024:.1f} KiB/s, "
+              f"누적 {cur[0]}건 / 오류 {cur[2]}건", flush=True)
+        for js in self.pub.scheduler.stats(reset=True):
+            print(f"    {js['name']}: {js['ticks']}틱, 지연 평균 {js['late_avg_ms']:.2f}ms "
+                  f"/ 최대 {js['late_max_ms']:.2f}ms, 초과 {js['overruns']}회, 건너뜀 {js['skipped']}틱",
+                  flush=True)
+        for line in self.pub.stat_lines() + (self.extra() if self.extra else []):
+            print(f"    {line}", flush=True)
+        self.last_t, self.last = now, cur
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    env = env_from_args(args)
+    period = args.period or int(env.get("DEFAULT_PERIOD_MS", "1000"))
+    try:
+        selects = [parse_select(x) for x in args.select]
+        manuals = [parse_manual(x, period) for x in args.manual]
+    except ValueError as e:
+        raise SystemExit(f"인자 오류: {e}")
+
+    engine = env.get("PUBLISH_ENGINE", "thread")
+    # 백필/부하 프로파일은 엔진과 무관하게 이 프로세스의 연결로 직접 발행,
+    # 그 밖에 process 엔진의 부모는 수동 입력이 있을 때만 직접 연결
+    direct = bool(args.backfill or env.get("LOAD_PROFILE"))
+    pub = SensorPublisher(env, connect=(direct or engine == "thread" or (engine == "process" and bool(manuals))))
+    pub.tick_log = not args.quiet
+    for dtype, keys in selects:
+        pub.add_default_select(dtype, keys)
+    emitters = [ManualEmitter(pub, *m) for m in manuals]
+
+    if args.backfill:
+        from backfill import Backfill, parse_time
+        try:
+            job = Backfill(pub, parse_time(args.backfill[0]), parse_time(args.backfill[1]),
+                           speed=args.speed, step_sec=args.step)
+        except ValueError as e:
+            pub.close()
+            raise SystemExit(f"인자 오류: {e}")
+        stop = threading.Event()
+        signal.signal(signal.SIGINT, lambda *_: stop.set())
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+        job.run(stop, progress_sec=args.stats_interval)
+        pub.close()
+        return
+
+    if env.get("LOAD_PROFILE"):
+        from loadprofile import LoadRunner, load_profile
+        try:
+            runner = LoadRunner(pub, load_profile(env["LOAD_PROFILE"]),
+                                record_path=env.get("LOAD_PROFILE_RECORD") or None)
+        except (OSError, ValueError) as e:
+            pub.close()
+            raise SystemExit(f"부하 프로파일 오류: {e}")
+        if pub.metrics is not None:
+            pub.metrics.add_collector(runner.metric_values)
+        stop = threading.Event()
+        signal.signal(signal.SIGINT, lambda *_: stop.set())
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+        runner.run(stop, progress_sec=args.stats_interval)
+        pub.close()
+        return
+
+    if engine == "asyncio":
+        import asyncio
+        if to_bool(env.get("SPOOL_ENABLE", "false")) and pub.sink_mqtt:
+            pub.log("[스풀] asyncio 엔진에서는 지원하지 않음 → SPOOL_ENABLE 무시")
+        from aio_engine import AsyncEngine
+        aio = AsyncEngine(pub, max_inflight=int(env.get("MQTT_MAX_INFLIGHT", "1000")),
+                          pool_size=int(env.get("MQTT_POOL_SIZE", "1") or 1))
+        asyncio.run(aio.run(period, emitters, args.duration, args.stats_interval))
+        pub.close()
+        return
+
+    if engine == "process":
+        from mp_engine import ProcessEngine
+        procs = ProcessEngine(pub, workers=int(env.get("GEN_WORKERS", "0") or 0))
+        procs.run(period, selects, emitters, args.duration, args.stats_interval, args.quiet)
+        pub.close()
+        return
+
+    for em in emitters:
+        em.start()
+    pub.start_default_worker(period_ms=period)
+
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+    started = time.monotonic()
+    printer = StatsPrinter(pub, args.stats_interval)
+    while not stop.is_set():
+        stop.wait(0.5)
+        printer.poll()
+        if args.duration and time.monotonic() - started >= args.duration:
+            break
+
+    for em in emitters:
+        em.stop()
+    pub.close()
+
+
+if __name__ == "__main__":
+    mp.freeze_support()  # PyInstaller exe 에서 연결 풀 process 모드
+    main()
@@ -0,0 +1,195 @@
+import mmap
+import os
+import struct
+import threading
+
+
+# 브로커 장애 대비 디스크 스풀 (store-and-forward)
+# 연결이 끊기면 paho 는 QoS0 메시지를 버리고 QoS1/2 는 메모리에 무한히 쌓는다.
+# 끊긴 동안 생성된 메시지는 SPOOL_DIR 의 세그먼트 파일(고정 크기, mmap)에 순서대로 붙여 쓰고,
+# 다시 연결되면 SPOOL_REPLAY_RATE msg/s 로 오래된 것부터 재전송한다.
+#
+# 세그먼트 파일 (seg-000001.spool, SPOOL_SEGMENT_MB 크기로 미리 확보)
+#   헤더 16바이트 : b"SPL1" + 예약 4바이트 + 읽은 위치(u64, 재전송할 때마다 갱신)
+#   레코드        : 길이(u32) + 토픽 길이(u16) + 토픽 + payload, 길이 0 = 끝
+#   레코드 본문을 먼저 쓰고 길이를 마지막에 쓰므로 중간에 죽어도 앞 레코드까지는 온전하다.
+#   재시작하면 남은 세그먼트를 읽은 위치부터 다시 스캔해서 이어서 재전송한다.
+#
+# 전체 크기 상한 SPOOL_MAX_MB 를 넘으면
+#   drop_oldest : 가장 오래된 세그먼트를 지움 (최근 데이터 유지, 기본)
+#   drop_newest : 새 메시지를 버림 (이미 쌓인 과거 데이터 유지)
+# 메모리는 쓰는 세그먼트/읽는 세그먼트 mmap 두 개뿐이라 장애가 길어져도 늘지 않는다.
+
+MAGIC = b"SPL1"
+HEADER = 16
+REC = struct.Struct("<IH")  # 레코드 길이(토픽 길이 필드 이후 바이트 수), 토픽 길이
+POLICIES = ("drop_oldest", "drop_newest")
+
+
+class _Segment:
+    def __init__(self, path, size, create=False):
+        self.path = path
+        if create:
+            with open(path, "wb") as f:
+                f.truncate(size)
+                f.seek(0)
+                f.write(MAGIC)
+        self._file = open(path, "r+b")
+        self.mm = mmap.mmap(self._file.fileno(), 0)
+        self.size = len(self.mm)
+        self.read_pos = struct.unpack_from("<Q", self.mm, 8)[0] or HEADER
+        self.write_pos = self.read_pos
+        self.count = 0  # 읽은 위치 이후 남은 레코드 수
+        if not create:
+            self._scan()
+
+    def _scan(self):
+        """읽은 위치부터 끝 표시(길이 0)까지 레코드 수/쓰기 위치 복구"""
+        pos = self.read_pos
+        while pos + REC.size <= self.size:
+            ln, _ = REC.unpack_from(self.mm, pos)
+            if ln == 0 or pos + REC.size + ln > self.size:
+                break
+            pos += REC.size + ln
+            self.count += 1
+        self.write_pos = pos
+
+    def free(self):
+        return self.size - self.write_pos
+
+    def append(self, topic_b, data):
+        pos = self.write_pos
+        body = pos + REC.size
+        self.mm[body:body + len(topic_b)] = topic_b
+        self.mm[body + len(topic_b):body + len(topic_b) + len(data)] = data
+        REC.pack_into(self.mm, pos, len(topic_b) + len(data), len(topic_b))  # 길이는 마지막에
+        self.write_pos = body + len(topic_b) + len(data)
+        self.count += 1
+
+    def pop(self):
+        pos = self.read_pos
+        ln, tl = REC.unpack_from(self.mm, pos)
+        body = pos + REC.size
+        topic = self.mm[body:body + tl].decode("utf-8")
+        data = self.mm[body + tl:body + ln]
+        self.read_pos = body + ln
+        struct.pack_into("<Q", self.mm, 8, self.read_pos)
+        self.count -= 1
+        return topic, data
+
+    def close(self, delete=False):
+        try:
+            self.mm.flush()
+            self.mm.close()
+        finally:
+            self._file.close()
+        if delete:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+class OfflineSpool:
+    def __init__(self, path, max_bytes=1 << 30, segment_bytes=16 << 20, policy="drop_oldest", log=print):
+        if policy not in POLICIES:
+            raise ValueError(f"SPOOL_POLICY 는 {POLICIES} 중 하나여야 합니다: '{policy}'")
+        self.path = path
+        self.segment_bytes = max(HEADER + 4096, int(segment_bytes))
+        self.max_segments = max(2, int(max_bytes) // self.segment_bytes)
+        self.policy = policy
+        self.log = log
+        self._lock = threading.Lock()
+        self.stored = 0    # 누적 저장
+        self.replayed = 0  # 누적 재전송
+        self.evicted = 0   # 상한 초과로 버린 수
+
+        os.makedirs(path, exist_ok=True)
+        names = sorted(n for n in os.listdir(path) if n.startswith("seg-") and n.endswith(".spool"))
+        self._next_no = int(names[-1][4:-6]) + 1 if names else 1
+        self.segments = []  # 오래된 것 → 최신 (마지막이 쓰는 세그먼트)
+        for name in names:
+            try:
+                seg = _Segment(os.path.join(path, name), self.segment_bytes)
+            except (OSError, ValueError, struct.error) as e:
+                self.log(f"[스풀] 손상된 세그먼트 건너뜀 {name}: {e}")
+                continue
+            if seg.count or name == names[-1]:
+                self.segments.append(seg)
+            else:
+                seg.close(delete=True)
+        if self.pending:
+            self.log(f"[스풀] 이전 실행에서 남은 {self.pending}건을 재전송 대기열에 올림")
+
+    @property
+    def pending(self):
+        return sum(s.count for s in self.segments)
+
+    def _new_segment(self):
+        name = os.path.join(self.path, f"seg-{self._next_no:06d}.spool")
+        self._next_no += 1
+        seg = _Segment(name, self.segment_bytes, create=True)
+        self.segments.append(seg)
+        return seg
+
+    def append(self, topic, data):
+        """메시지 저장, 상한 때문에 버렸으면 False"""
+        topic_b = topic.encode("utf-8")
+        need = REC.size + len(topic_b) + len(data)
+        if need > self.segment_bytes - HEADER:
+            self.evicted += 1
+            return False
+        with self._lock:
+            seg = self.segments[-1] if self.segments else None
+            if seg is None or seg.free() < need:
+                if len(self.segments) >= self.max_segments:
+                    if self.policy == "drop_newest":
+                        self.evicted += 1
+                        return False
+                    old = self.segments.pop(0)
+                    self.evicted += old.count
+                    self.log(f"[스풀] 상한 초과: 오래된 세그먼트 삭제 ({old.count}건)")
+                    old.close(delete=True)
+                seg = self._new_segment()
+            seg.append(topic_b, data)
+            self.stored += 1
+            return True
+
+    def pop(self, n):
+        """오래된 것부터 최대 n 건 [(topic, bytes)]"""
+        out = []
+        with self._lock:
+            while len(out) < n and self.segments:
+                seg = self.segments[0]
+                while len(out) < n and seg.count:
+                    out.append(seg.pop())
+                if seg.count == 0:
+                    if len(self.segments) == 1:
+                        # 다 읽은 쓰기 세그먼트는 처음부터 다시 사용
+                        if seg.write_pos != HEADER:
+                            seg.close(delete=True)
+                            self.segments.pop(0)
+                        break
+                    self.segments.pop(0).close(delete=True)
+            self.replayed += len(out)
+        return out
+
+    def stat_lines(self):
+        with self._lock:
+            pending, segs = self.pending, len(self.segments)
+        return [f"spool: 대기 {pending}건 (세그먼트 {segs}개 × {self.segment_bytes >> 20}MB), "
+                f"누적 저장 {self.stored} / 재전송 {self.replayed} / 버림 {self.evicted}"]
+
+    def metric_values(self):
+        return [
+            ("sensorpub_spool_pending", "gauge", "Messages waiting in the offline spool.", self.pending),
+            ("sensorpub_spool_stored_total", "counter", "Messages written to the offline spool.", self.stored),
+            ("sensorpub_spool_replayed_total", "counter", "Messages replayed from the offline spool.", self.replayed),
+            ("sensorpub_spool_evicted_total", "counter", "Messages dropped by the spool size cap.", self.evicted),
+        ]
+
+    def close(self):
+        with self._lock:
+            for seg in self.segments:
+                seg.close(delete=seg.count == 0)
+            self.segments = []